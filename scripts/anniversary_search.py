@@ -1,19 +1,77 @@
 import logging
-from datetime import datetime
+from datetime import date, datetime
 from pathlib import Path
-from typing import List, Dict
+from typing import List, Dict, Iterator, Tuple, Optional
 
 import time_engine
 import data_handler
 import chart_discovery
 import chart_utils
+import chart_store
+import query_executor
+import export_writers
+import instrumentation
 
 logger = logging.getLogger(__name__)
 
 
-def run_anniversary_search(data_dir: str, input_date: str, rank: int = 1) -> List[Dict]:
+def _find_week_rank_hits(
+    chart_dir: Path,
+    patterns: List[str],
+    ranks: List[int],
+    files: Optional[List[Path]] = None,
+) -> List[Tuple[str, int, Dict]]:
+    """
+    Returns (week stem, rank, hit) for every requested rank of the chart
+    weeks matching the patterns, reading each week once. Reads the given
+    files, or the whole chart when files is None: from the compiled store
+    when available and from JSON otherwise.
+    """
+    hits = []
+    store = chart_store.open_store(chart_dir) if files is None else None
+    if store is not None:
+        for week in store.weeks_for_patterns(patterns):
+            rows = store.find_ranks(week, ranks)
+            for rank in ranks:
+                if rank in rows:
+                    hit_info = data_handler.build_hit(store.entry(rows[rank]))
+                    hits.append((store.stems[week], rank, hit_info))
+        return hits
+
+    if files is None:
+        files = chart_utils.get_files_for_week(chart_dir, patterns)
+    for json_file in files:
+        found = data_handler.extract_hits(str(json_file), ranks)
+        for rank in ranks:
+            if rank in found:
+                hits.append((json_file.stem, rank, found[rank]))
+    return hits
+
+
+def _find_week_hits(
+    chart_dir: Path,
+    patterns: List[str],
+    rank: int,
+    files: Optional[List[Path]] = None,
+) -> List[Tuple[str, Dict]]:
+    """Returns (week stem, hit) pairs for one rank; see _find_week_rank_hits."""
+    return [
+        (stem, hit_info)
+        for stem, _, hit_info in _find_week_rank_hits(chart_dir, patterns, [rank], files)
+    ]
+
+
+@instrumentation.timed("anniversary_search.run_anniversary_search")
+def run_anniversary_search(
+    data_dir: str,
+    input_date: str,
+    rank: int = 1,
+    executor: str = "serial",
+    workers: Optional[int] = None,
+) -> List[Dict]:
     """
     Main anniversary search routine. Returns sorted list of results.
+    Charts and file batches are searched with the given executor mode.
     """
     try:
         patterns, start_date, end_date = time_engine.get_week_patterns(input_date)
@@ -32,6 +90,8 @@ def run_anniversary_search(data_dir: str, input_date: str, rank: int = 1) -> Lis
         logger.warning("No chart folders discovered from metadata files.")
         return results
 
+    task_charts = []
+    tasks = []
     for chart_info in chart_infos:
         chart_data_p = Path(chart_info["data_dir"])
         if not chart_data_p.exists():
@@ -40,25 +100,168 @@ def run_anniversary_search(data_dir: str, input_date: str, rank: int = 1) -> Lis
             )
             continue
 
-        matching_files = chart_utils.get_files_for_week(chart_data_p, patterns)
-        for json_file in matching_files:
-            hit_info = data_handler.extract_hit(str(json_file), rank)
-            if hit_info:
-                results.append(
-                    {
-                        "full_date": json_file.stem,
-                        "source": chart_info["source"],
-                        "chart": chart_info["chart_name"],
-                        "details": hit_info,
-                    }
-                )
+        batches = query_executor.plan_chart_batches(
+            chart_data_p,
+            lambda: chart_utils.get_files_for_week(chart_data_p, patterns),
+            executor,
+            workers,
+        )
+        for files in batches:
+            task_charts.append(chart_info)
+            tasks.append((chart_data_p, patterns, rank, files))
+
+    task_hits = query_executor.run_tasks(_find_week_hits, tasks, executor, workers)
+    for chart_info, hits in zip(task_charts, task_hits):
+        for full_date, hit_info in hits:
+            results.append(
+                {
+                    "full_date": full_date,
+                    "source": chart_info["source"],
+                    "chart": chart_info["chart_name"],
+                    "details": hit_info,
+                }
+            )
 
     # Sort oldest first
     return sorted(results, key=lambda x: x["full_date"])
 
 
+def iter_anniversary_search(
+    data_dir: str, input_date: str, rank: int = 1
+) -> Iterator[Dict]:
+    """
+    Generator variant of run_anniversary_search: yields the same results one
+    at a time, chart by chart and oldest first within each chart, reading
+    one week file at a time, so memory stays constant.
+    """
+    try:
+        patterns, _, _ = time_engine.get_week_patterns(input_date)
+    except ValueError as e:
+        raise ValueError(f"Invalid input_date: {e}")
+
+    for chart_info in chart_discovery.discover_chart_folders(data_dir):
+        chart_data_p = Path(chart_info["data_dir"])
+        if not chart_data_p.exists():
+            logger.warning(
+                f"Chart folder not found: {chart_info['source']} / {chart_info['chart_name']}"
+            )
+            continue
+        if chart_store.has_store(chart_data_p):
+            units: List[Optional[List[Path]]] = [None]
+        else:
+            units = [[f] for f in chart_utils.get_files_for_week(chart_data_p, patterns)]
+        for files in units:
+            for full_date, hit_info in _find_week_hits(chart_data_p, patterns, rank, files):
+                yield {
+                    "full_date": full_date,
+                    "source": chart_info["source"],
+                    "chart": chart_info["chart_name"],
+                    "details": hit_info,
+                }
+
+
+@instrumentation.timed("anniversary_search.run_anniversary_batch")
+def run_anniversary_batch(
+    data_dir: str,
+    input_dates: List[str],
+    min_rank: int = 1,
+    max_rank: int = 1,
+    executor: str = "serial",
+    workers: Optional[int] = None,
+) -> Dict[str, List[Dict]]:
+    """
+    Anniversary search for many dates and a range of ranks at once, e.g. the
+    top 10 for every day of a month. Dates are grouped by their week patterns
+    and every matching week file is read once for all ranks and dates.
+
+    Returns {input date: results}, where results are what
+    run_anniversary_search returns for that date, for every rank in
+    [min_rank, max_rank], each with a "rank" key, sorted by date then rank.
+    """
+    if min_rank > max_rank or min_rank < 1:
+        raise ValueError("Invalid rank range.")
+    ranks = list(range(min_rank, max_rank + 1))
+
+    # Dates of the same Sunday–Saturday week share their patterns
+    input_dates = list(dict.fromkeys(input_dates))
+    date_groups: Dict[Tuple[str, ...], List[str]] = {}
+    for input_date in input_dates:
+        try:
+            patterns, _, _ = time_engine.get_week_patterns(input_date)
+        except ValueError as e:
+            raise ValueError(f"Invalid input_date '{input_date}': {e}")
+        date_groups.setdefault(tuple(patterns), []).append(input_date)
+    all_patterns = sorted({p for patterns in date_groups for p in patterns})
+
+    results: Dict[str, List[Dict]] = {input_date: [] for input_date in input_dates}
+    chart_infos = chart_discovery.discover_chart_folders(data_dir)
+    if not chart_infos:
+        logger.warning("No chart folders discovered from metadata files.")
+        return results
+
+    task_charts = []
+    tasks = []
+    for chart_info in chart_infos:
+        chart_data_p = Path(chart_info["data_dir"])
+        if not chart_data_p.exists():
+            logger.warning(
+                f"Chart folder not found: {chart_info['source']} / {chart_info['chart_name']}"
+            )
+            continue
+
+        batches = query_executor.plan_chart_batches(
+            chart_data_p,
+            lambda: chart_utils.get_files_for_week(chart_data_p, all_patterns),
+            executor,
+            workers,
+        )
+        for files in batches:
+            task_charts.append(chart_info)
+            tasks.append((chart_data_p, all_patterns, ranks, files))
+
+    # Overlapping weeks (e.g. the same day in different years) share files
+    groups_by_suffix: Dict[str, List[Tuple[str, ...]]] = {}
+    for patterns in date_groups:
+        for p in patterns:
+            groups_by_suffix.setdefault(p, []).append(patterns)
+
+    task_hits = query_executor.run_tasks(
+        _find_week_rank_hits, tasks, executor, workers
+    )
+    for chart_info, hits in zip(task_charts, task_hits):
+        for full_date, rank, hit_info in hits:
+            for patterns in groups_by_suffix.get(full_date[-6:], []):
+                for input_date in date_groups[patterns]:
+                    results[input_date].append(
+                        {
+                            "full_date": full_date,
+                            "source": chart_info["source"],
+                            "chart": chart_info["chart_name"],
+                            "rank": rank,
+                            "details": hit_info,
+                        }
+                    )
+
+    for input_date, date_results in results.items():
+        date_results.sort(key=lambda x: (x["full_date"], x["rank"]))
+    return results
+
+
+def month_dates(month: str) -> List[str]:
+    """Every YYYY-MM-DD date of a YYYY-MM month."""
+    try:
+        first = datetime.strptime(month, "%Y-%m").date()
+    except ValueError:
+        raise ValueError("Month format must be YYYY-MM")
+    start = first.toordinal()
+    next_month = first.replace(day=28).toordinal() + 4
+    end = next_month - date.fromordinal(next_month).day
+    return [time_engine.ordinal_to_date_str(o) for o in range(start, end + 1)]
+
+
 if __name__ == "__main__":
     import argparse
+    import sys
 
     logging.basicConfig(level=logging.INFO)
 
@@ -68,9 +271,71 @@ if __name__ == "__main__":
     )
     parser.add_argument("--date", default=datetime.now().strftime("%Y-%m-%d"))
     parser.add_argument("--rank", type=int, default=1)
+    parser.add_argument(
+        "--dates", nargs="+", help="Batch mode: several dates (YYYY-MM-DD)"
+    )
+    parser.add_argument("--month", help="Batch mode: every day of a month (YYYY-MM)")
+    parser.add_argument(
+        "--max_rank", type=int, help="Batch mode: return ranks --rank..--max_rank"
+    )
+    query_executor.add_executor_arguments(parser)
+    export_writers.add_export_arguments(parser)
+    instrumentation.add_profile_argument(parser)
     args = parser.parse_args()
+    instrumentation.profile_from_args(args)
 
-    anniversary_list = run_anniversary_search(args.data_dir, args.date, args.rank)
+    batch_mode = bool(args.dates or args.month or args.max_rank)
+    if batch_mode:
+        batch_dates = list(args.dates or [])
+        if args.month:
+            batch_dates += month_dates(args.month)
+        # A batch asked for by --max_rank alone covers --date
+        batch = run_anniversary_batch(
+            args.data_dir,
+            batch_dates or [args.date],
+            args.rank,
+            args.max_rank or args.rank,
+            args.executor,
+            args.workers,
+        )
+
+    if args.output:
+        if batch_mode:
+            records = (
+                {"input_date": input_date, **item}
+                for input_date, date_results in batch.items()
+                for item in date_results
+            )
+            fields = ["input_date", "full_date", "source", "chart", "rank"]
+        else:
+            records = iter_anniversary_search(args.data_dir, args.date, args.rank)
+            fields = ["full_date", "source", "chart"]
+        fields += ["details.title", "details.artist", "details.weeks"]
+        count = export_writers.export_records(
+            records, args.output, args.export_format, fields
+        )
+        export_writers.report_export(count, args.output)
+        sys.exit(0)
+
+    if batch_mode:
+        for input_date, date_results in batch.items():
+            print(f"\n## Week of {input_date}\n")
+            if not date_results:
+                print("No historical records found for this week.")
+                continue
+            print("| Date | Source / Chart | Rank | Artist - Title |")
+            print("|------|----------------|------|----------------|")
+            for item in date_results:
+                song = item["details"]
+                print(
+                    f"| {item['full_date']} | {item['source']} / {item['chart']} | "
+                    f"#{item['rank']} | {song['artist']} - {song['title']} |"
+                )
+        sys.exit(0)
+
+    anniversary_list = run_anniversary_search(
+        args.data_dir, args.date, args.rank, args.executor, args.workers
+    )
 
     if not anniversary_list:
         print("No historical records found for this week.")
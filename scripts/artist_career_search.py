@@ -0,0 +1,142 @@
+import logging
+import re
+from pathlib import Path
+from typing import List, Dict
+
+import chart_discovery
+import song_index
+import song_search
+import instrumentation
+
+logger = logging.getLogger(__name__)
+
+
+def _matching_artist_keys(
+    index: song_index.SongIndex, artist: str, include_collaborations: bool
+) -> List[str]:
+    """
+    Song keys credited to the artist: an exact (canonical) credit match, or
+    with include_collaborations any credit naming the artist as whole words,
+    e.g. "Madonna" also matches "Madonna Featuring Justin Timberlake".
+    """
+    target = index.credits.artist_key(artist)
+    artist_keys = index.artist_keys()
+    if not include_collaborations:
+        return list(artist_keys.get(target, []))
+    pattern = re.compile(r"(?<!\w)" + re.escape(target) + r"(?!\w)")
+    return [
+        skey
+        for credit, keys in artist_keys.items()
+        if pattern.search(credit)
+        for skey in keys
+    ]
+
+
+@instrumentation.timed("artist_career_search.get_artist_career")
+def get_artist_career(
+    data_dir: str, artist: str, include_collaborations: bool = False
+) -> List[Dict]:
+    """
+    Returns every charting song of an artist across all discovered charts,
+    one record per song and chart with debut and last week, peak position,
+    weeks on chart and weeks at #1, ordered by debut date.
+
+    Served from the chart run table of the song index; when the index is
+    missing or out of date, it is rebuilt in memory for this query.
+    """
+    if not artist.strip():
+        raise ValueError("Artist name is required.")
+
+    chart_infos = []
+    for chart_info in chart_discovery.discover_chart_folders(data_dir):
+        if not Path(chart_info["data_dir"]).exists():
+            logger.warning(
+                f"Chart folder not found: {chart_info['source']} / {chart_info['chart_name']}"
+            )
+            continue
+        chart_infos.append(chart_info)
+
+    index = song_index.load_index(data_dir)
+    if index is None or not index.is_current(data_dir, chart_infos):
+        logger.warning("Song index is missing or out of date; rebuilding it in memory.")
+        index = song_index.build_index(data_dir)
+
+    chart_order = {
+        song_index.chart_key(data_dir, chart_info): (i, chart_info)
+        for i, chart_info in enumerate(chart_infos)
+    }
+    results = []
+    for skey in _matching_artist_keys(index, artist, include_collaborations):
+        artist_name, song_name = index.names.get(
+            skey, skey.split(song_index.KEY_SEPARATOR, 1)
+        )
+        for key, run in index.runs.get(skey, {}).items():
+            if key not in chart_order:
+                continue
+            debut, last, peak, weeks, number_one_weeks = run
+            order, chart_info = chart_order[key]
+            results.append(
+                {
+                    "artist": artist_name,
+                    "song": song_name,
+                    "source": chart_info["source"],
+                    "chart": chart_info["chart_name"],
+                    "debut": debut,
+                    "last_week": last,
+                    "peak": peak,
+                    "weeks": weeks,
+                    "number_one_weeks": number_one_weeks,
+                    "_order": order,
+                }
+            )
+
+    results.sort(key=lambda r: (r["debut"], r["_order"], r["song"].lower()))
+    for r in results:
+        del r["_order"]
+    return results
+
+
+if __name__ == "__main__":
+    import argparse
+
+    logging.basicConfig(level=logging.INFO)
+
+    parser = argparse.ArgumentParser(description="Artist career overview")
+    parser.add_argument(
+        "--data_dir", default=str(Path(__file__).parent.parent / "data")
+    )
+    parser.add_argument("--artist", default="Olivia Newton-John")
+    parser.add_argument(
+        "--include_collaborations",
+        action="store_true",
+        help="Also count credits that name the artist, e.g. featured credits",
+    )
+    instrumentation.add_profile_argument(parser)
+    args = parser.parse_args()
+    instrumentation.profile_from_args(args)
+
+    career = get_artist_career(
+        args.data_dir, args.artist, args.include_collaborations
+    )
+
+    if not career:
+        print("The artist was not found in any available charts.")
+        suggestions = song_search.search_artists(args.data_dir, args.artist, 5)
+        if suggestions:
+            print("\nDid you mean:")
+            for s in suggestions:
+                print(f"  --artist \"{s['artist']}\"")
+    else:
+        print(f"## {args.artist}\n")
+        print("| Debut | Song | Artist | Chart | Peak | Weeks | Weeks at #1 |")
+        print("|-------|------|--------|-------|------|-------|-------------|")
+        for r in career:
+            print(
+                f"| {r['debut']} | {r['song']} | {r['artist']} | "
+                f"{r['source']} / {r['chart']} | #{r['peak']} | {r['weeks']} | "
+                f"{r['number_one_weeks']} |"
+            )
+        number_ones = sum(1 for r in career if r["peak"] == 1)
+        print(f"\nChart runs: {len(career)}")
+        print(f"Number ones: {number_ones}")
+        print(f"Total weeks at #1: {sum(r['number_one_weeks'] for r in career)}")
@@ -0,0 +1,209 @@
+import asyncio
+import json
+import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from pathlib import Path
+from typing import Any, AsyncIterator, Callable, Deque, Dict, Iterable, List, Optional, Tuple
+
+import chart_discovery
+import chart_pack
+import chart_paths
+import chart_utils
+import data_handler
+import instrumentation
+import time_engine
+
+logger = logging.getLogger(__name__)
+
+# Week files being read at once, across all charts. Small reads on network or
+# cold storage are latency bound, so more reads in flight hide more latency.
+MAX_IN_FLIGHT = 32
+
+
+def _read_bytes(path: Path) -> bytes:
+    if chart_paths.pack_of(path):
+        return chart_pack.read_week_json(path)
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def _decode_week(json_file: Path, payload: bytes) -> Optional[List[Dict[str, Any]]]:
+    try:
+        return json.loads(payload).get("data", [])
+    except (json.JSONDecodeError, UnicodeDecodeError) as e:
+        logger.error(f"Error loading {json_file}: {e}")
+        return None
+
+
+async def aiter_files(
+    items: Iterable[Tuple[Any, Path]], max_in_flight: int = MAX_IN_FLIGHT
+) -> AsyncIterator[Tuple[Any, Path, List[Dict[str, Any]]]]:
+    """
+    Yields (tag, path, entries) for (tag, path) items, in item order. Up to
+    max_in_flight files are read ahead on worker threads while the event loop
+    parses the ones already read, so parsing overlaps I/O. Files that cannot
+    be read or parsed are logged and skipped, as by chart_store.read_week_file.
+    """
+    if max_in_flight < 1:
+        raise ValueError("max_in_flight must be at least 1.")
+    loop = asyncio.get_running_loop()
+    items = iter(items)
+    pending: Deque[Tuple[Any, Path, "asyncio.Future[bytes]"]] = deque()
+
+    # Shut down without waiting in the finally below: a context manager would
+    # block the event loop on reads still running when the consumer stops early
+    pool = ThreadPoolExecutor(max_workers=max_in_flight)
+
+    def submit() -> bool:
+        for tag, path in items:
+            pending.append((tag, path, loop.run_in_executor(pool, _read_bytes, path)))
+            return True
+        return False
+
+    try:
+        while len(pending) < max_in_flight and submit():
+            pass
+        while pending:
+            tag, path, future = pending.popleft()
+            try:
+                payload = await future
+            except OSError as e:
+                logger.error(f"Error loading {path}: {e}")
+                submit()
+                continue
+            submit()
+            data_handler.read_stats["files"] += 1
+            instrumentation.metrics.incr("files_opened")
+            instrumentation.metrics.incr("bytes_read", len(payload))
+            entries = _decode_week(path, payload)
+            if entries is not None:
+                yield tag, path, entries
+    finally:
+        # Reads that have not started yet are dropped on an early exit
+        for _, _, future in pending:
+            future.cancel()
+        pool.shutdown(wait=False)
+
+
+async def aiter_chart_weeks(
+    chart_dir: Path,
+    files: Optional[List[Path]] = None,
+    max_in_flight: int = MAX_IN_FLIGHT,
+) -> AsyncIterator[Tuple[str, List[Dict[str, Any]]]]:
+    """
+    Async counterpart of chart_store.read_chart_folder: yields (stem,
+    entries) for the given week files, or all of the chart's, in date order.
+    """
+    if files is None:
+        loop = asyncio.get_running_loop()
+        files = await loop.run_in_executor(
+            None, chart_utils.get_all_files, Path(chart_dir)
+        )
+    async for _, path, entries in aiter_files(((None, f) for f in files), max_in_flight):
+        yield path.stem, entries
+
+
+async def aiter_archive_weeks(
+    data_dir: str,
+    chart_infos: Optional[List[Dict]] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    max_in_flight: int = MAX_IN_FLIGHT,
+) -> AsyncIterator[Tuple[Dict, str, List[Dict[str, Any]]]]:
+    """
+    Yields (chart_info, stem, entries) for every week JSON file of the given
+    charts (default: all discovered ones), chart by chart in date order,
+    optionally within [start_date, end_date]. One window of max_in_flight
+    reads spans all charts, so the next chart's files are already being read
+    while the current one finishes. Compiled stores are not used. Charts are
+    discovered and listed on a worker thread, off the event loop.
+    """
+    windowed = bool(start_date or end_date)
+    try:
+        start = time_engine.parse_date_ordinal(start_date) if start_date else 1
+        end = time_engine.parse_date_ordinal(end_date) if end_date else date.max.toordinal()
+    except ValueError as e:
+        raise ValueError(f"Invalid date range: {e}")
+
+    def list_items() -> List[Tuple[Dict, Path]]:
+        infos = chart_infos
+        if infos is None:
+            infos = chart_discovery.discover_chart_folders(data_dir)
+        items = []
+        for chart_info in infos:
+            if windowed and not chart_discovery.overlaps(chart_info, start, end):
+                continue
+            chart_p = Path(chart_info["data_dir"])
+            if not chart_p.exists():
+                logger.warning(
+                    f"Chart folder not found: {chart_info['source']} / {chart_info['chart_name']}"
+                )
+                continue
+            if windowed:
+                files = chart_utils.get_files_between_ordinals(chart_p, start, end)
+            else:
+                files = chart_utils.get_all_files(chart_p)
+            items.extend((chart_info, f) for f in files)
+        return items
+
+    loop = asyncio.get_running_loop()
+    items = await loop.run_in_executor(None, list_items)
+    async for chart_info, path, entries in aiter_files(items, max_in_flight):
+        yield chart_info, path.stem, entries
+
+
+async def aiter_chart_folders(
+    chart_dirs: List[Path], max_in_flight: int = MAX_IN_FLIGHT
+) -> AsyncIterator[Tuple[Path, List[Tuple[str, List[Dict[str, Any]]]]]]:
+    """
+    Yields (chart folder, weeks) per folder, in order, with weeks as
+    read_chart_folder returns them. A folder is yielded as soon as its last
+    file is parsed, while reads of the next folders are already in flight.
+    Listing the folders runs in the default executor as well.
+    """
+    chart_dirs = [Path(d) for d in chart_dirs]
+
+    def list_items() -> List[Tuple[int, Path]]:
+        return [
+            (i, f) for i, chart_dir in enumerate(chart_dirs)
+            for f in chart_utils.get_all_files(chart_dir)
+        ]
+
+    loop = asyncio.get_running_loop()
+    items = await loop.run_in_executor(None, list_items)
+    current = 0
+    weeks: List[Tuple[str, List[Dict[str, Any]]]] = []
+    async for i, path, entries in aiter_files(items, max_in_flight):
+        while current < i:
+            yield chart_dirs[current], weeks
+            current, weeks = current + 1, []
+        weeks.append((path.stem, entries))
+    while current < len(chart_dirs):
+        yield chart_dirs[current], weeks
+        current, weeks = current + 1, []
+
+
+async def _map_charts(
+    chart_dirs: List[Path], func: Callable[[Path, List], Any], max_in_flight: int
+) -> List[Any]:
+    return [
+        func(chart_dir, weeks)
+        async for chart_dir, weeks in aiter_chart_folders(chart_dirs, max_in_flight)
+    ]
+
+
+@instrumentation.timed("async_loader.map_charts")
+def map_charts(
+    chart_dirs: List[Path],
+    func: Callable[[Path, List], Any],
+    max_in_flight: int = MAX_IN_FLIGHT,
+) -> List[Any]:
+    """
+    Reads chart folders with the async loader and returns func(chart folder,
+    weeks) for each, in order. Only one folder's parsed weeks are held at a
+    time besides the reads in flight. Must not be called from a running
+    event loop; use aiter_chart_folders there.
+    """
+    return asyncio.run(_map_charts(list(chart_dirs), func, max_in_flight))
@@ -0,0 +1,312 @@
+import json
+import logging
+import multiprocessing
+import platform
+import resource
+import shutil
+import subprocess
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Any, Optional
+
+import anniversary_search
+import chart_discovery
+import chart_paths
+import chart_store
+import chart_utils
+import data_handler
+import instrumentation
+import song_chart_history_search
+import song_index
+import songs_in_position_range_search
+
+logger = logging.getLogger(__name__)
+
+# Regressions beyond this fraction of the previous p50 are reported
+REGRESSION_THRESHOLD = 0.10
+
+
+def _discover(data_dir: str) -> Any:
+    return chart_discovery.discover_chart_folders(data_dir)
+
+
+def _anniversary(data_dir: str) -> Any:
+    return anniversary_search.run_anniversary_search(data_dir, "2024-07-13", 1)
+
+
+def _song_history(data_dir: str) -> Any:
+    return song_chart_history_search.get_song_chart_history(
+        data_dir, "Olivia Newton-John", "Physical"
+    )
+
+
+def _position_range(data_dir: str) -> Any:
+    # The range spans every week of the bundled and synthetic archives
+    return songs_in_position_range_search.get_songs_in_position_range(
+        data_dir,
+        chart_discovery.discover_chart_folders(data_dir)[0],
+        "1900-01-01",
+        "4999-12-31",
+        1,
+        10,
+        True,
+    )
+
+
+CASES = {
+    "discover_chart_folders": _discover,
+    "run_anniversary_search": _anniversary,
+    "get_song_chart_history": _song_history,
+    "get_songs_in_position_range": _position_range,
+}
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * pct / 100
+    lo, hi = int(k), min(int(k) + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+
+def _run_case(
+    name: str, data_dir: str, iterations: int, profile: bool = False
+) -> Dict[str, Any]:
+    """Runs one case in the current (fresh) process and collects its metrics."""
+    logging.disable(logging.WARNING)
+    instrumentation.metrics.enabled = profile
+    case = CASES[name]
+    latencies = []
+    files_before = data_handler.read_stats["files"]
+    for _ in range(iterations):
+        started = time.perf_counter()
+        case(data_dir)
+        latencies.append(time.perf_counter() - started)
+    files_read = data_handler.read_stats["files"] - files_before
+    total = sum(latencies)
+    # Percentiles describe warm runs; the first run is reported as cold
+    warm = latencies[1:] or latencies
+    result = {
+        "iterations": iterations,
+        "cold_ms": latencies[0] * 1000,
+        "p50_ms": _percentile(warm, 50) * 1000,
+        "p95_ms": _percentile(warm, 95) * 1000,
+        "throughput_qps": iterations / total if total else 0.0,
+        "files_read": files_read,
+        "files_per_s": files_read / total if total else 0.0,
+        # ru_maxrss is reported in KiB on Linux
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+    if profile:
+        result["profile"] = instrumentation.metrics.snapshot()
+    return result
+
+
+def run_benchmarks(
+    data_dir: str,
+    iterations: int = 5,
+    cases: Optional[List[str]] = None,
+    profile: bool = False,
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Runs every case in its own freshly spawned process, so caches start cold
+    and peak RSS is measured per case. With profile set, each result also
+    holds the case's instrumentation snapshot (counters and spans).
+    """
+    results = {}
+    context = multiprocessing.get_context("spawn")
+    for name in cases or list(CASES):
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+            future = pool.submit(_run_case, name, data_dir, iterations, profile)
+            results[name] = future.result()
+    return results
+
+
+def make_synthetic_archive(data_dir: str, out_dir: str, scale: int) -> str:
+    """
+    Writes a copy of the archive with every chart scaled `scale` times: each
+    copy k of a chart's weeks is shifted k chart-spans forward in time and its
+    song titles get a ' (k)' suffix, so both weeks and distinct songs grow.
+    Returns the synthetic data directory.
+    """
+    out_p = Path(out_dir)
+    out_p.mkdir(parents=True, exist_ok=True)
+    data_p = Path(data_dir)
+
+    for meta_file in data_p.iterdir():
+        if not meta_file.name.endswith(("-metadata.json", "-manifest.json")):
+            continue
+        with meta_file.open("r", encoding="utf-8") as f:
+            metadata = json.load(f)
+        for chart in metadata.get("charts", []):
+            if isinstance(chart, dict):
+                chart.pop("start_date", None)
+                chart.pop("end_date", None)
+        with (out_p / meta_file.name).open("w", encoding="utf-8") as f:
+            json.dump(metadata, f, indent=4, ensure_ascii=False)
+
+    for chart_info in chart_discovery.discover_chart_folders(data_dir):
+        src = Path(chart_info["data_dir"])
+        if not src.exists():
+            continue
+        dst = out_p / chart_paths.chart_base(src).relative_to(data_p)
+        dst.mkdir(parents=True, exist_ok=True)
+        weeks = chart_store.read_chart_folder(src)
+        dates = [datetime.strptime(stem, "%Y-%m-%d") for stem, _ in weeks]
+        span = (max(dates) - min(dates)) + timedelta(days=7)
+
+        for k in range(scale):
+            for (stem, entries), week_date in zip(weeks, dates):
+                new_date = (week_date + span * k).strftime("%Y-%m-%d")
+                data = []
+                for entry in entries:
+                    entry = dict(entry)
+                    if k:
+                        entry["song"] = f"{entry.get('song')} ({k})"
+                    data.append(entry)
+                with (dst / f"{new_date}.json").open("w", encoding="utf-8") as f:
+                    json.dump({"date": new_date, "data": data}, f, indent=4)
+    return str(out_p)
+
+
+def _prepare_synthetic(data_dir: str, out_dir: str, scale: int, compile: bool) -> str:
+    bench_dir = make_synthetic_archive(data_dir, out_dir, scale)
+    if compile:
+        chart_store.compile_all(bench_dir)
+        song_index.save_index(bench_dir, song_index.build_index(bench_dir))
+    return bench_dir
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=Path(__file__).parent,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def find_regressions(
+    current: Dict[str, Dict[str, Any]], previous: Dict[str, Dict[str, Any]]
+) -> List[str]:
+    """Lists cases whose p50 got slower than the previous run by the threshold."""
+    messages = []
+    for name, metrics in current.items():
+        old = previous.get(name)
+        if not old or not old.get("p50_ms"):
+            continue
+        change = metrics["p50_ms"] / old["p50_ms"] - 1
+        if change > REGRESSION_THRESHOLD:
+            messages.append(
+                f"{name}: p50 {old['p50_ms']:.1f} ms -> {metrics['p50_ms']:.1f} ms "
+                f"(+{change:.0%})"
+            )
+    return messages
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(description="Benchmark the query entry points")
+    parser.add_argument(
+        "--data_dir", default=str(Path(__file__).parent.parent / "data")
+    )
+    parser.add_argument("--iterations", type=int, default=5)
+    parser.add_argument("--case", action="append", choices=list(CASES))
+    parser.add_argument(
+        "--scale",
+        type=int,
+        default=1,
+        help="Run on a synthetic archive N times larger",
+    )
+    parser.add_argument(
+        "--compile",
+        action="store_true",
+        help="Build chart stores and the song index for the synthetic archive",
+    )
+    parser.add_argument(
+        "--output", help="Write machine-readable results to this file"
+    )
+    parser.add_argument(
+        "--compare", help="Previous results file to check for regressions"
+    )
+    instrumentation.add_profile_argument(parser)
+    args = parser.parse_args()
+
+    tmp_dir = None
+    bench_dir = args.data_dir
+    if args.scale > 1:
+        tmp_dir = tempfile.mkdtemp(prefix="chart-bench-")
+        print(f"Generating {args.scale}x synthetic archive in {tmp_dir}...")
+        # Generated in a child so the parent's peak RSS, which spawned
+        # children inherit, stays small
+        with ProcessPoolExecutor(
+            max_workers=1, mp_context=multiprocessing.get_context("spawn")
+        ) as pool:
+            bench_dir = pool.submit(
+                _prepare_synthetic, args.data_dir, tmp_dir, args.scale, args.compile
+            ).result()
+
+    try:
+        results = run_benchmarks(bench_dir, args.iterations, args.case, args.profile)
+        n_files = sum(
+            len(chart_utils.get_all_files(Path(c["data_dir"])))
+            for c in chart_discovery.discover_chart_folders(bench_dir)
+        )
+    finally:
+        if tmp_dir:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    print(f"\nArchive: {n_files} week files (scale {args.scale}x)\n")
+    print("| Entry point | cold | p50 | p95 | queries/s | files read | peak RSS |")
+    print("|-------------|------|-----|-----|-----------|------------|----------|")
+    for name, m in results.items():
+        print(
+            f"| {name} | {m['cold_ms']:.1f} ms | {m['p50_ms']:.1f} ms | "
+            f"{m['p95_ms']:.1f} ms | {m['throughput_qps']:.1f} | "
+            f"{m['files_read']} | {m['peak_rss_mb']:.0f} MB |"
+        )
+
+    if args.profile:
+        for name, m in results.items():
+            counters = ", ".join(f"{k}={v}" for k, v in m["profile"]["counters"].items())
+            print(f"\n{name}: {counters}")
+            spans = sorted(
+                m["profile"]["spans"].items(), key=lambda s: -s[1]["seconds"]
+            )
+            for span, stats in spans[:5]:
+                print(
+                    f"  {span}: {stats['calls']} calls, {stats['seconds'] * 1000:.1f} ms"
+                )
+
+    report = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "scale": args.scale,
+        "week_files": n_files,
+        "iterations": args.iterations,
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=4)
+        print(f"\nResults written to {args.output}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            previous = json.load(f).get("results", {})
+        regressions = find_regressions(results, previous)
+        if regressions:
+            print("\nRegressions:")
+            for message in regressions:
+                print(f"  {message}")
+            sys.exit(1)
+        print("\nNo regressions against previous results.")
@@ -0,0 +1,194 @@
+import json
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import chart_paths
+import chart_store
+import query_executor
+import store_format
+
+# "pretty" writes indented JSON, "minified" compact JSON, and "chartstore"
+# compact JSON plus the chart's compiled store, built from the converted weeks.
+OUTPUT_FORMATS = ("pretty", "minified", "chartstore")
+
+# A file result is (name, error or None, bytes written, entries or None)
+FileResult = Tuple[str, Optional[str], int, Optional[List[Dict[str, Any]]]]
+
+
+def is_up_to_date(input_file: Path, output_file: Path) -> bool:
+    """True when output_file exists and is not older than input_file."""
+    try:
+        return output_file.stat().st_mtime_ns >= input_file.stat().st_mtime_ns
+    except OSError:
+        return False
+
+
+def _dump(data: Any, output_format: str, indent_size: int) -> bytes:
+    if output_format == "pretty":
+        text = json.dumps(data, indent=indent_size, ensure_ascii=False)
+    else:
+        text = json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+    return text.encode("utf-8")
+
+
+def _convert_batch(
+    files: List[Path],
+    output_folder: str,
+    transform: Optional[Callable[[Any], Any]],
+    output_format: str,
+    indent_size: int,
+) -> List[FileResult]:
+    """Converts a batch of files; runs in the worker processes."""
+    output_p = Path(output_folder)
+    results = []
+    for json_file in files:
+        try:
+            with json_file.open("r", encoding="utf-8") as f:
+                data = json.load(f)
+            if transform is not None:
+                data = transform(data)
+            payload = _dump(data, output_format, indent_size)
+            chart_paths.write_atomic(output_p / json_file.name, payload)
+        except json.JSONDecodeError:
+            results.append((json_file.name, "not a valid JSON file", 0, None))
+            continue
+        except Exception as e:
+            results.append((json_file.name, str(e), 0, None))
+            continue
+        entries = None
+        if output_format == "chartstore" and isinstance(data, dict):
+            entries = data.get("data", [])
+        results.append((json_file.name, None, len(payload), entries))
+    return results
+
+
+def _update_store(
+    output_p: Path, converted: List[Tuple[str, List[Dict[str, Any]]]], patch: bool
+) -> Path:
+    """
+    Brings the output folder's store up to date: patched with the converted
+    weeks when patch is set (the store matched the folder before this run),
+    otherwise compiled from them and the skipped files.
+    """
+    if patch:
+        return chart_store.patch_chart(output_p, converted)
+    weeks = dict(converted)
+    for stem, entries in chart_store.read_chart_folder(output_p):
+        weeks.setdefault(stem, entries)
+    path = chart_store.store_path(output_p)
+    payload = store_format.encode_weeks(
+        list(weeks.items()), chart_paths.chart_fingerprint(output_p)
+    )
+    chart_paths.write_atomic(path, payload)
+    return path
+
+
+def convert_folder(
+    input_folder: str,
+    output_folder: str,
+    transform: Optional[Callable[[Any], Any]] = None,
+    output_format: str = "pretty",
+    indent_size: int = 4,
+    executor: str = "processes",
+    workers: Optional[int] = None,
+    force: bool = False,
+    verbose: bool = True,
+) -> Dict[str, Any]:
+    """
+    Converts every *.json file of input_folder into output_folder, applying
+    transform (a module-level function, so it can run in worker processes)
+    to each parsed file. Files whose output is newer than their input are
+    skipped unless force is set. Outputs are written atomically, so an
+    interrupted run never leaves a truncated file behind.
+
+    Returns a summary: converted, skipped and failed counts, the failures as
+    (file name, error) pairs, bytes written and elapsed seconds.
+    """
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(
+            f"Invalid output format '{output_format}'. Choose one of: {', '.join(OUTPUT_FORMATS)}"
+        )
+    started = time.perf_counter()
+    input_p = Path(input_folder)
+    output_p = Path(output_folder)
+
+    if not output_p.exists():
+        output_p.mkdir(parents=True, exist_ok=True)
+        if verbose:
+            print(f"Created destination directory: {output_p}")
+
+    all_files = sorted(input_p.glob("*.json"))
+    pending = [
+        f for f in all_files if force or not is_up_to_date(f, output_p / f.name)
+    ]
+    skipped = len(all_files) - len(pending)
+    # Checked before writing, since every output rename changes the folder
+    store_current = output_format == "chartstore" and chart_store.has_store(output_p)
+
+    tasks = [
+        (batch, str(output_p), transform, output_format, indent_size)
+        for batch in query_executor.split_batches(pending, executor, workers)
+    ]
+    failures: List[Tuple[str, str]] = []
+    converted: List[Tuple[str, List[Dict[str, Any]]]] = []
+    done = bytes_written = 0
+    for results in query_executor.iter_tasks(_convert_batch, tasks, executor, workers):
+        for name, error, size, entries in results:
+            done += 1
+            if error is not None:
+                failures.append((name, error))
+                if verbose:
+                    print(f"Error: {name}: {error}. Skipping.")
+                continue
+            bytes_written += size
+            if entries is not None:
+                converted.append((Path(name).stem, entries))
+        if verbose:
+            elapsed = time.perf_counter() - started
+            print(
+                f"[{done}/{len(pending)}] {done / elapsed if elapsed else 0:.0f} files/s"
+            )
+
+    if output_format == "chartstore" and (converted or not store_current):
+        _update_store(output_p, converted, store_current)
+
+    elapsed = time.perf_counter() - started
+    summary = {
+        "converted": done - len(failures),
+        "skipped": skipped,
+        "failed": len(failures),
+        "failures": failures,
+        "bytes_written": bytes_written,
+        "elapsed": elapsed,
+    }
+    if verbose:
+        print(format_summary(summary))
+    return summary
+
+
+def format_summary(summary: Dict[str, Any]) -> str:
+    elapsed = summary["elapsed"]
+    rate = summary["converted"] / elapsed if elapsed else 0.0
+    return (
+        f"Converted {summary['converted']} file(s), skipped {summary['skipped']} "
+        f"up-to-date, {summary['failed']} failed; "
+        f"{summary['bytes_written'] / 1e6:.1f} MB written in {elapsed:.2f}s "
+        f"({rate:.0f} files/s)"
+    )
+
+
+def add_bulk_arguments(parser: Any) -> None:
+    """Adds the shared bulk conversion options to a CLI parser."""
+    parser.add_argument(
+        "--format", choices=OUTPUT_FORMATS, default="pretty", dest="output_format"
+    )
+    parser.add_argument(
+        "--force", action="store_true", help="Convert files even if up to date"
+    )
+    parser.add_argument(
+        "--executor", choices=query_executor.EXECUTOR_MODES, default="processes"
+    )
+    parser.add_argument(
+        "--workers", type=int, default=None, help="Worker count (default: CPU count)"
+    )
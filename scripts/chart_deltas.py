@@ -0,0 +1,194 @@
+import logging
+from pathlib import Path
+from typing import Dict, List, Optional, Any, Iterable, Tuple
+
+import chart_discovery
+import chart_paths
+import chart_store
+import chart_streaks
+import derived_tables
+import song_credits
+import instrumentation
+
+logger = logging.getLogger(__name__)
+
+DELTAS_SUFFIX = ".deltas.json"
+DELTAS_VERSION = 2
+
+# A week delta is [stem, moves, debuts, reentries, exits] with songs as ids
+# into the table's song list: moves are [song, this_week, last_week] for
+# every rank change, debuts and re-entries are [song, position], exits are
+# [song, position in the previous archive week].
+WeekDelta = List[Any]
+
+def deltas_path(chart_dir: Path) -> Path:
+    """Returns the delta table location for a chart folder (a sibling file)."""
+    chart_dir = chart_paths.chart_base(chart_dir)
+    return chart_dir.with_name(chart_dir.name + DELTAS_SUFFIX)
+
+
+class ChartDeltas:
+    """
+    Week-over-week changes of one chart, one delta per archive week in date
+    order, over a table of the distinct [artist, song] it mentions.
+    """
+
+    def __init__(
+        self,
+        fingerprint: List[int],
+        songs: List[List[str]],
+        weeks: List[WeekDelta],
+        aliases: str = "",
+    ):
+        # chart_paths.chart_fingerprint of the chart the table was built from
+        self.fingerprint = fingerprint
+        self.songs = songs
+        self.weeks = weeks
+        self.stems = [week[0] for week in weeks]
+        # Digest of the alias file songs were identified with
+        self.aliases = aliases
+
+    def to_json(self) -> Dict[str, Any]:
+        return {
+            "version": DELTAS_VERSION,
+            "aliases": self.aliases,
+            "fingerprint": self.fingerprint,
+            "songs": self.songs,
+            "weeks": self.weeks,
+        }
+
+    @classmethod
+    def from_json(cls, content: Dict[str, Any]) -> "ChartDeltas":
+        return cls(
+            content.get("fingerprint", []),
+            content.get("songs", []),
+            content.get("weeks", []),
+            content.get("aliases", ""),
+        )
+
+
+def compute_deltas(
+    weeks: Iterable[Tuple[str, List[Dict[str, Any]]]],
+    credits: song_credits.CreditTable,
+) -> Tuple[List[List[str]], List[WeekDelta]]:
+    """
+    One pass over a chart's (stem, entries) weeks in date order. Moves come
+    from each row's published last_week. Debuts and re-entries follow
+    archive presence, classified by chart_streaks.arrival_kind as in the
+    streak table. Exits are the previous archive week's songs missing from
+    this week (none for the archive's first week). Songs are identified by
+    the given credit table.
+    """
+    song_ids: Dict[int, int] = {}
+    songs: List[List[str]] = []
+    deltas: List[WeekDelta] = []
+    previous: Optional[Dict[int, Any]] = None
+    last_seen: Dict[int, int] = {}
+
+    for i, (stem, entries) in enumerate(weeks):
+        current: Dict[int, Any] = {}
+        moves: List[List[Any]] = []
+        debuts: List[List[Any]] = []
+        reentries: List[List[Any]] = []
+        for entry in entries:
+            # Table ids are dense per chart, unlike the process-wide credit ids
+            credit_id = credits.song_id(entry.get("artist"), entry.get("song"))
+            sid = song_ids.get(credit_id)
+            if sid is None:
+                sid = song_ids[credit_id] = len(songs)
+                songs.append(
+                    [
+                        str(entry.get("artist") or "").strip(),
+                        str(entry.get("song") or "").strip(),
+                    ]
+                )
+            # Only the first match of a week counts, as in the song index
+            if sid in current:
+                continue
+            position = entry.get("this_week")
+            current[sid] = position
+            last_week = entry.get("last_week")
+            if last_week and position and position != last_week:
+                moves.append([sid, position, last_week])
+            kind = chart_streaks.arrival_kind(
+                last_seen.get(sid), i, entry.get("weeks_on_chart")
+            )
+            if kind == "debut":
+                debuts.append([sid, position])
+            elif kind == "reentry":
+                reentries.append([sid, position])
+            last_seen[sid] = i
+
+        exits = (
+            [[sid, position] for sid, position in previous.items() if sid not in current]
+            if previous is not None
+            else []
+        )
+        deltas.append([stem, moves, debuts, reentries, exits])
+        previous = current
+
+    return songs, deltas
+
+
+def build_deltas(chart_dir: Path, credits: song_credits.CreditTable) -> ChartDeltas:
+    """Computes the delta table of a chart from its store or JSON files."""
+    chart_dir = Path(chart_dir)
+    fingerprint = chart_paths.chart_fingerprint(chart_dir)
+    songs, weeks = compute_deltas(chart_store.iter_chart_weeks(chart_dir), credits)
+    return ChartDeltas(fingerprint, songs, weeks, credits.digest)
+
+
+def save_deltas(chart_dir: Path, deltas: ChartDeltas) -> Path:
+    return derived_tables.save_table(deltas_path(chart_dir), deltas.to_json())
+
+
+def build_all(data_dir: str) -> List[Path]:
+    """Builds and saves the delta table of every discovered chart."""
+    credits = song_credits.load_table(data_dir)
+    written = []
+    for chart_info in chart_discovery.discover_chart_folders(data_dir):
+        chart_p = Path(chart_info["data_dir"])
+        if not chart_p.exists():
+            logger.warning(
+                f"Chart folder not found: {chart_info['source']} / {chart_info['chart_name']}"
+            )
+            continue
+        written.append(save_deltas(chart_p, build_deltas(chart_p, credits)))
+    return written
+
+
+def load_deltas(
+    chart_dir: Path, credits: song_credits.CreditTable
+) -> Optional[ChartDeltas]:
+    """
+    Loads the saved delta table of a chart, or None if it has not been built
+    or is out of date for the chart or the credit table's aliases (see
+    derived_tables.load_table).
+    """
+    return derived_tables.load_table(
+        deltas_path(chart_dir),
+        chart_dir,
+        credits.digest,
+        DELTAS_VERSION,
+        "delta table",
+        ChartDeltas.from_json,
+    )
+
+
+if __name__ == "__main__":
+    import argparse
+
+    logging.basicConfig(level=logging.INFO)
+
+    parser = argparse.ArgumentParser(
+        description="Build week-over-week delta tables for every chart"
+    )
+    parser.add_argument(
+        "--data_dir", default=str(Path(__file__).parent.parent / "data")
+    )
+    instrumentation.add_profile_argument(parser)
+    args = parser.parse_args()
+    instrumentation.profile_from_args(args)
+
+    for out in build_all(args.data_dir):
+        print(f"Wrote {out}")
@@ -1,57 +1,206 @@
 import json
+import os
 from pathlib import Path
-from typing import List, Dict
+from typing import List, Dict, Optional, Tuple, TypedDict
 
+import chart_paths
+import time_engine
 
-def discover_chart_folders(data_dir: str) -> List[Dict[str, str]]:
+METADATA_SUFFIXES = ("-metadata.json", "-manifest.json")
+# Optional per-chart metadata fields copied into descriptors, with their types
+DESCRIPTOR_FIELDS = (("size", int), ("start_date", str), ("end_date", str), ("prefix", str))
+
+
+class _ChartInfoBase(TypedDict):
+    source: str
+    chart_name: str
+    data_dir: str
+
+
+class ChartInfo(_ChartInfoBase, total=False):
     """
-    Scans the data directory for all *-metadata.json and *-manifest.json files
-    and returns information about every chart defined inside them.
+    Descriptor of one chart. The optional fields come from the metadata file:
+    size (declared number of positions), start_date / end_date (YYYY-MM-DD,
+    end_date only for discontinued charts) and prefix.
     """
-    chart_infos: List[Dict[str, str]] = []
-    data_path = Path(data_dir)
 
-    if not data_path.exists():
-        print(f"Warning: Data directory '{data_dir}' does not exist.")
-        return chart_infos
+    size: int
+    start_date: str
+    end_date: str
+    prefix: str
 
-    for meta_file in data_path.iterdir():
-        if not meta_file.is_file():
-            continue
-        if not meta_file.name.endswith(("-metadata.json", "-manifest.json")):
+
+def _source_folder(meta_file: Path, metadata: Dict) -> str:
+    source_folder = metadata.get("folder", "")
+    if source_folder:
+        return source_folder
+    for suffix in METADATA_SUFFIXES:
+        if meta_file.name.endswith(suffix):
+            return meta_file.name[: -len(suffix)]
+    return meta_file.stem
+
+
+def _read_metadata(meta_file: Path, data_path: Path) -> List[ChartInfo]:
+    with meta_file.open("r", encoding="utf-8") as f:
+        metadata = json.load(f)
+
+    source_name = metadata.get("name", "Unknown Source")
+    source_folder = _source_folder(meta_file, metadata)
+
+    chart_infos: List[ChartInfo] = []
+    for chart in metadata.get("charts", []):
+        if not (isinstance(chart, dict) and "folder" in chart):
             continue
+        chart_folder = chart["folder"]
+        chart_info: ChartInfo = {
+            "source": source_name,
+            "chart_name": chart.get("name", chart_folder),
+            "data_dir": str(data_path / source_folder / chart_folder),
+        }
+        for field, kind in DESCRIPTOR_FIELDS:
+            if isinstance(chart.get(field), kind):
+                chart_info[field] = chart[field]
+        chart_infos.append(chart_info)
+    return chart_infos
 
+
+def span_ordinals(chart_info: ChartInfo) -> Tuple[Optional[int], Optional[int]]:
+    """
+    The chart's declared (start, end) as day ordinals; None for a bound that
+    is missing or unparseable, i.e. open-ended.
+    """
+    bounds = []
+    for field in ("start_date", "end_date"):
         try:
-            with meta_file.open("r", encoding="utf-8") as f:
-                metadata = json.load(f)
-
-            source_name = metadata.get("name", "Unknown Source")
-            source_folder = metadata.get("folder", "")
-
-            if not source_folder:
-                name = meta_file.name
-                for suffix in ["-metadata.json", "-manifest.json"]:
-                    if name.endswith(suffix):
-                        source_folder = name[: -len(suffix)]
-                        break
-                else:
-                    source_folder = meta_file.stem
-
-            for chart in metadata.get("charts", []):
-                if isinstance(chart, dict) and "folder" in chart:
-                    chart_folder = chart["folder"]
-                    chart_data_path = str(data_path / source_folder / chart_folder)
-
-                    chart_infos.append(
-                        {
-                            "source": source_name,
-                            "chart_name": chart.get("name", chart_folder),
-                            "data_dir": chart_data_path,
-                        }
-                    )
-
-        except (json.JSONDecodeError, IOError, KeyError, OSError) as e:
-            print(f"Warning: Could not parse metadata file '{meta_file.name}': {e}")
-            continue
+            bounds.append(time_engine.parse_date_ordinal(chart_info[field]))
+        except (KeyError, ValueError):
+            bounds.append(None)
+    return bounds[0], bounds[1]
+
+
+def overlaps(
+    chart_info: ChartInfo, start_ordinal: Optional[int], end_ordinal: Optional[int]
+) -> bool:
+    """
+    Whether the chart's declared date span can overlap [start, end] (day
+    ordinals, None = unbounded). Queries use it to skip a chart without
+    touching its folder.
+    """
+    chart_start, chart_end = span_ordinals(chart_info)
+    if end_ordinal is not None and chart_start is not None and end_ordinal < chart_start:
+        return False
+    if start_ordinal is not None and chart_end is not None and start_ordinal > chart_end:
+        return False
+    return True
+
+
+def overlaps_dates(
+    chart_info: ChartInfo, start_date: Optional[str], end_date: Optional[str]
+) -> bool:
+    """
+    overlaps() for YYYY-MM-DD bounds. Unparseable bounds count as overlapping,
+    so the query itself reports them.
+    """
+    try:
+        start = time_engine.parse_date_ordinal(start_date) if start_date else None
+        end = time_engine.parse_date_ordinal(end_date) if end_date else None
+    except ValueError:
+        return True
+    return overlaps(chart_info, start, end)
+
+
+class ChartRegistry:
+    """
+    The charts of a data directory, parsed once from its metadata files.
+    refresh() re-reads only metadata files whose mtime changed, and rescans
+    the directory only when its own mtime changes (files added or removed).
+    """
+
+    def __init__(self, data_dir: str):
+        self.data_dir = data_dir
+        self._dir_mtime: Optional[int] = None
+        # metadata file name -> (mtime_ns, charts)
+        self._files: Dict[str, Tuple[int, List[ChartInfo]]] = {}
+        self.charts: List[ChartInfo] = []
+
+    def refresh(self) -> List[ChartInfo]:
+        data_path = Path(self.data_dir)
+        try:
+            dir_mtime = os.stat(data_path).st_mtime_ns
+        except OSError:
+            print(f"Warning: Data directory '{self.data_dir}' does not exist.")
+            self._dir_mtime = None
+            self._files = {}
+            self.charts = []
+            return self.charts
+
+        if dir_mtime != self._dir_mtime:
+            names = sorted(
+                entry.name
+                for entry in os.scandir(data_path)
+                if entry.name.endswith(METADATA_SUFFIXES) and entry.is_file()
+            )
+        else:
+            names = list(self._files)
+
+        changed = dir_mtime != self._dir_mtime
+        files: Dict[str, Tuple[int, List[ChartInfo]]] = {}
+        for name in names:
+            meta_file = data_path / name
+            try:
+                mtime = os.stat(meta_file).st_mtime_ns
+            except OSError:
+                changed = True
+                continue
+            cached = self._files.get(name)
+            if cached and cached[0] == mtime:
+                files[name] = cached
+                continue
+            changed = True
+            try:
+                files[name] = (mtime, _read_metadata(meta_file, data_path))
+            except (json.JSONDecodeError, IOError, KeyError, OSError) as e:
+                print(f"Warning: Could not parse metadata file '{name}': {e}")
+                files[name] = (mtime, [])
 
+        if changed:
+            self._files = files
+            self.charts = [c for _, charts in files.values() for c in charts]
+        self._dir_mtime = dir_mtime
+        return self.charts
+
+
+def resolve_chart_dir(chart_dir: str) -> str:
+    """The chart's folder, or its pack when only the pack exists."""
+    if not os.path.isdir(chart_dir):
+        packed = str(chart_paths.pack_path(Path(chart_dir)))
+        if os.path.isfile(packed):
+            return packed
+    return chart_dir
+
+
+_registries: Dict[str, ChartRegistry] = {}
+
+
+def get_registry(data_dir: str) -> ChartRegistry:
+    """The process-wide registry of a data directory, refreshed on access."""
+    registry = _registries.get(data_dir)
+    if registry is None:
+        registry = _registries[data_dir] = ChartRegistry(data_dir)
+    registry.refresh()
+    return registry
+
+
+def discover_chart_folders(data_dir: str) -> List[ChartInfo]:
+    """
+    Returns information about every chart defined in the *-metadata.json and
+    *-manifest.json files of the data directory. Metadata is parsed once and
+    cached per file mtime; callers get their own copies of the descriptors.
+    A chart stored as a pack instead of a folder has the pack as data_dir.
+    """
+    chart_infos = []
+    for chart_info in get_registry(data_dir).charts:
+        chart_info = dict(chart_info)
+        chart_info["data_dir"] = resolve_chart_dir(chart_info["data_dir"])
+        chart_infos.append(chart_info)
     return chart_infos
@@ -1,66 +1,88 @@
-import json
-from pathlib import Path
+from typing import Any, Dict, Optional
 
+import bulk_convert
+import instrumentation
 
-def adjorno_to_mhollingshead_chart_format(
-    input_folder: str, output_folder: str
-) -> None:
+
+def adjorno_to_mhollingshead_week(source_data: Dict[str, Any]) -> Dict[str, Any]:
     """
-    Converts chart JSON files from the adjorno structure to the mhollingshead
+    Converts one chart week from the adjorno structure to the mhollingshead
     structure (date + data list with this_week, last_week, peak_position, weeks_on_chart).
     """
-    input_p = Path(input_folder)
-    output_p = Path(output_folder)
-
-    if not output_p.exists():
-        output_p.mkdir(parents=True, exist_ok=True)
-        print(f"Created destination directory: {output_p}")
+    standardized = {"date": source_data.get("chart_date", ""), "data": []}
 
-    for json_file in input_p.glob("*.json"):
-        try:
-            with json_file.open("r", encoding="utf-8") as f:
-                source_data = json.load(f)
-        except json.JSONDecodeError:
-            print(f"Error: Failed to decode JSON from {json_file.name}. Skipping.")
-            continue
+    for track in source_data.get("tracks", []):
+        pos = track.get("position", {})
 
-        standardized = {"date": source_data.get("chart_date", ""), "data": []}
-
-        for track in source_data.get("tracks", []):
-            pos = track.get("position", {})
-
-            last_week_val = pos.get("Last Week")
-            if isinstance(last_week_val, str) and last_week_val.strip() in {"-", ""}:
+        last_week_val = pos.get("Last Week")
+        if isinstance(last_week_val, str) and last_week_val.strip() in {"-", ""}:
+            last_week_val = None
+        else:
+            try:
+                last_week_val = int(last_week_val)
+            except (TypeError, ValueError):
                 last_week_val = None
-            else:
-                try:
-                    last_week_val = int(last_week_val)
-                except (TypeError, ValueError):
-                    last_week_val = None
 
-            new_entry = {
-                "song": track.get("title"),
-                "artist": track.get("artist"),
-                "this_week": track.get("rank"),
-                "last_week": last_week_val,
-            }
+        new_entry = {
+            "song": track.get("title"),
+            "artist": track.get("artist"),
+            "this_week": track.get("rank"),
+            "last_week": last_week_val,
+        }
 
-            if "Peak Position" in pos:
-                new_entry["peak_position"] = pos["Peak Position"]
-            if "Wks on Chart" in pos:
-                new_entry["weeks_on_chart"] = pos["Wks on Chart"]
+        if "Peak Position" in pos:
+            new_entry["peak_position"] = pos["Peak Position"]
+        if "Wks on Chart" in pos:
+            new_entry["weeks_on_chart"] = pos["Wks on Chart"]
 
-            standardized["data"].append(new_entry)
+        standardized["data"].append(new_entry)
 
-        output_path = output_p / json_file.name
-        with output_path.open("w", encoding="utf-8") as f:
-            json.dump(standardized, f, indent=4, ensure_ascii=False)
+    return standardized
 
-        print(f"Successfully standardized: {json_file.name}")
+
+def adjorno_to_mhollingshead_chart_format(
+    input_folder: str,
+    output_folder: str,
+    output_format: str = "pretty",
+    executor: str = "processes",
+    workers: Optional[int] = None,
+    force: bool = False,
+) -> Dict[str, Any]:
+    """
+    Converts chart JSON files from the adjorno structure to the mhollingshead
+    structure in parallel, skipping files whose output is already up to date.
+    See bulk_convert.convert_folder for the output formats and the summary.
+    """
+    return bulk_convert.convert_folder(
+        input_folder,
+        output_folder,
+        adjorno_to_mhollingshead_week,
+        output_format,
+        executor=executor,
+        workers=workers,
+        force=force,
+    )
 
 
 if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Convert adjorno chart files to the mhollingshead format"
+    )
     # Configure your paths here
-    INPUT_DIR = "../data/billboard/hot-100"
-    OUTPUT_DIR = "../data/billboard/hot"
-    adjorno_to_mhollingshead_chart_format(INPUT_DIR, OUTPUT_DIR)
+    parser.add_argument("--input_dir", default="../data/billboard/hot-100")
+    parser.add_argument("--output_dir", default="../data/billboard/hot")
+    bulk_convert.add_bulk_arguments(parser)
+    instrumentation.add_profile_argument(parser)
+    args = parser.parse_args()
+    instrumentation.profile_from_args(args)
+
+    adjorno_to_mhollingshead_chart_format(
+        args.input_dir,
+        args.output_dir,
+        args.output_format,
+        args.executor,
+        args.workers,
+        args.force,
+    )
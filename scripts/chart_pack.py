@@ -0,0 +1,312 @@
+import gzip
+import io
+import json
+import logging
+import mmap
+import os
+import shutil
+import struct
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+try:
+    import zstandard
+except ImportError:  # zstandard is optional; only zstd-compressed packs need it
+    zstandard = None
+
+import chart_discovery
+import chart_paths
+import instrumentation
+import store_format
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"MCPACK01"
+# magic, payload kind, week count
+HEADER = struct.Struct("<8sB3xI")
+# stem (UTF-8, NUL padded), codec, payload offset, stored length, raw length
+ENTRY = struct.Struct("<32sB3xQII")
+
+# Week payloads: minified week JSON, or a one-week compiled chart store
+PAYLOADS = ("json", "binary")
+# Per-week compression; a week is stored raw when compression does not help
+CODECS = ("none", "gzip", "zstd")
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 10
+
+_pack_cache: Dict[str, Tuple[Tuple[int, int], "ChartPack"]] = {}
+
+
+def _compress(codec: str, raw: bytes) -> bytes:
+    if codec == "gzip":
+        return gzip.compress(raw, GZIP_LEVEL, mtime=0)
+    if codec == "zstd":
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(raw)
+    return raw
+
+
+def _decompress(codec: int, data: bytes) -> bytes:
+    if codec == 1:
+        return gzip.decompress(data)
+    if codec == 2:
+        if zstandard is None:
+            raise OSError("Reading zstd-compressed weeks requires zstandard to be installed.")
+        return zstandard.ZstdDecompressor().decompress(data)
+    return data
+
+
+class ChartPack:
+    """
+    Read-only view over a chart pack: a header, an offset table of the
+    weeks in stem (date) order, then the week payloads. A week is read by
+    slicing the (usually memory-mapped) buffer at its offset, so opening a
+    pack only parses the table.
+    """
+
+    def __init__(self, buffer: Any):
+        self._buffer = buffer
+        magic, payload, n_weeks = HEADER.unpack_from(buffer, 0)
+        if magic != MAGIC:
+            raise ValueError("Not a chart pack")
+        self.payload = PAYLOADS[payload]
+        table = buffer[HEADER.size : HEADER.size + n_weeks * ENTRY.size]
+        self.stems: List[str] = []
+        self._weeks: Dict[str, Tuple[int, int, int]] = {}
+        for name, codec, offset, length, _ in ENTRY.iter_unpack(table):
+            stem = name.rstrip(b"\0").decode("utf-8")
+            self.stems.append(stem)
+            self._weeks[stem] = (codec, offset, length)
+
+    def __contains__(self, stem: str) -> bool:
+        return stem in self._weeks
+
+    def stored_size(self, stem: str) -> int:
+        """Bytes a week takes in the pack (after compression)."""
+        return self._weeks[stem][2]
+
+    def read_payload(self, stem: str) -> bytes:
+        """The decompressed payload of a week; FileNotFoundError if absent."""
+        try:
+            codec, offset, length = self._weeks[stem]
+        except KeyError:
+            raise FileNotFoundError(f"No week '{stem}' in chart pack")
+        instrumentation.metrics.incr("bytes_read", length)
+        return _decompress(codec, self._buffer[offset : offset + length])
+
+    def week_entries(self, stem: str) -> Sequence[Any]:
+        """A week's entries: dicts for JSON payloads, a ChartWeek for binary ones."""
+        raw = self.read_payload(stem)
+        if self.payload == "binary":
+            return store_format.ChartStore(raw).week_entries(0)
+        return json.loads(raw).get("data", [])
+
+    def week_json(self, stem: str) -> bytes:
+        """A week as UTF-8 JSON text, whatever its payload kind."""
+        raw = self.read_payload(stem)
+        if self.payload == "binary":
+            data = store_format.ChartStore(raw).week_entries(0).to_dicts()
+            raw = json.dumps({"date": stem, "data": data}, ensure_ascii=False).encode("utf-8")
+        return raw
+
+
+def encode_pack(
+    weeks: Iterable[Tuple[str, Dict[str, Any]]],
+    payload: str = "json",
+    codec: str = "none",
+) -> bytes:
+    """
+    Encodes (stem, week document) pairs into the pack format. JSON payloads
+    keep the whole document, minified; binary payloads keep its "data".
+    """
+    if payload not in PAYLOADS:
+        raise ValueError(f"Invalid payload '{payload}'. Choose one of: {', '.join(PAYLOADS)}")
+    if codec not in CODECS:
+        raise ValueError(f"Invalid codec '{codec}'. Choose one of: {', '.join(CODECS)}")
+    if codec == "zstd" and zstandard is None:
+        raise ValueError("zstd compression requires zstandard to be installed.")
+
+    weeks = sorted(weeks, key=lambda w: w[0])
+    table = bytearray()
+    blobs = []
+    offset = HEADER.size + len(weeks) * ENTRY.size
+    for stem, document in weeks:
+        name = stem.encode("utf-8")
+        if len(name) > 32:
+            raise ValueError(f"Week name too long for a chart pack: {stem}")
+        if payload == "binary":
+            raw = store_format.encode_weeks([(stem, document.get("data", []))])
+        else:
+            raw = json.dumps(document, ensure_ascii=False, separators=(",", ":")).encode(
+                "utf-8"
+            )
+        stored, codec_id = _compress(codec, raw), CODECS.index(codec)
+        if len(stored) >= len(raw):
+            stored, codec_id = raw, 0
+        table += ENTRY.pack(name, codec_id, offset, len(stored), len(raw))
+        blobs.append(stored)
+        offset += len(stored)
+
+    header = HEADER.pack(MAGIC, PAYLOADS.index(payload), len(weeks))
+    return b"".join([header, bytes(table), *blobs])
+
+
+def read_week_documents(
+    chart_dir: Path, strict: bool = False
+) -> List[Tuple[str, Dict[str, Any]]]:
+    """
+    Reads every week JSON file of a chart folder as (stem, document) pairs.
+    Unreadable weeks are logged and skipped, or raise ValueError when strict
+    is set.
+    """
+    chart_dir = Path(chart_dir)
+    weeks = []
+    for name in sorted(chart_paths.week_file_names(chart_dir)):
+        json_file = chart_dir / name
+        try:
+            with json_file.open("r", encoding="utf-8") as f:
+                weeks.append((json_file.stem, json.load(f)))
+        except (json.JSONDecodeError, IOError, OSError) as e:
+            if strict:
+                raise ValueError(f"Error loading {json_file}: {e}")
+            logger.error(f"Error loading {json_file}: {e}")
+    return weeks
+
+
+def pack_chart(
+    chart_dir: Path, payload: str = "json", codec: str = "none", strict: bool = False
+) -> Path:
+    """
+    Packs the week files of a chart folder into its sibling pack file. With
+    strict set, an unreadable week fails the pack (see read_week_documents).
+    """
+    chart_dir = Path(chart_dir)
+    out_path = chart_paths.pack_path(chart_dir)
+    payload_bytes = encode_pack(read_week_documents(chart_dir, strict), payload, codec)
+    chart_paths.write_atomic(out_path, payload_bytes)
+    return out_path
+
+
+def open_pack(path: Any) -> Optional[ChartPack]:
+    """
+    Returns the memory-mapped pack at path, or None if it is missing or
+    invalid. Opened packs are cached until the file changes.
+    """
+    key = str(path)
+    try:
+        st = os.stat(key)
+    except OSError:
+        return None
+
+    stamp = (st.st_mtime_ns, st.st_size)
+    cached = _pack_cache.get(key)
+    if cached and cached[0] == stamp:
+        return cached[1]
+
+    try:
+        with open(key, "rb") as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        pack = ChartPack(buffer)
+    except (OSError, ValueError, IndexError, struct.error) as e:
+        logger.error(f"Error opening chart pack {key}: {e}")
+        return None
+
+    _pack_cache[key] = (stamp, pack)
+    return pack
+
+
+def _open_week(week_path: Any) -> Tuple[ChartPack, str]:
+    path = str(week_path)
+    pack = open_pack(chart_paths.pack_of(path))
+    if pack is None:
+        raise FileNotFoundError(f"Chart pack not found for {path}")
+    return pack, os.path.basename(path)[: -len(".json")]
+
+
+def has_week(week_path: Any) -> bool:
+    pack = open_pack(chart_paths.pack_of(week_path))
+    return pack is not None and os.path.basename(str(week_path))[: -len(".json")] in pack
+
+
+def read_week_entries(week_path: Any) -> Sequence[Any]:
+    """The entries of a packed week (see ChartPack.week_entries)."""
+    pack, stem = _open_week(week_path)
+    return pack.week_entries(stem)
+
+
+def read_week_dicts(week_path: Any) -> List[Dict[str, Any]]:
+    """The entries of a packed week as plain dicts."""
+    entries = read_week_entries(week_path)
+    return entries if isinstance(entries, list) else entries.to_dicts()
+
+
+def read_week_json(week_path: Any) -> bytes:
+    """A packed week as UTF-8 JSON bytes, like the contents of a week file."""
+    pack, stem = _open_week(week_path)
+    return pack.week_json(stem)
+
+
+def open_week_text(week_path: Any) -> io.TextIOWrapper:
+    """A packed week as a text stream, like an open week file."""
+    return io.TextIOWrapper(io.BytesIO(read_week_json(week_path)), encoding="utf-8")
+
+
+def pack_all(
+    data_dir: str,
+    payload: str = "json",
+    codec: str = "none",
+    remove_folders: bool = False,
+) -> List[Path]:
+    """
+    Packs every discovered chart folder. With remove_folders set, each folder
+    is deleted once its pack is written and holds exactly the folder's weeks,
+    leaving the pack in its place; a folder with an unreadable week is left
+    alone and not packed.
+    """
+    written = []
+    for chart_info in chart_discovery.discover_chart_folders(data_dir):
+        chart_p = Path(chart_info["data_dir"])
+        if chart_paths.is_pack(chart_p) or not chart_p.is_dir():
+            continue
+        label = f"{chart_info['source']} / {chart_info['chart_name']}"
+        try:
+            path = pack_chart(chart_p, payload, codec, strict=remove_folders)
+        except ValueError as e:
+            logger.error(f"Not packing {label}, its folder is kept: {e}")
+            continue
+        written.append(path)
+        logger.info(f"Packed {label}")
+        if remove_folders:
+            pack = open_pack(path)
+            names = chart_paths.week_file_names(chart_p)
+            stems = sorted(name[: -len(".json")] for name in names)
+            if pack is None or sorted(pack.stems) != stems:
+                logger.error(f"Pack of {label} does not match its folder; folder kept.")
+                continue
+            shutil.rmtree(chart_p)
+    return written
+
+
+if __name__ == "__main__":
+    import argparse
+
+    logging.basicConfig(level=logging.INFO)
+
+    parser = argparse.ArgumentParser(
+        description="Pack chart folders into single-file archives"
+    )
+    parser.add_argument(
+        "--data_dir", default=str(Path(__file__).parent.parent / "data")
+    )
+    parser.add_argument("--payload", choices=PAYLOADS, default="json")
+    parser.add_argument("--codec", choices=CODECS, default="none")
+    parser.add_argument(
+        "--remove_folders",
+        action="store_true",
+        help="Delete each chart folder after packing it",
+    )
+    instrumentation.add_profile_argument(parser)
+    args = parser.parse_args()
+    instrumentation.profile_from_args(args)
+
+    for path in pack_all(args.data_dir, args.payload, args.codec, args.remove_folders):
+        print(f"Wrote {path} ({path.stat().st_size:,} bytes)")
@@ -0,0 +1,72 @@
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, List, Optional
+
+PACK_SUFFIX = ".chartpack"
+
+
+def pack_path(chart_dir: Path) -> Path:
+    """Returns the pack location for a chart folder (a sibling file)."""
+    chart_dir = Path(chart_dir)
+    return chart_dir.with_name(chart_dir.name + PACK_SUFFIX)
+
+
+def is_pack(path: Any) -> bool:
+    return str(path).endswith(PACK_SUFFIX)
+
+
+def chart_base(chart_dir: Path) -> Path:
+    """The folder path a chart is known by, for a folder or a pack."""
+    chart_dir = Path(chart_dir)
+    if chart_dir.name.endswith(PACK_SUFFIX):
+        return chart_dir.with_name(chart_dir.name[: -len(PACK_SUFFIX)])
+    return chart_dir
+
+
+def pack_of(week_path: Any) -> Optional[str]:
+    """
+    The pack holding a week path such as 'hot100.chartpack/1985-01-05.json',
+    or None for a plain week file. Packs list their weeks under such paths.
+    """
+    parent = os.path.dirname(str(week_path))
+    return parent if parent.endswith(PACK_SUFFIX) else None
+
+
+def week_file_names(chart_dir: Path) -> List[str]:
+    """Names of the week JSON files in a chart folder, unsorted."""
+    return [
+        name
+        for name in os.listdir(chart_dir)
+        if name.endswith(".json") and not name.startswith(".")
+    ]
+
+
+def chart_fingerprint(chart_dir: Path) -> List[int]:
+    """
+    Cheap fingerprint of a chart for checking derived files against it:
+    [mtime, size] of its pack, or [mtime, 0] of its folder, whose mtime
+    changes when week files are added, removed or replaced by rename. One
+    stat however many weeks the chart holds.
+
+    A week file edited in place leaves the folder's mtime unchanged, so
+    stores, the song index and streak and delta tables built before the
+    edit still count as current. Run refresh_data after such edits; it
+    compares content hashes and rebuilds what the edit affects.
+    """
+    st = os.stat(chart_dir)
+    return [st.st_mtime_ns, st.st_size if is_pack(chart_dir) else 0]
+
+
+def write_atomic(path: Path, payload: bytes) -> None:
+    """Writes payload to a temporary file next to path and renames it into place."""
+    fd, tmp_name = tempfile.mkstemp(dir=str(path.parent), prefix=f".{path.name}.")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(payload)
+        os.chmod(tmp_name, 0o644)
+        os.replace(tmp_name, path)
+    except BaseException:
+        if os.path.exists(tmp_name):
+            os.unlink(tmp_name)
+        raise
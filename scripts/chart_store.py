@@ -0,0 +1,236 @@
+import json
+import logging
+import mmap
+import struct
+from pathlib import Path
+from typing import Dict, List, Optional, Any, Iterable, Iterator, Sequence, Tuple
+
+import async_loader
+import chart_discovery
+import chart_pack
+import chart_paths
+import chart_utils
+import data_handler
+import instrumentation
+import store_format
+
+logger = logging.getLogger(__name__)
+
+STORE_SUFFIX = ".chartstore"
+
+_store_cache: Dict[str, Tuple[Tuple[int, int], "store_format.ChartStore"]] = {}
+# Resident stand-ins for archive files by file path (see pin_files)
+_pinned: Dict[str, Any] = {}
+# Store stamp each stale store was last reported for
+_stale_warnings: Dict[str, Tuple[int, int]] = {}
+
+
+def store_path(chart_dir: Path) -> Path:
+    """Returns the compiled store location for a chart folder (a sibling file)."""
+    chart_dir = chart_paths.chart_base(chart_dir)
+    return chart_dir.with_name(chart_dir.name + STORE_SUFFIX)
+
+
+def read_week_file(json_file: Path) -> Optional[List[Dict[str, Any]]]:
+    """Reads the entries of one week JSON file, or None if it cannot be parsed."""
+    try:
+        if chart_paths.pack_of(json_file):
+            data_handler.read_stats["files"] += 1
+            return chart_pack.read_week_dicts(json_file)
+        with data_handler.open_week_file(json_file) as f:
+            return json.load(f).get("data", [])
+    except (json.JSONDecodeError, IOError, OSError) as e:
+        logger.error(f"Error loading {json_file}: {e}")
+        return None
+
+
+def read_chart_folder(chart_dir: Path) -> List[Tuple[str, List[Dict[str, Any]]]]:
+    """Reads every week JSON file of a chart folder as (stem, entries) pairs."""
+    weeks = []
+    for json_file in chart_utils.get_all_files(Path(chart_dir)):
+        entries = read_week_file(json_file)
+        if entries is not None:
+            weeks.append((json_file.stem, entries))
+    return weeks
+
+
+def iter_chart_weeks(
+    chart_dir: Path, store: Optional[store_format.ChartStore] = None
+) -> Iterator[Tuple[str, Sequence[Any]]]:
+    """
+    Yields (stem, entries) for a chart in date order, from the given store,
+    else from the chart's own store when it has one, else from its files.
+    """
+    if store is None:
+        store = open_store(chart_dir)
+    if store is not None:
+        for week in range(store.num_weeks):
+            yield store.stems[week], store.week_entries(week)
+    else:
+        yield from read_chart_folder(chart_dir)
+
+
+def compile_chart(chart_dir: Path) -> Path:
+    """
+    Compiles all week files of a chart folder into a single columnar store.
+    Returns the path of the written store.
+    """
+    chart_dir = Path(chart_dir)
+    out_path = store_path(chart_dir)
+    # Taken before reading, so a change made meanwhile leaves the store stale
+    fingerprint = chart_paths.chart_fingerprint(chart_dir)
+    payload = store_format.encode_weeks(read_chart_folder(chart_dir), fingerprint)
+    chart_paths.write_atomic(out_path, payload)
+    return out_path
+
+
+def patch_chart(
+    chart_dir: Path,
+    weeks: List[Tuple[str, List[Dict[str, Any]]]],
+    removed: Iterable[str] = (),
+) -> Optional[Path]:
+    """
+    Rewrites an existing store with the given weeks added or replaced and the
+    removed week stems dropped. Unchanged weeks are copied from the old store
+    instead of being re-read from JSON, and the store is stamped with the
+    chart's current fingerprint. Returns None if there is no store.
+    """
+    store = open_store(chart_dir, check_fingerprint=False)
+    if store is None:
+        return None
+    skip = set(removed) | {stem for stem, _ in weeks}
+    kept = [
+        (stem, store.week_entries(week))
+        for week, stem in enumerate(store.stems)
+        if stem not in skip
+    ]
+    out_path = store_path(chart_dir)
+    payload = store_format.encode_weeks(
+        kept + list(weeks), chart_paths.chart_fingerprint(chart_dir)
+    )
+    chart_paths.write_atomic(out_path, payload)
+    return out_path
+
+
+def compile_all(data_dir: str) -> List[Path]:
+    """
+    Compiles a store for every chart folder found by chart discovery. Week
+    files are read by the async loader, several at a time across charts.
+    """
+    chart_infos = []
+    for chart_info in chart_discovery.discover_chart_folders(data_dir):
+        if not Path(chart_info["data_dir"]).exists():
+            logger.warning(
+                f"Chart folder not found: {chart_info['source']} / {chart_info['chart_name']}"
+            )
+            continue
+        chart_infos.append(chart_info)
+
+    names = {
+        Path(c["data_dir"]): f"{c['source']} / {c['chart_name']}" for c in chart_infos
+    }
+    fingerprints = {
+        chart_dir: chart_paths.chart_fingerprint(chart_dir) for chart_dir in names
+    }
+
+    def write_store(chart_dir: Path, weeks: List[Tuple[str, List[Dict[str, Any]]]]) -> Path:
+        out_path = store_path(chart_dir)
+        payload = store_format.encode_weeks(weeks, fingerprints[chart_dir])
+        chart_paths.write_atomic(out_path, payload)
+        logger.info(f"Compiled {names[chart_dir]}")
+        return out_path
+
+    return async_loader.map_charts(list(names), write_store)
+
+
+def pin_files(files: Dict[Path, Any]) -> None:
+    """
+    Makes open_store and song_index.load_index return the given resident
+    objects (e.g. in-memory stores and a song index) for their file paths,
+    whatever is on disk. The set replaces the previously pinned one in a
+    single assignment, so concurrent queries see the old set or the new one,
+    never a gap between them.
+    """
+    global _pinned
+    _pinned = {str(path): obj for path, obj in files.items()}
+
+
+def pinned_file(path: Path) -> Optional[Any]:
+    """The resident object pinned for a file path, if any."""
+    return _pinned.get(str(path))
+
+
+def has_store(chart_dir: Path) -> bool:
+    """True if a chart folder has a pinned store or a compiled one that is current."""
+    return open_store(chart_dir) is not None
+
+
+def is_current(store: store_format.ChartStore, chart_dir: Path) -> bool:
+    """True if a store was compiled from the chart as it is now (see chart_fingerprint)."""
+    try:
+        return store.fingerprint == chart_paths.chart_fingerprint(chart_dir)
+    except OSError:
+        return False
+
+
+def open_store(
+    chart_dir: Path, check_fingerprint: bool = True
+) -> Optional[store_format.ChartStore]:
+    """
+    Returns the memory-mapped store for a chart folder, or None if it has not
+    been compiled. Opened stores are cached until the file changes. A store
+    whose fingerprint no longer matches the chart is ignored with a warning,
+    so queries read the JSON weeks, unless check_fingerprint is False.
+    """
+    path = store_path(chart_dir)
+    pinned = pinned_file(path)
+    if pinned is not None:
+        return pinned
+
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+
+    key = str(path)
+    stamp = (st.st_mtime_ns, st.st_size)
+    cached = _store_cache.get(key)
+    if cached and cached[0] == stamp:
+        store = cached[1]
+    else:
+        try:
+            with path.open("rb") as f:
+                buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            store = store_format.ChartStore(buffer)
+        except (OSError, ValueError, struct.error) as e:
+            logger.error(f"Error opening chart store {path}: {e}")
+            return None
+        _store_cache[key] = (stamp, store)
+        instrumentation.metrics.incr("stores_opened")
+
+    if check_fingerprint and not is_current(store, chart_dir):
+        if _stale_warnings.get(key) != stamp:
+            _stale_warnings[key] = stamp
+            logger.warning(
+                f"Chart store {path.name} is out of date; reading the JSON weeks "
+                "instead. Re-run chart_store.py or refresh_data.py to update it."
+            )
+        return None
+    return store
+
+
+if __name__ == "__main__":
+    import argparse
+
+    logging.basicConfig(level=logging.INFO)
+
+    parser = argparse.ArgumentParser(description="Compile chart folders into columnar stores")
+    parser.add_argument(
+        "--data_dir", default=str(Path(__file__).parent.parent / "data")
+    )
+    instrumentation.add_profile_argument(parser)
+    args = parser.parse_args()
+    instrumentation.profile_from_args(args)
+
+    stores = compile_all(args.data_dir)
+    print(f"Compiled {len(stores)} chart store(s).")
@@ -0,0 +1,224 @@
+import logging
+from pathlib import Path
+from typing import Dict, List, Optional, Any, Iterable, Tuple
+
+import chart_discovery
+import chart_paths
+import chart_store
+import derived_tables
+import song_credits
+import instrumentation
+
+logger = logging.getLogger(__name__)
+
+STREAKS_SUFFIX = ".streaks.json"
+STREAKS_VERSION = 2
+# Runs are tracked for these rank thresholds: #1, top 5 and top 10
+THRESHOLDS = (1, 5, 10)
+
+# A run is [artist, song, first week, last week, weeks, best position];
+# debuts and re-entries are [week, artist, song, position].
+Run = List[Any]
+Event = List[Any]
+
+def streaks_path(chart_dir: Path) -> Path:
+    """Returns the streak table location for a chart folder (a sibling file)."""
+    chart_dir = chart_paths.chart_base(chart_dir)
+    return chart_dir.with_name(chart_dir.name + STREAKS_SUFFIX)
+
+
+class ChartStreaks:
+    """
+    Consecutive-week runs at each rank threshold, debuts and re-entries of
+    one chart, in the order they occur.
+    """
+
+    def __init__(
+        self,
+        fingerprint: List[int],
+        runs: Dict[int, List[Run]],
+        debuts: List[Event],
+        reentries: List[Event],
+        aliases: str = "",
+    ):
+        # chart_paths.chart_fingerprint of the chart the table was built from
+        self.fingerprint = fingerprint
+        self.runs = runs
+        self.debuts = debuts
+        self.reentries = reentries
+        # Digest of the alias file songs were identified with
+        self.aliases = aliases
+
+    def to_json(self) -> Dict[str, Any]:
+        return {
+            "version": STREAKS_VERSION,
+            "aliases": self.aliases,
+            "fingerprint": self.fingerprint,
+            "runs": {str(t): runs for t, runs in self.runs.items()},
+            "debuts": self.debuts,
+            "reentries": self.reentries,
+        }
+
+    @classmethod
+    def from_json(cls, content: Dict[str, Any]) -> "ChartStreaks":
+        return cls(
+            content.get("fingerprint", []),
+            {int(t): runs for t, runs in content.get("runs", {}).items()},
+            content.get("debuts", []),
+            content.get("reentries", []),
+            content.get("aliases", ""),
+        )
+
+
+def arrival_kind(last_seen: Optional[int], week: int, weeks_on_chart: Any) -> Optional[str]:
+    """
+    How a song arrives in archive week `week` (0 for the archive's first),
+    given the last earlier archive week it was on (None if never): "debut",
+    "reentry", or None when it stays on from the previous week. A song's
+    first archive appearance is a debut unless its weeks_on_chart says it
+    charted before; then, like any return after missing a week, it counts
+    as a re-entry, except in the archive's first week, whose history is
+    unknown. Streak and delta tables both classify songs with this.
+    """
+    if last_seen is None:
+        if (weeks_on_chart or 1) <= 1:
+            return "debut"
+        return "reentry" if week else None
+    return "reentry" if last_seen < week - 1 else None
+
+
+def compute_streaks(
+    weeks: Iterable[Tuple[str, List[Dict[str, Any]]]],
+    credits: song_credits.CreditTable,
+    thresholds: Iterable[int] = THRESHOLDS,
+) -> Tuple[Dict[int, List[Run]], List[Event], List[Event]]:
+    """
+    One pass over a chart's (stem, entries) weeks in date order. A run is a
+    sequence of consecutive archive weeks at or above a threshold; debuts
+    and re-entries are classified by arrival_kind. Songs are identified by
+    the given credit table.
+    """
+    thresholds = sorted(set(thresholds))
+    names: Dict[int, Tuple[str, str]] = {}
+    last_seen: Dict[int, int] = {}
+    open_runs: Dict[int, Dict[int, List[Any]]] = {t: {} for t in thresholds}
+    runs: Dict[int, List[List[Any]]] = {t: [] for t in thresholds}
+    debuts: List[List[Any]] = []
+    reentries: List[List[Any]] = []
+
+    for i, (stem, entries) in enumerate(weeks):
+        positions: Dict[int, Any] = {}
+        for entry in entries:
+            sid = credits.song_id(entry.get("artist"), entry.get("song"))
+            # Only the first match of a week counts, as in the song index
+            if sid in positions:
+                continue
+            position = entry.get("this_week")
+            positions[sid] = position
+            if sid not in names:
+                names[sid] = (
+                    str(entry.get("artist") or "").strip(),
+                    str(entry.get("song") or "").strip(),
+                )
+            kind = arrival_kind(last_seen.get(sid), i, entry.get("weeks_on_chart"))
+            if kind == "debut":
+                debuts.append([stem, sid, position])
+            elif kind == "reentry":
+                reentries.append([stem, sid, position])
+            last_seen[sid] = i
+
+        for t in thresholds:
+            current = open_runs[t]
+            for sid in list(current):
+                position = positions.get(sid)
+                if not position or position > t:
+                    runs[t].append(current.pop(sid))
+            for sid, position in positions.items():
+                if not position or position > t:
+                    continue
+                run = current.get(sid)
+                if run is None:
+                    current[sid] = [sid, stem, stem, 1, position]
+                else:
+                    run[2] = stem
+                    run[3] += 1
+                    run[4] = min(run[4], position)
+
+    for t in thresholds:
+        runs[t].extend(open_runs[t].values())
+        runs[t].sort(key=lambda run: run[1])
+
+    def named(record: List[Any], at: int) -> List[Any]:
+        return record[:at] + list(names[record[at]]) + record[at + 1 :]
+
+    return (
+        {t: [named(run, 0) for run in runs[t]] for t in thresholds},
+        [named(event, 1) for event in debuts],
+        [named(event, 1) for event in reentries],
+    )
+
+
+def build_streaks(chart_dir: Path, credits: song_credits.CreditTable) -> ChartStreaks:
+    """Computes the streak table of a chart from its store or JSON files."""
+    chart_dir = Path(chart_dir)
+    fingerprint = chart_paths.chart_fingerprint(chart_dir)
+    runs, debuts, reentries = compute_streaks(
+        chart_store.iter_chart_weeks(chart_dir), credits
+    )
+    return ChartStreaks(fingerprint, runs, debuts, reentries, credits.digest)
+
+
+def save_streaks(chart_dir: Path, streaks: ChartStreaks) -> Path:
+    return derived_tables.save_table(streaks_path(chart_dir), streaks.to_json())
+
+
+def build_all(data_dir: str) -> List[Path]:
+    """Builds and saves the streak table of every discovered chart."""
+    credits = song_credits.load_table(data_dir)
+    written = []
+    for chart_info in chart_discovery.discover_chart_folders(data_dir):
+        chart_p = Path(chart_info["data_dir"])
+        if not chart_p.exists():
+            logger.warning(
+                f"Chart folder not found: {chart_info['source']} / {chart_info['chart_name']}"
+            )
+            continue
+        written.append(save_streaks(chart_p, build_streaks(chart_p, credits)))
+    return written
+
+
+def load_streaks(
+    chart_dir: Path, credits: song_credits.CreditTable
+) -> Optional[ChartStreaks]:
+    """
+    Loads the saved streak table of a chart, or None if it has not been built
+    or is out of date for the chart or the credit table's aliases (see
+    derived_tables.load_table).
+    """
+    return derived_tables.load_table(
+        streaks_path(chart_dir),
+        chart_dir,
+        credits.digest,
+        STREAKS_VERSION,
+        "streak table",
+        ChartStreaks.from_json,
+    )
+
+
+if __name__ == "__main__":
+    import argparse
+
+    logging.basicConfig(level=logging.INFO)
+
+    parser = argparse.ArgumentParser(
+        description="Build streak, debut and re-entry tables for every chart"
+    )
+    parser.add_argument(
+        "--data_dir", default=str(Path(__file__).parent.parent / "data")
+    )
+    instrumentation.add_profile_argument(parser)
+    args = parser.parse_args()
+    instrumentation.profile_from_args(args)
+
+    for out in build_all(args.data_dir):
+        print(f"Wrote {out}")
@@ -1,23 +1,93 @@
+import bisect
 import logging
+import os
 from pathlib import Path
-from typing import List
+from typing import Dict, List, Tuple
 
+import chart_pack
+import chart_paths
+import instrumentation
 import time_engine
 
 logger = logging.getLogger(__name__)
 
 
+class ChartCatalog:
+    """
+    Sorted listing of the week files of one chart folder with their dates
+    parsed once: files by stem, dated files by day ordinal (for binary
+    search) and files grouped by their '-MM-DD' suffix (for week lookups).
+    """
+
+    def __init__(self, chart_dir: Path, names: List[str]):
+        self.files: List[Path] = sorted(
+            (chart_dir / name for name in names), key=lambda f: f.stem
+        )
+
+        dated: List[Tuple[int, str, Path]] = []
+        self.by_month_day: Dict[str, List[Path]] = {}
+        for f in self.files:
+            self.by_month_day.setdefault(f.stem[-6:], []).append(f)
+            ordinal = time_engine.filename_ordinal(f.name)
+            if ordinal is not None:
+                dated.append((ordinal, f.stem, f))
+
+        dated.sort(key=lambda d: (d[0], d[1]))
+        self.ordinals: List[int] = [d[0] for d in dated]
+        self.dated_files: List[Path] = [d[2] for d in dated]
+
+    def files_between(self, start_ordinal: int, end_ordinal: int) -> List[Path]:
+        lo = bisect.bisect_left(self.ordinals, start_ordinal)
+        hi = bisect.bisect_right(self.ordinals, end_ordinal)
+        return self.dated_files[lo:hi]
+
+
+_catalogs: Dict[str, Tuple[int, ChartCatalog]] = {}
+
+
+@instrumentation.timed("chart_utils.get_chart_catalog")
+def get_chart_catalog(chart_dir: Path) -> ChartCatalog:
+    """
+    Returns the cached catalog of a chart folder, rebuilding it when the
+    folder's mtime changes (i.e. when week files are added, removed or renamed).
+    """
+    key = str(chart_dir)
+    try:
+        mtime = os.stat(chart_dir).st_mtime_ns
+    except OSError:
+        return ChartCatalog(Path(chart_dir), [])
+
+    cached = _catalogs.get(key)
+    if cached and cached[0] == mtime:
+        return cached[1]
+
+    if chart_paths.is_pack(chart_dir):
+        # A pack lists its weeks as if it were the folder they were packed from
+        pack = chart_pack.open_pack(chart_dir)
+        names = [f"{stem}.json" for stem in pack.stems] if pack else []
+    else:
+        names = chart_paths.week_file_names(chart_dir)
+    catalog = ChartCatalog(Path(chart_dir), names)
+    _catalogs[key] = (mtime, catalog)
+    return catalog
+
+
+@instrumentation.timed("chart_utils.get_files_for_week")
 def get_files_for_week(chart_dir: Path, patterns: List[str]) -> List[Path]:
     """
     Returns sorted list of JSON files matching any of the -MM-DD patterns.
     """
-    files = [
-        f for f in chart_dir.glob("*.json") if any(f.stem.endswith(p) for p in patterns)
-    ]
+    catalog = get_chart_catalog(chart_dir)
+    if all(len(p) == 6 for p in patterns):
+        files = [f for p in set(patterns) for f in catalog.by_month_day.get(p, [])]
+    else:
+        files = [f for f in catalog.files if any(f.stem.endswith(p) for p in patterns)]
     files.sort(key=lambda f: f.stem)
+    instrumentation.metrics.incr("files_globbed", len(files))
     return files
 
 
+@instrumentation.timed("chart_utils.get_files_for_date_range")
 def get_files_for_date_range(
     chart_dir: Path, start_date: str, end_date: str
 ) -> List[Path]:
@@ -25,27 +95,30 @@ def get_files_for_date_range(
     Returns sorted list of JSON files within the date range (inclusive).
     """
     try:
-        # Validate dates
-        time_engine.get_week_patterns(start_date)
-        time_engine.get_week_patterns(end_date)
+        start, end = time_engine.parse_date_range(start_date, end_date)
     except ValueError as e:
         raise ValueError(f"Invalid date range: {e}")
+    return get_files_between_ordinals(chart_dir, start, end)
 
-    files = [
-        f
-        for f in chart_dir.glob("*.json")
-        if time_engine.is_date_in_range(f.name, start_date, end_date)
-    ]
-    files.sort(
-        key=lambda f: time_engine.extract_date_from_filename(f.name) or "0000-00-00"
-    )
+
+@instrumentation.timed("chart_utils.get_files_between_ordinals")
+def get_files_between_ordinals(
+    chart_dir: Path, start_ordinal: int, end_ordinal: int
+) -> List[Path]:
+    """
+    Returns JSON files dated within [start_ordinal, end_ordinal] (day
+    ordinals, inclusive) in date order, without parsing any date string.
+    """
+    files = get_chart_catalog(chart_dir).files_between(start_ordinal, end_ordinal)
+    instrumentation.metrics.incr("files_globbed", len(files))
     return files
 
 
+@instrumentation.timed("chart_utils.get_all_files")
 def get_all_files(chart_dir: Path) -> List[Path]:
     """
     Returns all sorted JSON files in the chart directory.
     """
-    files = list(chart_dir.glob("*.json"))
-    files.sort(key=lambda f: f.stem)
+    files = list(get_chart_catalog(chart_dir).files)
+    instrumentation.metrics.incr("files_globbed", len(files))
     return files
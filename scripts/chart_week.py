@@ -0,0 +1,154 @@
+import sys
+from array import array
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Union
+
+# Numeric column sentinels: -1 means the key is absent from the JSON entry,
+# 0 means the key is present with a null value (ranks start at 1).
+ABSENT = -1
+NULL = 0
+
+NUMERIC_KEYS = ("this_week", "last_week", "peak_position", "weeks_on_chart")
+TEXT_KEYS = ("song", "artist")
+ENTRY_KEYS = TEXT_KEYS + NUMERIC_KEYS
+
+# Largest value a numeric column holds (int32)
+INT_MAX = 2**31 - 1
+
+
+class ChartEntry:
+    """
+    Read-only, dict-like view of one row of a ChartWeek. Supports the access
+    patterns callers use on JSON entries: get(), [], in, keys() and items().
+    """
+
+    __slots__ = ("_week", "_row")
+
+    def __init__(self, week: "ChartWeek", row: int):
+        self._week = week
+        self._row = row
+
+    def get(self, key: str, default: Any = None) -> Any:
+        week, row = self._week, self._row
+        if key == "song":
+            return week.songs[row]
+        if key == "artist":
+            return week.artists[row]
+        if key in NUMERIC_KEYS:
+            value = getattr(week, key)[row]
+            if value == ABSENT:
+                return default
+            return None if value == NULL else value
+        return default
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in self:
+            raise KeyError(key)
+        return self.get(key)
+
+    def __contains__(self, key: object) -> bool:
+        if key in TEXT_KEYS:
+            return True
+        if key in NUMERIC_KEYS:
+            return getattr(self._week, key)[self._row] != ABSENT
+        return False
+
+    def keys(self) -> List[str]:
+        return [key for key in ENTRY_KEYS if key in self]
+
+    def items(self) -> List[Any]:
+        return [(key, self.get(key)) for key in self.keys()]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(self.items())
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, ChartEntry):
+            other = other.to_dict()
+        return isinstance(other, dict) and self.to_dict() == other
+
+    def __repr__(self) -> str:
+        return repr(self.to_dict())
+
+
+class ChartWeek(Sequence):
+    """
+    Compact representation of a chart week: one typed array per numeric
+    column and tuples of interned song/artist strings, instead of a dict per
+    row. Indexing and iteration yield ChartEntry views.
+    """
+
+    __slots__ = ("songs", "artists") + NUMERIC_KEYS
+
+    def __init__(
+        self,
+        songs: Sequence[str],
+        artists: Sequence[str],
+        this_week: array,
+        last_week: array,
+        peak_position: array,
+        weeks_on_chart: array,
+    ):
+        self.songs = songs
+        self.artists = artists
+        self.this_week = this_week
+        self.last_week = last_week
+        self.peak_position = peak_position
+        self.weeks_on_chart = weeks_on_chart
+
+    @classmethod
+    def from_entries(cls, entries: List[Dict[str, Any]]) -> Optional["ChartWeek"]:
+        """
+        Packs JSON entries into a ChartWeek. Returns None when an entry does
+        not fit the compact layout (extra keys, non-string text, non-integer
+        or out-of-range numbers), so the caller can keep the original list.
+        """
+        songs, artists = [], []
+        columns = {key: array("i") for key in NUMERIC_KEYS}
+        for entry in entries:
+            if not isinstance(entry, dict) or not entry.keys() <= set(ENTRY_KEYS):
+                return None
+            song, artist = entry.get("song"), entry.get("artist")
+            if not isinstance(song, str) or not isinstance(artist, str):
+                return None
+            songs.append(sys.intern(song))
+            artists.append(sys.intern(artist))
+            for key in NUMERIC_KEYS:
+                if key not in entry:
+                    value = ABSENT
+                elif entry[key] is None:
+                    value = NULL
+                else:
+                    value = entry[key]
+                    if type(value) is not int or value <= NULL or value > INT_MAX:
+                        return None
+                columns[key].append(value)
+        return cls(tuple(songs), tuple(artists), *(columns[k] for k in NUMERIC_KEYS))
+
+    def __len__(self) -> int:
+        return len(self.songs)
+
+    def __getitem__(self, index: Union[int, slice]) -> Any:
+        if isinstance(index, slice):
+            return [ChartEntry(self, i) for i in range(len(self))[index]]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("ChartWeek index out of range")
+        return ChartEntry(self, index)
+
+    def __iter__(self) -> Iterator[ChartEntry]:
+        for i in range(len(self.songs)):
+            yield ChartEntry(self, i)
+
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        return [entry.to_dict() for entry in self]
+
+    def nbytes(self) -> int:
+        """
+        Memory held by this week, excluding the interned strings, which are
+        shared with every other week that lists the same song or artist.
+        """
+        size = sys.getsizeof(self)
+        for key in ("songs", "artists") + NUMERIC_KEYS:
+            size += sys.getsizeof(getattr(self, key))
+        return size
@@ -0,0 +1,222 @@
+import logging
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import chart_discovery
+import chart_store
+import chart_utils
+import data_handler
+import song_credits
+import time_engine
+import instrumentation
+
+logger = logging.getLogger(__name__)
+
+# A chart peak is [artist, song, peak, peak date, weeks in range].
+ChartPeak = List[Any]
+
+_OPEN_END = time_engine.parse_date_ordinal("9999-12-31")
+
+
+def _window_ordinals(
+    start_date: Optional[str], end_date: Optional[str]
+) -> Tuple[int, int]:
+    try:
+        start = time_engine.parse_date_ordinal(start_date) if start_date else 0
+        end = time_engine.parse_date_ordinal(end_date) if end_date else _OPEN_END
+    except ValueError as e:
+        raise ValueError(f"Invalid date range: {e}")
+    return start, end
+
+
+def _iter_weeks(
+    chart_p: Path, start: int, end: int
+) -> Iterator[Tuple[Optional[str], Sequence[Any]]]:
+    """Yields (date, entries) for the chart weeks dated within [start, end]."""
+    store = chart_store.open_store(chart_p)
+    if store is not None:
+        for week in store.weeks_between_ordinals(start, end):
+            yield store.week_date(week), store.week_entries(week)
+        return
+    for filename in chart_utils.get_files_between_ordinals(chart_p, start, end):
+        yield (
+            time_engine.extract_date_from_filename(filename.name),
+            data_handler.load_chart_entries(str(filename)),
+        )
+
+
+@instrumentation.timed("crossover_search.chart_peaks")
+def chart_peaks(
+    chart_p: Path,
+    credits: song_credits.CreditTable,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    min_pos: int = 1,
+    max_pos: Optional[int] = None,
+) -> Dict[int, ChartPeak]:
+    """
+    One pass over a chart's weeks in the optional date window, keeping the
+    entries between min_pos and max_pos: returns {song id: [artist, song,
+    peak, first peak date, weeks]} keyed by the given credit table's ids.
+    """
+    start, end = _window_ordinals(start_date, end_date)
+    peaks: Dict[int, ChartPeak] = {}
+    for date_str, entries in _iter_weeks(chart_p, start, end):
+        seen = set()
+        for entry in entries:
+            pos = entry.get("this_week")
+            if pos is None or pos < min_pos or (max_pos is not None and pos > max_pos):
+                continue
+            artist = entry.get("artist") or ""
+            song = entry.get("song") or ""
+            key = credits.song_id(artist, song)
+            # Only the first match of a week counts, as in the song index
+            if key in seen:
+                continue
+            seen.add(key)
+            peak = peaks.get(key)
+            if peak is None:
+                peaks[key] = [artist.strip(), song.strip(), pos, date_str, 1]
+                continue
+            peak[4] += 1
+            if pos < peak[2]:
+                peak[2] = pos
+                peak[3] = date_str
+    return peaks
+
+
+def _chart_label(chart_info: Dict) -> str:
+    return f"{chart_info['source']} / {chart_info['chart_name']}"
+
+
+@instrumentation.timed("crossover_search.get_crossovers")
+def get_crossovers(
+    data_dir: str,
+    chart_infos: List[Dict],
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    min_pos: int = 1,
+    max_pos: Optional[int] = None,
+    limit: Optional[int] = None,
+) -> List[Dict]:
+    """
+    Returns the songs that charted between min_pos and max_pos on every one
+    of the given charts within the optional date window, with their peak,
+    first peak date and weeks on each chart. Each chart is read once into a
+    peak map, then the maps are hash-joined on the canonical song id,
+    probing from the smallest. Results are ordered by their peaks in chart
+    order, then by artist and song.
+    """
+    if len(chart_infos) < 2:
+        raise ValueError("A crossover needs at least two charts.")
+    if min_pos < 1 or (max_pos is not None and max_pos < min_pos):
+        raise ValueError("Invalid position range.")
+    _window_ordinals(start_date, end_date)
+
+    credits = song_credits.load_table(data_dir)
+    maps = []
+    for chart_info in chart_infos:
+        chart_p = Path(chart_info["data_dir"])
+        if not chart_discovery.overlaps_dates(chart_info, start_date, end_date):
+            return []
+        if not chart_p.exists():
+            logger.warning(f"Chart folder not found: {_chart_label(chart_info)}")
+            return []
+        maps.append(
+            chart_peaks(chart_p, credits, start_date, end_date, min_pos, max_pos)
+        )
+
+    smallest = min(maps, key=len)
+    others = [m for m in maps if m is not smallest]
+    results = []
+    for key in smallest:
+        if not all(key in m for m in others):
+            continue
+        found = [m[key] for m in maps]
+        results.append(
+            {
+                "artist": found[0][0],
+                "song": found[0][1],
+                "charts": [
+                    {
+                        "chart": _chart_label(chart_info),
+                        "peak": peak,
+                        "peak_date": peak_date,
+                        "weeks": weeks,
+                    }
+                    for chart_info, (_, _, peak, peak_date, weeks) in zip(
+                        chart_infos, found
+                    )
+                ],
+            }
+        )
+    results.sort(
+        key=lambda r: (
+            [c["peak"] for c in r["charts"]],
+            r["artist"].lower(),
+            r["song"].lower(),
+        )
+    )
+    return results[:limit] if limit else results
+
+
+def parse_chart_numbers(value: str, chart_infos: List[Dict]) -> List[Dict]:
+    """Resolves a comma-separated list of 1-based chart numbers."""
+    selected = []
+    for part in value.split(","):
+        part = part.strip()
+        if not part.isdigit() or not 1 <= int(part) <= len(chart_infos):
+            raise ValueError(f"Invalid chart number: {part}")
+        selected.append(chart_infos[int(part) - 1])
+    return selected
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    logging.basicConfig(level=logging.INFO)
+
+    parser = argparse.ArgumentParser(
+        description="Songs that charted on several charts, with the peak on each"
+    )
+    parser.add_argument(
+        "--data_dir", default=str(Path(__file__).parent.parent / "data")
+    )
+    parser.add_argument(
+        "--charts", default="1,3", help="Comma-separated chart numbers from list"
+    )
+    parser.add_argument("--start_date")
+    parser.add_argument("--end_date")
+    parser.add_argument("--min_pos", type=int, default=1)
+    parser.add_argument("--max_pos", type=int)
+    parser.add_argument("--limit", type=int)
+    instrumentation.add_profile_argument(parser)
+    args = parser.parse_args()
+    instrumentation.profile_from_args(args)
+
+    chart_infos = chart_discovery.discover_chart_folders(args.data_dir)
+    try:
+        selected = parse_chart_numbers(args.charts, chart_infos)
+        crossovers = get_crossovers(
+            args.data_dir,
+            selected,
+            args.start_date,
+            args.end_date,
+            args.min_pos,
+            args.max_pos,
+            args.limit,
+        )
+    except ValueError as e:
+        print(e)
+        sys.exit(1)
+
+    names = [c["chart_name"] for c in selected]
+    print("| Artist | Song | " + " | ".join(names) + " |")
+    print("|--------|------|" + "|".join("-" * (len(n) + 2) for n in names) + "|")
+    for r in crossovers:
+        peaks = " | ".join(
+            f"#{c['peak']} ({c['peak_date']}, {c['weeks']} wks)" for c in r["charts"]
+        )
+        print(f"| {r['artist']} | {r['song']} | {peaks} |")
+    print(f"\n{len(crossovers)} crossover songs found.")
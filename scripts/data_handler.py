@@ -1,94 +1,387 @@
 import json
 import logging
+import os
+import re
+import sys
+import threading
+from collections import OrderedDict
 from pathlib import Path
-from typing import Dict, Optional, Any, List
+from typing import Dict, Optional, Any, List, Iterable, Iterator, Tuple, Sequence
+
+import chart_pack
+import chart_paths
+import chart_week
+import song_credits
+import instrumentation
 
 logger = logging.getLogger(__name__)
 
+# "json" parses whole files; "streaming" decodes entries one at a time and
+# stops reading as soon as a lookup finds its target.
+READERS = ("json", "streaming")
+STREAM_CHUNK_SIZE = 8192
+DEFAULT_CACHE_BYTES = 128 * 1024 * 1024
+
+_reader = "json"
+# Process-wide number of week files opened by the readers
+read_stats = {"files": 0}
+_DATA_ARRAY = re.compile(r'"data"\s*:\s*\[')
+_SEPARATORS = re.compile(r"[\s,]*")
+_decoder = json.JSONDecoder()
+# Compares credits by canonicalization alone when a caller passes no table
+_plain_credits = song_credits.CreditTable()
+
+
+def set_reader(name: str) -> None:
+    """Selects the default reader used by extract_hit and search_song_in_file."""
+    global _reader
+    if name not in READERS:
+        raise ValueError(
+            f"Invalid reader '{name}'. Choose one of: {', '.join(READERS)}"
+        )
+    _reader = name
+
+
+def open_week_file(file_path: Any):
+    """Opens a week JSON file (or packed week) for reading text and counts the read."""
+    read_stats["files"] += 1
+    instrumentation.metrics.incr("files_opened")
+    if chart_paths.pack_of(file_path):
+        return chart_pack.open_week_text(file_path)
+    return Path(file_path).open("r", encoding="utf-8")
+
+
+def _week_exists(file_p: Path) -> bool:
+    if chart_paths.pack_of(file_p):
+        return chart_pack.has_week(file_p)
+    return file_p.exists()
+
+
+def _mtime_ns(path: str) -> int:
+    # Packed weeks change with their pack
+    return os.stat(chart_paths.pack_of(path) or path).st_mtime_ns
+
+
+def iter_chart_entries(
+    file_path: str, chunk_size: int = STREAM_CHUNK_SIZE
+) -> Iterator[Dict[str, Any]]:
+    """
+    Incrementally decodes the entries of a chart file's "data" array, reading
+    the file in chunks. Stopping the iteration early skips the rest of the file.
+    """
+    with open_week_file(file_path) as f:
+        try:
+            buf = ""
+            match = None
+            while match is None:
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    return
+                buf += chunk
+                match = _DATA_ARRAY.search(buf)
+            pos = match.end()
+
+            while True:
+                pos = _SEPARATORS.match(buf, pos).end()
+                if pos < len(buf):
+                    if buf[pos] == "]":
+                        return
+                    try:
+                        entry, pos = _decoder.raw_decode(buf, pos)
+                    except json.JSONDecodeError:
+                        entry = None
+                    if entry is not None:
+                        yield entry
+                        continue
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    raise json.JSONDecodeError("Unterminated data array", buf, pos)
+                buf = buf[pos:] + chunk
+                pos = 0
+        finally:
+            if instrumentation.metrics.enabled and not chart_paths.pack_of(file_path):
+                # Bytes the text layer pulled from the file, up to an early exit
+                # (packed weeks are counted by the pack)
+                instrumentation.metrics.incr("bytes_read", f.buffer.tell())
+
+
+def _estimate_size(entries: Sequence[Any]) -> int:
+    """Approximate memory held by a parsed week (list, dicts and values)."""
+    if isinstance(entries, chart_week.ChartWeek):
+        return entries.nbytes()
+    size = sys.getsizeof(entries)
+    for entry in entries:
+        size += sys.getsizeof(entry)
+        size += sum(sys.getsizeof(v) for v in entry.values())
+    return size
+
+
+class WeekCache:
+    """
+    Process-wide LRU cache of parsed week entries keyed by file path and
+    mtime, bounded by an estimated memory ceiling. Cached entries are shared
+    between callers and must be treated as read-only.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self._weeks: "OrderedDict[str, Tuple[int, int, Sequence[Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def get(self, path: str, mtime_ns: int) -> Optional[Sequence[Any]]:
+        with self._lock:
+            cached = self._weeks.get(path)
+            if cached is None or cached[0] != mtime_ns:
+                self.misses += 1
+                entries = None
+            else:
+                self._weeks.move_to_end(path)
+                self.hits += 1
+                entries = cached[2]
+        instrumentation.metrics.incr("cache_misses" if entries is None else "cache_hits")
+        return entries
+
+    def put(self, path: str, mtime_ns: int, entries: Sequence[Any]) -> None:
+        size = _estimate_size(entries)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._weeks.pop(path, None)
+            if old is not None:
+                self.bytes -= old[1]
+            self._weeks[path] = (mtime_ns, size, entries)
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                _, (_, evicted, _) = self._weeks.popitem(last=False)
+                self.bytes -= evicted
+                self.evictions += 1
+
+    def resize(self, max_bytes: int) -> None:
+        """Changes the memory ceiling (0 disables caching), evicting as needed."""
+        with self._lock:
+            self.max_bytes = max_bytes
+            while self._weeks and self.bytes > max_bytes:
+                _, (_, evicted, _) = self._weeks.popitem(last=False)
+                self.bytes -= evicted
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._weeks.clear()
+            self.bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "weeks": len(self._weeks),
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+        }
+
+
+week_cache = WeekCache()
+
+
+def _parse_week(file_p: Path) -> Sequence[Any]:
+    """Parses a week file into a compact ChartWeek (or its raw entries)."""
+    if chart_paths.pack_of(file_p):
+        read_stats["files"] += 1
+        instrumentation.metrics.incr("files_opened")
+        entries = chart_pack.read_week_entries(file_p)
+        if isinstance(entries, chart_week.ChartWeek):
+            return entries
+    else:
+        with open_week_file(file_p) as f:
+            if instrumentation.metrics.enabled:
+                instrumentation.metrics.incr("bytes_read", os.fstat(f.fileno()).st_size)
+            entries = json.load(f).get("data", [])
+    week = chart_week.ChartWeek.from_entries(entries)
+    return week if week is not None else entries
+
+
+def _load_entries(file_p: Path) -> Sequence[Any]:
+    """Returns the parsed entries of a week file through the week cache."""
+    if not week_cache.enabled:
+        return _parse_week(file_p)
+
+    key = str(file_p)
+    mtime_ns = _mtime_ns(key)
+    entries = week_cache.get(key, mtime_ns)
+    if entries is None:
+        entries = _parse_week(file_p)
+        week_cache.put(key, mtime_ns, entries)
+    return entries
+
+
+def _counted(entries: Iterator[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+    scanned = 0
+    try:
+        for entry in entries:
+            scanned += 1
+            yield entry
+    finally:
+        instrumentation.metrics.incr("entries_scanned", scanned)
+
+
+def _iter_entries(file_p: Path, reader: Optional[str]) -> Iterator[Dict[str, Any]]:
+    # A cached week beats streaming; streamed lookups are not cached since
+    # they stop before the whole week has been read.
+    if (reader or _reader) == "streaming":
+        entries = None
+        if week_cache.enabled:
+            key = str(file_p)
+            entries = week_cache.get(key, _mtime_ns(key))
+        it = iter(entries) if entries is not None else iter_chart_entries(str(file_p))
+    else:
+        it = iter(_load_entries(file_p))
+    # Entries are only counted while profiling, keeping the plain path free
+    return _counted(it) if instrumentation.metrics.enabled else it
+
 
 def normalize_text(text: str) -> str:
     """Normalizes text for case-insensitive comparison."""
     return text.strip().lower() if isinstance(text, str) else ""
 
 
+def build_hit(entry: Dict[str, Any], normalize: bool = False) -> Dict[str, Any]:
+    """
+    Builds the hit dict (title, artist and optional weeks) returned by
+    extract_hit from a chart entry.
+    """
+    hit = {
+        "title": normalize_text(entry.get("song")) if normalize else entry.get("song"),
+        "artist": (
+            normalize_text(entry.get("artist")) if normalize else entry.get("artist")
+        ),
+    }
+    if "weeks_on_chart" in entry:
+        hit["weeks"] = entry["weeks_on_chart"]
+    return hit
+
+
+@instrumentation.timed("data_handler.extract_hit")
 def extract_hit(
-    file_path: str, target_rank: int, normalize: bool = False
+    file_path: str,
+    target_rank: int,
+    normalize: bool = False,
+    reader: Optional[str] = None,
 ) -> Optional[Dict[str, Any]]:
     """
     Reads a chart JSON file and returns the song at the requested rank.
-    Optionally normalizes artist/title.
+    Optionally normalizes artist/title. reader overrides the default reader.
     """
     file_p = Path(file_path)
-    if not file_p.exists():
+    if not _week_exists(file_p):
         logger.warning(f"File not found: {file_path}")
         return None
 
     try:
-        with file_p.open("r", encoding="utf-8") as f:
-            content = json.load(f)
-            chart_data = content.get("data", [])
-
-            for entry in chart_data:
-                if entry.get("this_week") == target_rank:
-                    hit = {
-                        "title": (
-                            normalize_text(entry.get("song"))
-                            if normalize
-                            else entry.get("song")
-                        ),
-                        "artist": (
-                            normalize_text(entry.get("artist"))
-                            if normalize
-                            else entry.get("artist")
-                        ),
-                    }
-                    if "weeks_on_chart" in entry:
-                        hit["weeks"] = entry["weeks_on_chart"]
-                    return hit
+        for entry in _iter_entries(file_p, reader):
+            if entry.get("this_week") == target_rank:
+                return build_hit(entry, normalize)
     except (json.JSONDecodeError, IOError, OSError) as e:
         logger.error(f"Error loading {file_path}: {e}")
     return None
 
 
+@instrumentation.timed("data_handler.extract_hits")
+def extract_hits(
+    file_path: str,
+    target_ranks: Iterable[int],
+    normalize: bool = False,
+    reader: Optional[str] = None,
+) -> Dict[int, Dict[str, Any]]:
+    """
+    Like extract_hit for several ranks with a single read of the file.
+    Returns {rank: hit} for the ranks found; stops once all are found.
+    """
+    file_p = Path(file_path)
+    if not _week_exists(file_p):
+        logger.warning(f"File not found: {file_path}")
+        return {}
+
+    wanted = set(target_ranks)
+    hits: Dict[int, Dict[str, Any]] = {}
+    try:
+        for entry in _iter_entries(file_p, reader):
+            rank = entry.get("this_week")
+            if rank in wanted and rank not in hits:
+                hits[rank] = build_hit(entry, normalize)
+                if len(hits) == len(wanted):
+                    break
+    except (json.JSONDecodeError, IOError, OSError) as e:
+        logger.error(f"Error loading {file_path}: {e}")
+    return hits
+
+
+@instrumentation.timed("data_handler.search_song_in_file")
 def search_song_in_file(
-    file_path: str, target_artist: str, target_song: str
-) -> Optional[Dict[str, Any]]:
-    # Existing, with logging
+    file_path: str,
+    target_artist: str,
+    target_song: str,
+    reader: Optional[str] = None,
+    credits: Optional[song_credits.CreditTable] = None,
+) -> Optional[Any]:
+    """
+    Returns the first entry of a week file credited as the same song as
+    the artist and title (compared as song ids of the credit table, see
+    song_credits), or None. Without a table, credits are compared by
+    canonicalization alone, without aliases. The entry supports dict-style
+    get() access.
+    """
     file_p = Path(file_path)
-    if not file_p.exists():
+    if not _week_exists(file_p):
         logger.warning(f"File not found: {file_path}")
         return None
 
+    if credits is None:
+        credits = _plain_credits
     try:
-        with file_p.open("r", encoding="utf-8") as f:
-            content = json.load(f)
-            chart_data = content.get("data", [])
-
-            target_a = normalize_text(target_artist)
-            target_s = normalize_text(target_song)
-
-            for entry in chart_data:
-                if (
-                    normalize_text(entry.get("artist")) == target_a
-                    and normalize_text(entry.get("song")) == target_s
-                ):
-                    return entry
+        target = credits.song_id(target_artist, target_song)
+        song_id = credits.song_id
+
+        if (reader or _reader) == "json" and not instrumentation.metrics.enabled:
+            entries = _load_entries(file_p)
+            if isinstance(entries, chart_week.ChartWeek):
+                # Compare the compact week's columns without building entry views
+                for row, credit in enumerate(zip(entries.artists, entries.songs)):
+                    if song_id(*credit) == target:
+                        return entries[row]
+                return None
+
+        for entry in _iter_entries(file_p, reader):
+            if song_id(entry.get("artist"), entry.get("song")) == target:
+                return entry
     except (json.JSONDecodeError, IOError, OSError) as e:
         logger.error(f"Error loading {file_path}: {e}")
     return None
 
 
-def load_chart_entries(file_path: str) -> List[Dict[str, Any]]:
-    # Existing, with logging
+@instrumentation.timed("data_handler.load_chart_entries")
+def load_chart_entries(file_path: str) -> Sequence[Any]:
+    """
+    Returns the entries of a week file, as a compact ChartWeek whenever the
+    entries fit its layout. Entries support dict-style get() access.
+    """
     file_p = Path(file_path)
-    if not file_p.exists():
+    if not _week_exists(file_p):
         logger.warning(f"File not found: {file_path}")
         return []
 
     try:
-        with file_p.open("r", encoding="utf-8") as f:
-            content = json.load(f)
-            return content.get("data", [])
+        entries = _load_entries(file_p)
+        instrumentation.metrics.incr("entries_scanned", len(entries))
+        return entries
     except (json.JSONDecodeError, IOError, OSError) as e:
         logger.error(f"Error loading {file_path}: {e}")
         return []
@@ -0,0 +1,138 @@
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Dict, List, Optional, Any
+
+import chart_pack
+import chart_paths
+
+logger = logging.getLogger(__name__)
+
+# Must not end with "-manifest.json": chart discovery reads those as metadata.
+MANIFEST_FILENAME = "data-snapshot.json"
+MANIFEST_VERSION = 1
+
+# Per chart: {week stem: [size, mtime_ns, sha256]}
+ChartManifest = Dict[str, List[Any]]
+
+
+def manifest_path(data_dir: str) -> Path:
+    return Path(data_dir) / MANIFEST_FILENAME
+
+
+def file_hash(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _load_content(data_dir: str) -> Dict[str, Any]:
+    path = manifest_path(data_dir)
+    if not path.exists():
+        return {}
+    try:
+        with path.open("r", encoding="utf-8") as f:
+            content = json.load(f)
+    except (json.JSONDecodeError, IOError, OSError) as e:
+        logger.error(f"Error loading manifest {path}: {e}")
+        return {}
+    if content.get("version") != MANIFEST_VERSION:
+        return {}
+    return content
+
+
+def load_manifest(data_dir: str) -> Dict[str, ChartManifest]:
+    """Returns {chart key: chart manifest}; empty if no manifest was saved."""
+    return _load_content(data_dir).get("charts", {})
+
+
+def load_manifest_aliases(data_dir: str) -> Optional[str]:
+    """The alias file digest recorded by the last refresh, if any."""
+    return _load_content(data_dir).get("aliases")
+
+
+def load_manifest_fingerprints(data_dir: str) -> Dict[str, List[int]]:
+    """{chart key: chart_paths.chart_fingerprint} as of the last refresh."""
+    return _load_content(data_dir).get("fingerprints", {})
+
+
+def save_manifest(
+    data_dir: str,
+    charts: Dict[str, ChartManifest],
+    aliases: str = "",
+    fingerprints: Optional[Dict[str, List[int]]] = None,
+) -> Path:
+    path = manifest_path(data_dir)
+    payload = json.dumps(
+        {
+            "version": MANIFEST_VERSION,
+            "aliases": aliases,
+            "charts": charts,
+            "fingerprints": fingerprints or {},
+        },
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+    chart_paths.write_atomic(path, payload.encode("utf-8"))
+    return path
+
+
+def _scan_pack(pack_file: Path, previous: ChartManifest) -> ChartManifest:
+    # Packed weeks are fingerprinted by their stored size and the pack's mtime,
+    # and hashed from their JSON text. That text is minified, so the first
+    # refresh after packing a folder reports its weeks as changed.
+    mtime_ns = os.stat(pack_file).st_mtime_ns
+    pack = chart_pack.open_pack(pack_file)
+    current: ChartManifest = {}
+    for stem in pack.stems if pack else []:
+        size = pack.stored_size(stem)
+        old = previous.get(stem)
+        if old and old[0] == size and old[1] == mtime_ns:
+            current[stem] = old
+        else:
+            digest = hashlib.sha256(pack.week_json(stem)).hexdigest()
+            current[stem] = [size, mtime_ns, digest]
+    return current
+
+
+def scan_chart(
+    chart_dir: Path, previous: Optional[ChartManifest] = None
+) -> ChartManifest:
+    """
+    Fingerprints every week file of a chart folder. Files whose size and mtime
+    match the previous manifest reuse its hash instead of being re-read.
+    """
+    previous = previous or {}
+    if chart_paths.is_pack(chart_dir):
+        return _scan_pack(chart_dir, previous)
+    current: ChartManifest = {}
+    with os.scandir(chart_dir) as it:
+        for item in it:
+            if not item.name.endswith(".json") or not item.is_file():
+                continue
+            stem = item.name[: -len(".json")]
+            st = item.stat()
+            old = previous.get(stem)
+            if old and old[0] == st.st_size and old[1] == st.st_mtime_ns:
+                current[stem] = old
+            else:
+                current[stem] = [st.st_size, st.st_mtime_ns, file_hash(Path(item.path))]
+    return current
+
+
+def diff_manifests(old: ChartManifest, new: ChartManifest) -> Dict[str, List[str]]:
+    """
+    Compares two chart manifests by content hash.
+    Returns sorted 'added', 'changed' and 'deleted' week stems.
+    """
+    return {
+        "added": sorted(stem for stem in new if stem not in old),
+        "changed": sorted(
+            stem for stem in new if stem in old and old[stem][2] != new[stem][2]
+        ),
+        "deleted": sorted(stem for stem in old if stem not in new),
+    }
@@ -0,0 +1,67 @@
+import json
+import logging
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import chart_paths
+
+logger = logging.getLogger(__name__)
+
+# Decoded tables by file path, with the file's (mtime, size) when decoded
+_table_cache: Dict[str, Tuple[Tuple[int, int], Any]] = {}
+
+
+def save_table(path: Path, content: Dict[str, Any]) -> Path:
+    """Writes a derived table's JSON content to path, atomically."""
+    payload = json.dumps(content, ensure_ascii=False, separators=(",", ":"))
+    chart_paths.write_atomic(path, payload.encode("utf-8"))
+    return path
+
+
+def load_table(
+    path: Path,
+    chart_dir: Path,
+    aliases: str,
+    version: int,
+    kind: str,
+    decode: Callable[[Dict[str, Any]], Any],
+) -> Optional[Any]:
+    """
+    Loads a table derived from a chart (such as its streak or delta table)
+    from path, decoded with decode, or None if it has not been built, is of
+    another version than `version`, or no longer matches the chart's
+    fingerprint or the aliases digest. Decoded tables have `fingerprint` and
+    `aliases` attributes and are cached until the file changes, so a check
+    costs two stats. kind names the table in log messages.
+    """
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+
+    key = str(path)
+    stamp = (st.st_mtime_ns, st.st_size)
+    cached = _table_cache.get(key)
+    if cached and cached[0] == stamp:
+        table = cached[1]
+    else:
+        try:
+            with path.open("r", encoding="utf-8") as f:
+                content = json.load(f)
+        except (json.JSONDecodeError, IOError, OSError) as e:
+            logger.error(f"Error loading {kind} {path}: {e}")
+            return None
+        if content.get("version") != version:
+            logger.warning(f"Ignoring {kind} {path} with unsupported version")
+            return None
+        table = decode(content)
+        _table_cache[key] = (stamp, table)
+
+    try:
+        if table.fingerprint != chart_paths.chart_fingerprint(Path(chart_dir)):
+            return None
+    except OSError:
+        return None
+    if table.aliases != aliases:
+        return None
+    return table
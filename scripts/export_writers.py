@@ -0,0 +1,287 @@
+import csv
+import json
+import os
+import stat
+import sys
+import tempfile
+from pathlib import Path
+from typing import IO, Any, Dict, Iterable, List, Optional
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow is optional; only Parquet export needs it
+    pa = pq = None
+
+EXPORT_FORMATS = ("csv", "jsonl", "parquet")
+# --output value that streams the export to standard output
+STDOUT = "-"
+# Rows buffered per Parquet row group; the only records held in memory
+PARQUET_ROW_GROUP_SIZE = 10_000
+
+
+def flatten(record: Dict[str, Any], prefix: str = "") -> Dict[str, Any]:
+    """Flattens nested dicts into dotted keys: {"details": {"title": t}} -> {"details.title": t}."""
+    flat: Dict[str, Any] = {}
+    for key, value in record.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, f"{name}."))
+        else:
+            flat[name] = value
+    return flat
+
+
+def is_stream(path: str) -> bool:
+    """
+    True for STDOUT and for existing targets that are not regular files
+    (pipes, FIFOs, devices such as /dev/stdout), which are written directly.
+    """
+    if path == STDOUT:
+        return True
+    try:
+        return not stat.S_ISREG(os.stat(path).st_mode)
+    except OSError:
+        return False
+
+
+class RecordWriter:
+    """
+    Streams records to a file one at a time. Nested dicts are flattened and
+    columns are the given fields, or the keys of the first record. A regular
+    file is written to a temporary file renamed into place on a clean close,
+    so a failed export never leaves a partial file behind; standard output
+    (STDOUT) and other streams are written as records arrive (see
+    is_stream). Use as a context manager.
+    """
+
+    suffix = ""
+
+    def __init__(self, path: str, fields: Optional[List[str]] = None):
+        self.path = Path(path)
+        self.fields = list(fields) if fields else None
+        self.count = 0
+        self._tmp_name: Optional[str] = None
+        if not is_stream(path):
+            fd, self._tmp_name = tempfile.mkstemp(
+                dir=str(self.path.parent), prefix=f".{self.path.name}."
+            )
+            os.close(fd)
+
+    def _open(self, mode: str, **kwargs: Any) -> IO:
+        """Opens the output: the temporary file, the stream, or stdout's descriptor."""
+        if self._tmp_name is not None:
+            return open(self._tmp_name, mode, **kwargs)
+        if str(self.path) == STDOUT:
+            sys.stdout.flush()
+            return open(sys.stdout.fileno(), mode, closefd=False, **kwargs)
+        return open(self.path, mode, **kwargs)
+
+    def write(self, record: Dict[str, Any]) -> None:
+        row = flatten(record)
+        if self.fields is None:
+            self.fields = list(row)
+        self._write_row({field: row.get(field) for field in self.fields})
+        self.count += 1
+
+    def write_all(self, records: Iterable[Dict[str, Any]]) -> int:
+        for record in records:
+            self.write(record)
+        return self.count
+
+    def _write_row(self, row: Dict[str, Any]) -> None:
+        raise NotImplementedError
+
+    def _finish(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self._finish()
+        if self._tmp_name is not None:
+            os.chmod(self._tmp_name, 0o644)
+            os.replace(self._tmp_name, self.path)
+
+    def abort(self) -> None:
+        try:
+            self._finish()
+        finally:
+            if self._tmp_name is not None and os.path.exists(self._tmp_name):
+                os.unlink(self._tmp_name)
+
+    def __enter__(self) -> "RecordWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+class CsvRecordWriter(RecordWriter):
+    suffix = ".csv"
+
+    def __init__(self, path: str, fields: Optional[List[str]] = None):
+        super().__init__(path, fields)
+        self._file = self._open("w", encoding="utf-8", newline="")
+        self._writer: Optional[csv.DictWriter] = None
+
+    def _write_row(self, row: Dict[str, Any]) -> None:
+        if self._writer is None:
+            self._writer = csv.DictWriter(self._file, fieldnames=self.fields)
+            self._writer.writeheader()
+        self._writer.writerow(row)
+
+    def _finish(self) -> None:
+        if not self._file.closed:
+            if self._writer is None and self.fields:
+                csv.DictWriter(self._file, fieldnames=self.fields).writeheader()
+            self._file.close()
+
+
+class JsonlRecordWriter(RecordWriter):
+    suffix = ".jsonl"
+
+    def __init__(self, path: str, fields: Optional[List[str]] = None):
+        super().__init__(path, fields)
+        self._file = self._open("w", encoding="utf-8")
+
+    def _write_row(self, row: Dict[str, Any]) -> None:
+        self._file.write(json.dumps(row, ensure_ascii=False))
+        self._file.write("\n")
+
+    def _finish(self) -> None:
+        self._file.close()
+
+
+class ParquetRecordWriter(RecordWriter):
+    """
+    Writes Parquet in row groups of PARQUET_ROW_GROUP_SIZE rows. The schema
+    is inferred from the first row group; columns that are entirely null
+    there are stored as strings.
+    """
+
+    suffix = ".parquet"
+
+    def __init__(self, path: str, fields: Optional[List[str]] = None):
+        if pa is None:
+            raise ValueError("Parquet export requires pyarrow to be installed.")
+        super().__init__(path, fields)
+        self._rows: List[Dict[str, Any]] = []
+        self._schema = None
+        self._as_text: List[str] = []
+        self._writer = None
+        self._file = self._open("wb")
+
+    def _write_row(self, row: Dict[str, Any]) -> None:
+        self._rows.append(row)
+        if len(self._rows) >= PARQUET_ROW_GROUP_SIZE:
+            self._flush()
+
+    def _flush(self) -> None:
+        if not self._rows:
+            return
+        if self._schema is None:
+            inferred = pa.Table.from_pylist(self._rows).schema
+            self._as_text = [f.name for f in inferred if pa.types.is_null(f.type)]
+            self._schema = pa.schema(
+                [
+                    pa.field(f.name, pa.string()) if f.name in self._as_text else f
+                    for f in inferred
+                ]
+            )
+            self._writer = pq.ParquetWriter(self._file, self._schema)
+        for row in self._rows:
+            for name in self._as_text:
+                if row[name] is not None:
+                    row[name] = str(row[name])
+        self._writer.write_table(pa.Table.from_pylist(self._rows, schema=self._schema))
+        self._rows = []
+
+    def _finish(self) -> None:
+        if self._file.closed:
+            return
+        try:
+            self._flush()
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+            elif self.fields is not None and self._schema is None:
+                self._schema = pa.schema([pa.field(f, pa.string()) for f in self.fields])
+                pq.write_table(self._schema.empty_table(), self._file)
+        finally:
+            self._file.close()
+
+
+WRITERS = {
+    "csv": CsvRecordWriter,
+    "jsonl": JsonlRecordWriter,
+    "parquet": ParquetRecordWriter,
+}
+
+
+def available_formats() -> List[str]:
+    return [fmt for fmt in EXPORT_FORMATS if fmt != "parquet" or pa is not None]
+
+
+def open_writer(
+    path: str, fmt: Optional[str] = None, fields: Optional[List[str]] = None
+) -> RecordWriter:
+    """
+    Opens a writer for path, or for standard output when path is STDOUT;
+    the format defaults to the file suffix.
+    """
+    if fmt is None:
+        if path == STDOUT:
+            raise ValueError("An export format is required when writing to stdout.")
+        fmt = Path(path).suffix.lstrip(".").lower()
+    if fmt not in WRITERS:
+        raise ValueError(
+            f"Invalid export format '{fmt}'. Choose one of: {', '.join(EXPORT_FORMATS)}"
+        )
+    return WRITERS[fmt](path, fields)
+
+
+def export_records(
+    records: Iterable[Dict[str, Any]],
+    path: str,
+    fmt: Optional[str] = None,
+    fields: Optional[List[str]] = None,
+) -> int:
+    """
+    Streams records to path and returns how many were written. Writing to
+    stdout stops quietly when the reader goes away (e.g. piped into head).
+    """
+    writer = open_writer(path, fmt, fields)
+    try:
+        with writer:
+            return writer.write_all(records)
+    except BrokenPipeError:
+        if path != STDOUT:
+            raise
+        # Keep the interpreter's final flush of stdout from failing again
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return writer.count
+
+
+def report_export(count: int, path: str) -> None:
+    """Prints an export summary, to stderr when the records went to a stream."""
+    if is_stream(path):
+        target = "stdout" if path == STDOUT else path
+        print(f"Wrote {count} record(s) to {target}", file=sys.stderr)
+    else:
+        print(f"Wrote {count} record(s) to {path}")
+
+
+def add_export_arguments(parser: Any) -> None:
+    """Adds the shared --output and --format options to a CLI parser."""
+    parser.add_argument(
+        "--output",
+        help="Stream results to this file (or - for stdout) instead of printing them",
+    )
+    parser.add_argument(
+        "--format",
+        choices=EXPORT_FORMATS,
+        dest="export_format",
+        help="Export format (default: from the --output suffix)",
+    )
@@ -0,0 +1,147 @@
+import atexit
+import functools
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List
+
+# Counters collected while enabled, with their Prometheus help text
+COUNTERS = {
+    "files_globbed": "Week files listed by chart_utils lookups",
+    "files_opened": "Week JSON files opened by the readers",
+    "bytes_read": "Bytes read from week JSON files",
+    "entries_scanned": "Chart entries examined by data_handler lookups",
+    "cache_hits": "Week cache hits",
+    "cache_misses": "Week cache misses",
+    "stores_opened": "Compiled chart stores mapped from disk",
+}
+PROMETHEUS_PREFIX = "chart_explorer_"
+
+
+class Metrics:
+    """
+    In-process counters and timing spans. Collection is off by default:
+    instrumented code checks `enabled` first, so the disabled cost is one
+    attribute read per call. Counters and spans of worker processes are not
+    collected; threads share this object.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self._lock = threading.Lock()
+        self.counters: Dict[str, int] = {}
+        # span name -> [calls, total seconds, max seconds]
+        self.spans: Dict[str, List[float]] = {}
+
+    def incr(self, name: str, value: int = 1) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def observe(self, name: str, seconds: float) -> None:
+        with self._lock:
+            span = self.spans.get(name)
+            if span is None:
+                self.spans[name] = [1, seconds, seconds]
+            else:
+                span[0] += 1
+                span[1] += seconds
+                span[2] = max(span[2], seconds)
+
+    @contextmanager
+    def span(self, name: str) -> Iterator[None]:
+        """Times the enclosed block under name (nothing is timed when disabled)."""
+        if not self.enabled:
+            yield
+            return
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started)
+
+    def reset(self) -> None:
+        with self._lock:
+            self.counters.clear()
+            self.spans.clear()
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "counters": {name: self.counters.get(name, 0) for name in COUNTERS},
+                "spans": {
+                    name: {"calls": int(s[0]), "seconds": s[1], "max_seconds": s[2]}
+                    for name, s in sorted(self.spans.items())
+                },
+            }
+
+    def to_prometheus(self) -> str:
+        """Renders counters and spans in the Prometheus text exposition format."""
+        snap = self.snapshot()
+        lines = []
+        for name, value in snap["counters"].items():
+            metric = f"{PROMETHEUS_PREFIX}{name}_total"
+            lines.append(f"# HELP {metric} {COUNTERS[name]}")
+            lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{metric} {value}")
+        metric = f"{PROMETHEUS_PREFIX}span_seconds"
+        lines.append(f"# HELP {metric} Time spent in instrumented functions")
+        lines.append(f"# TYPE {metric} summary")
+        for name, span in snap["spans"].items():
+            lines.append(f'{metric}_sum{{span="{name}"}} {span["seconds"]:.6f}')
+            lines.append(f'{metric}_count{{span="{name}"}} {span["calls"]}')
+        return "\n".join(lines) + "\n"
+
+    def report(self) -> str:
+        """Human-readable profile: counters, then spans by total time."""
+        snap = self.snapshot()
+        lines = ["| Counter | Value |", "|---------|-------|"]
+        lines += [f"| {name} | {value} |" for name, value in snap["counters"].items()]
+        lines += ["", "| Span | Calls | Total | Max |", "|------|-------|-------|-----|"]
+        spans = sorted(snap["spans"].items(), key=lambda s: -s[1]["seconds"])
+        for name, span in spans:
+            lines.append(
+                f"| {name} | {span['calls']} | {span['seconds'] * 1000:.1f} ms | "
+                f"{span['max_seconds'] * 1000:.1f} ms |"
+            )
+        return "\n".join(lines)
+
+
+metrics = Metrics()
+
+
+def timed(name: str) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """Decorator recording a span for every call of the function."""
+
+    def decorate(func: Callable[..., Any]) -> Callable[..., Any]:
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if not metrics.enabled:
+                return func(*args, **kwargs)
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                metrics.observe(name, time.perf_counter() - started)
+
+        return wrapper
+
+    return decorate
+
+
+def add_profile_argument(parser: Any) -> None:
+    """Adds the shared --profile option to a CLI parser."""
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Collect timing spans and I/O counters and print them on exit",
+    )
+
+
+def profile_from_args(args: Any) -> None:
+    """Enables collection when --profile was given and reports it at exit (stderr)."""
+    if getattr(args, "profile", False):
+        metrics.enabled = True
+        atexit.register(lambda: print("\n" + metrics.report(), file=sys.stderr))
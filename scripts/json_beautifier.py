@@ -1,43 +1,57 @@
-import json
-from pathlib import Path
+from typing import Any, Dict, Optional
+
+import bulk_convert
+import instrumentation
 
 
 def beautify_json_folder(
-    input_folder: str, output_folder: str, indent_size: int = 4
-) -> None:
+    input_folder: str,
+    output_folder: str,
+    indent_size: int = 4,
+    output_format: str = "pretty",
+    executor: str = "processes",
+    workers: Optional[int] = None,
+    force: bool = False,
+) -> Dict[str, Any]:
     """
     Reads minified JSON files from input_folder and writes them with proper
-    indentation to output_folder.
+    indentation (or minified, or with a compiled store) to output_folder, in
+    parallel and skipping files whose output is already up to date.
+    See bulk_convert.convert_folder for the summary it returns.
     """
-    input_p = Path(input_folder)
-    output_p = Path(output_folder)
-
-    if not output_p.exists():
-        output_p.mkdir(parents=True, exist_ok=True)
-        print(f"Created destination directory: {output_p}")
-
-    for json_file in input_p.glob("*.json"):
-        try:
-            with json_file.open("r", encoding="utf-8") as f:
-                data = json.load(f)
-
-            output_path = output_p / json_file.name
-            with output_path.open("w", encoding="utf-8") as f:
-                json.dump(data, f, indent=indent_size, ensure_ascii=False)
-
-            print(f"Successfully beautified: {json_file.name}")
-
-        except json.JSONDecodeError:
-            print(f"Error: {json_file.name} is not a valid JSON file. Skipping.")
-        except Exception as e:
-            print(f"An unexpected error occurred with {json_file.name}: {e}")
+    return bulk_convert.convert_folder(
+        input_folder,
+        output_folder,
+        None,
+        output_format,
+        indent_size,
+        executor,
+        workers,
+        force,
+    )
 
 
 if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Reformat a folder of JSON files")
     # Update these paths for your environment
-    SOURCE_DIRECTORY = "../data/billboard/billboard-hot-100"
-    DESTINATION_DIRECTORY = "../data/billboard/billboard-hot"
+    parser.add_argument("--input_dir", default="../data/billboard/billboard-hot-100")
+    parser.add_argument("--output_dir", default="../data/billboard/billboard-hot")
+    parser.add_argument("--indent", type=int, default=4)
+    bulk_convert.add_bulk_arguments(parser)
+    instrumentation.add_profile_argument(parser)
+    args = parser.parse_args()
+    instrumentation.profile_from_args(args)
 
     print("Starting JSON beautification process...")
-    beautify_json_folder(SOURCE_DIRECTORY, DESTINATION_DIRECTORY)
+    beautify_json_folder(
+        args.input_dir,
+        args.output_dir,
+        args.indent,
+        args.output_format,
+        args.executor,
+        args.workers,
+        args.force,
+    )
     print("Process finished.")
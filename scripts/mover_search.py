@@ -0,0 +1,267 @@
+import bisect
+import heapq
+import logging
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, List, Dict, Optional, Tuple
+
+import chart_discovery
+import chart_deltas
+import chart_paths
+import chart_store
+import song_credits
+import time_engine
+import instrumentation
+
+logger = logging.getLogger(__name__)
+
+DIRECTIONS = ("up", "down")
+# Week delta fields holding [song, position] changes
+CHANGE_KINDS = {"debuts": 2, "reentries": 3, "exits": 4}
+
+# Delta tables computed in memory, kept for the most recently queried charts
+COMPUTED_CACHE_SIZE = 16
+
+_computed: "OrderedDict[str, Tuple[Any, chart_deltas.ChartDeltas]]" = OrderedDict()
+_computed_lock = threading.Lock()
+
+
+def _chart_deltas(
+    chart_p: Path, credits: song_credits.CreditTable
+) -> chart_deltas.ChartDeltas:
+    """
+    The saved delta table of a chart, or one computed in memory when it is
+    missing or stale, cached until the chart's fingerprint or the aliases change.
+    """
+    deltas = chart_deltas.load_deltas(chart_p, credits)
+    if deltas is not None:
+        return deltas
+
+    key = str(chart_p)
+    stamp = (chart_paths.chart_fingerprint(chart_p), credits.digest)
+    with _computed_lock:
+        cached = _computed.get(key)
+        if cached and cached[0] == stamp:
+            _computed.move_to_end(key)
+            return cached[1]
+
+    logger.warning(
+        f"Delta table missing or out of date for {chart_p.name}; computing it in memory."
+    )
+    songs, weeks = chart_deltas.compute_deltas(
+        chart_store.iter_chart_weeks(chart_p), credits
+    )
+    deltas = chart_deltas.ChartDeltas(stamp[0], songs, weeks, stamp[1])
+    with _computed_lock:
+        _computed[key] = (stamp, deltas)
+        _computed.move_to_end(key)
+        while len(_computed) > COMPUTED_CACHE_SIZE:
+            _computed.popitem(last=False)
+    return deltas
+
+
+def _window(
+    data_dir: str,
+    chart_info: Dict,
+    start_date: Optional[str],
+    end_date: Optional[str],
+) -> Optional[chart_deltas.ChartDeltas]:
+    """Validates the window and returns the chart's deltas, or None to skip it."""
+    time_engine.validate_window(start_date, end_date)
+    if not chart_discovery.overlaps_dates(chart_info, start_date, end_date):
+        return None
+    chart_p = Path(chart_info["data_dir"])
+    if not chart_p.exists():
+        logger.warning(
+            f"Chart folder not found: {chart_info['source']} / {chart_info['chart_name']}"
+        )
+        return None
+    return _chart_deltas(chart_p, song_credits.load_table(data_dir))
+
+
+def _weeks_between(
+    deltas: chart_deltas.ChartDeltas, start_date: Optional[str], end_date: Optional[str]
+) -> List[chart_deltas.WeekDelta]:
+    lo = bisect.bisect_left(deltas.stems, start_date) if start_date else 0
+    hi = bisect.bisect_right(deltas.stems, end_date) if end_date else len(deltas.stems)
+    return deltas.weeks[lo:hi]
+
+
+@instrumentation.timed("mover_search.get_biggest_moves")
+def get_biggest_moves(
+    data_dir: str,
+    chart_info: Dict,
+    direction: str = "up",
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    limit: Optional[int] = 10,
+) -> List[Dict]:
+    """
+    Returns the biggest single-week climbs ("up") or falls ("down") of a
+    chart within the optional date window, biggest first and, for equal
+    moves, earliest first. "change" is the number of places moved.
+    """
+    if direction not in DIRECTIONS:
+        raise ValueError(
+            f"Invalid direction '{direction}'. Choose one of: {', '.join(DIRECTIONS)}"
+        )
+    deltas = _window(data_dir, chart_info, start_date, end_date)
+    if deltas is None:
+        return []
+
+    sign = 1 if direction == "up" else -1
+    moves = (
+        (sign * (last_week - this_week), stem, sid, this_week, last_week)
+        for stem, week_moves, _, _, _ in _weeks_between(deltas, start_date, end_date)
+        for sid, this_week, last_week in week_moves
+        if sign * (last_week - this_week) > 0
+    )
+    # Both keep weeks in date order among equal changes
+    if limit:
+        ranked = heapq.nlargest(limit, moves, key=lambda m: m[0])
+    else:
+        ranked = sorted(moves, key=lambda m: m[0], reverse=True)
+    return [
+        {
+            "date": stem,
+            "artist": deltas.songs[sid][0],
+            "song": deltas.songs[sid][1],
+            "from": last_week,
+            "to": this_week,
+            "change": change,
+        }
+        for change, stem, sid, this_week, last_week in ranked
+    ]
+
+
+@instrumentation.timed("mover_search.get_week_changes")
+def get_week_changes(
+    data_dir: str,
+    chart_info: Dict,
+    kind: str = "debuts",
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    max_pos: Optional[int] = None,
+) -> List[Dict]:
+    """
+    Returns the debuts, re-entries or exits (see CHANGE_KINDS) of a chart
+    within the optional date window and at or above max_pos, in date order
+    and chart order. An exit's position is its last one before dropping out.
+    """
+    if kind not in CHANGE_KINDS:
+        raise ValueError(
+            f"Invalid kind '{kind}'. Choose one of: {', '.join(CHANGE_KINDS)}"
+        )
+    deltas = _window(data_dir, chart_info, start_date, end_date)
+    if deltas is None:
+        return []
+
+    field = CHANGE_KINDS[kind]
+    results = []
+    for week in _weeks_between(deltas, start_date, end_date):
+        changes = [
+            (position, sid)
+            for sid, position in week[field]
+            if max_pos is None or (position and position <= max_pos)
+        ]
+        changes.sort(key=lambda c: (c[0] is None, c[0] or 0))
+        results.extend(
+            {
+                "date": week[0],
+                "artist": deltas.songs[sid][0],
+                "song": deltas.songs[sid][1],
+                "position": position,
+            }
+            for position, sid in changes
+        )
+    return results
+
+
+@instrumentation.timed("mover_search.get_hot_shot_debuts")
+def get_hot_shot_debuts(
+    data_dir: str,
+    chart_info: Dict,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+) -> List[Dict]:
+    """Returns the highest debut of each week in the optional date window."""
+    results = []
+    last_date = None
+    for debut in get_week_changes(data_dir, chart_info, "debuts", start_date, end_date):
+        # Debuts come in chart order within a week, so the first one is the highest
+        if debut["date"] != last_date and debut["position"]:
+            results.append(debut)
+            last_date = debut["date"]
+    return results
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    logging.basicConfig(level=logging.INFO)
+
+    parser = argparse.ArgumentParser(
+        description="Biggest movers, debuts, re-entries and exits"
+    )
+    parser.add_argument(
+        "--data_dir", default=str(Path(__file__).parent.parent / "data")
+    )
+    parser.add_argument("--chart_num", type=int, default=1, help="Chart number from list")
+    parser.add_argument(
+        "--query",
+        choices=("climbers", "fallers", "hot-shot-debuts") + tuple(CHANGE_KINDS),
+        default="climbers",
+    )
+    parser.add_argument("--start_date")
+    parser.add_argument("--end_date")
+    parser.add_argument("--max_pos", type=int, help="Top position for debuts/re-entries/exits")
+    parser.add_argument("--limit", type=int, default=10)
+    instrumentation.add_profile_argument(parser)
+    args = parser.parse_args()
+    instrumentation.profile_from_args(args)
+
+    chart_infos = chart_discovery.discover_chart_folders(args.data_dir)
+    try:
+        selected_chart = chart_infos[args.chart_num - 1]
+    except IndexError:
+        print("Invalid chart number.")
+        sys.exit(1)
+
+    print(f"## {selected_chart['source']} / {selected_chart['chart_name']}\n")
+    if args.query in ("climbers", "fallers"):
+        moves = get_biggest_moves(
+            args.data_dir,
+            selected_chart,
+            "up" if args.query == "climbers" else "down",
+            args.start_date,
+            args.end_date,
+            args.limit,
+        )
+        print("| Places | Date | Artist | Song | From | To |")
+        print("|--------|------|--------|------|------|----|")
+        for m in moves:
+            print(
+                f"| {m['change']} | {m['date']} | {m['artist']} | {m['song']} | "
+                f"#{m['from']} | #{m['to']} |"
+            )
+    else:
+        if args.query == "hot-shot-debuts":
+            changes = get_hot_shot_debuts(
+                args.data_dir, selected_chart, args.start_date, args.end_date
+            )
+        else:
+            changes = get_week_changes(
+                args.data_dir,
+                selected_chart,
+                args.query,
+                args.start_date,
+                args.end_date,
+                args.max_pos,
+            )
+        print("| Date | Artist | Song | Position |")
+        print("|------|--------|------|----------|")
+        for c in changes[: args.limit] if args.limit else changes:
+            print(f"| {c['date']} | {c['artist']} | {c['song']} | #{c['position']} |")
+        print(f"\n{len(changes)} {args.query} found.")
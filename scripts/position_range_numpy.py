@@ -0,0 +1,106 @@
+import weakref
+from typing import Dict, List, Optional, Tuple
+
+import song_credits
+import store_format
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; callers fall back to the Python engine
+    np = None
+
+# Per store: (credit table, arrays mapping string ids to canonical artist and
+# title ids, -1 for blank text)
+_canonical_ids: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+
+def is_available() -> bool:
+    return np is not None
+
+
+def _string_canonical_ids(
+    store: store_format.ChartStore, credits: song_credits.CreditTable
+) -> Tuple["np.ndarray", "np.ndarray"]:
+    cached = _canonical_ids.get(store)
+    if cached is not None and cached[0] is credits:
+        return cached[1], cached[2]
+    strings = store.strings
+    ids = []
+    for column, to_id in ((store.artist, credits.artist_id), (store.song, credits.title_id)):
+        mapped = np.full(len(strings), -1, dtype=np.int64)
+        for i in np.unique(np.frombuffer(column, dtype=np.int32)).tolist():
+            if strings[i].strip():
+                mapped[i] = to_id(strings[i])
+        ids.append(mapped)
+    artist_ids, title_ids = ids
+    _canonical_ids[store] = (credits, artist_ids, title_ids)
+    return artist_ids, title_ids
+
+
+def songs_in_position_range(
+    store: store_format.ChartStore,
+    credits: song_credits.CreditTable,
+    start_date: str,
+    end_date: str,
+    min_pos: int,
+    max_pos: int,
+    include_peak_date: bool,
+) -> List[Dict]:
+    """
+    Vectorized equivalent of the position range aggregation over a compiled
+    store: rows are filtered with array masks, grouped by the credit table's
+    canonical (artist, song) ids with np.unique, and peaks, weeks at peak and first peak
+    dates come from group-wise minimum and bincount. Results are returned in
+    first-appearance order, like the Python engine, before its final sort.
+    """
+    weeks = store.weeks_in_range(start_date, end_date)
+    if not weeks:
+        return []
+
+    weeks = np.asarray(weeks)
+    offsets = np.frombuffer(store.week_offsets, dtype=np.int32)
+    starts = offsets[weeks]
+    lengths = offsets[weeks + 1] - starts
+    # Row numbers of the selected weeks in date order, and each row's week
+    flat_starts = np.cumsum(lengths) - lengths
+    rows = np.arange(lengths.sum()) + np.repeat(starts - flat_starts, lengths)
+    row_week = np.repeat(weeks, lengths)
+
+    pos = np.frombuffer(store.this_week, dtype=np.int32)[rows].astype(np.int64)
+    artist_ids, title_ids = _string_canonical_ids(store, credits)
+    artist = artist_ids[np.frombuffer(store.artist, dtype=np.int32)[rows]]
+    song = title_ids[np.frombuffer(store.song, dtype=np.int32)[rows]]
+
+    keep = (pos >= min_pos) & (pos <= max_pos) & (artist >= 0) & (song >= 0)
+    rows, row_week, pos = rows[keep], row_week[keep], pos[keep]
+    if not len(rows):
+        return []
+    keys = artist[keep] * (int(title_ids.max()) + 1) + song[keep]
+
+    _, first_index, group = np.unique(keys, return_index=True, return_inverse=True)
+    group = group.reshape(-1)
+    n_groups = len(first_index)
+
+    peak = np.full(n_groups, np.iinfo(np.int64).max, dtype=np.int64)
+    np.minimum.at(peak, group, pos)
+    at_peak = pos == peak[group]
+    weeks_at_peak = np.bincount(group[at_peak], minlength=n_groups)
+    # Index (in date order) of the first row at each group's peak
+    peak_index = np.full(n_groups, len(rows), dtype=np.int64)
+    np.minimum.at(peak_index, group[at_peak], np.flatnonzero(at_peak))
+
+    strings = store.strings
+    artist_col, song_col = store.artist, store.song
+    results = []
+    for g in np.argsort(first_index, kind="stable"):
+        first_row = int(rows[first_index[g]])
+        entry = {
+            "artist": strings[artist_col[first_row]].strip(),
+            "song": strings[song_col[first_row]].strip(),
+            "peak": int(peak[g]),
+            "weeks_at_peak": int(weeks_at_peak[g]),
+        }
+        if include_peak_date:
+            entry["peak_date"] = store.week_date(int(row_week[peak_index[g]]))
+        results.append(entry)
+    return results
@@ -0,0 +1,98 @@
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Iterator, List, Optional, Sequence, Tuple
+
+import chart_store
+
+EXECUTOR_MODES = ("serial", "threads", "processes")
+BATCHES_PER_WORKER = 4
+
+
+def resolve_workers(workers: Optional[int] = None) -> int:
+    """Returns the worker count to use, defaulting to the number of CPUs."""
+    return max(1, workers or os.cpu_count() or 1)
+
+
+def _check_mode(mode: str) -> None:
+    if mode not in EXECUTOR_MODES:
+        raise ValueError(
+            f"Invalid executor mode '{mode}'. Choose one of: {', '.join(EXECUTOR_MODES)}"
+        )
+
+
+def split_batches(
+    items: Sequence[Any], mode: str = "serial", workers: Optional[int] = None
+) -> List[List[Any]]:
+    """
+    Splits items into contiguous, order-preserving batches. Serial execution
+    gets a single batch; pools get a few batches per worker for load balance.
+    """
+    _check_mode(mode)
+    items = list(items)
+    if not items:
+        return []
+    if mode == "serial":
+        return [items]
+    n_batches = resolve_workers(workers) * BATCHES_PER_WORKER
+    size = max(1, math.ceil(len(items) / n_batches))
+    return [items[i : i + size] for i in range(0, len(items), size)]
+
+
+def plan_chart_batches(
+    chart_dir: Path,
+    list_files: Callable[[], List[Path]],
+    mode: str = "serial",
+    workers: Optional[int] = None,
+) -> List[Optional[List[Path]]]:
+    """
+    Plans the work units of one chart: [None] when the chart has a compiled
+    store (read as a whole), otherwise batches of the files from list_files.
+    """
+    if chart_store.has_store(chart_dir):
+        return [None]
+    return split_batches(list_files(), mode, workers)
+
+
+def iter_tasks(
+    func: Callable[..., Any],
+    tasks: Sequence[Tuple[Any, ...]],
+    mode: str = "serial",
+    workers: Optional[int] = None,
+) -> Iterator[Any]:
+    """
+    Like run_tasks, but yields each result, in task order, as soon as it and
+    all earlier ones are done, e.g. to report progress.
+    """
+    _check_mode(mode)
+    if mode == "serial" or len(tasks) <= 1:
+        for task in tasks:
+            yield func(*task)
+        return
+
+    pool_cls = ThreadPoolExecutor if mode == "threads" else ProcessPoolExecutor
+    with pool_cls(max_workers=min(resolve_workers(workers), len(tasks))) as pool:
+        yield from pool.map(func, *zip(*tasks))
+
+
+def run_tasks(
+    func: Callable[..., Any],
+    tasks: Sequence[Tuple[Any, ...]],
+    mode: str = "serial",
+    workers: Optional[int] = None,
+) -> List[Any]:
+    """
+    Calls func(*task) for every task and returns the results in task order,
+    whatever the execution mode. With "processes", func and its arguments
+    must be picklable (module-level functions and plain data).
+    """
+    return list(iter_tasks(func, tasks, mode, workers))
+
+
+def add_executor_arguments(parser: Any) -> None:
+    """Adds the shared --executor and --workers options to a CLI parser."""
+    parser.add_argument("--executor", choices=EXECUTOR_MODES, default="serial")
+    parser.add_argument(
+        "--workers", type=int, default=None, help="Worker count (default: CPU count)"
+    )
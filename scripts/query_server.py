@@ -0,0 +1,299 @@
+import json
+import logging
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Any, Tuple
+from urllib.parse import parse_qs, urlparse
+
+import anniversary_search
+import async_loader
+import artist_career_search
+import chart_discovery
+import chart_store
+import song_chart_history_search
+import song_index
+import song_search
+import store_format
+import streak_search
+import mover_search
+import crossover_search
+import songs_in_position_range_search
+import instrumentation
+
+logger = logging.getLogger(__name__)
+
+
+class ArchiveState:
+    """The charts and load statistics of one load of a WarmArchive."""
+
+    def __init__(self, chart_infos: List[Dict[str, str]], stats: Dict[str, Any]):
+        self.chart_infos = chart_infos
+        self.stats = stats
+
+    def find_chart(self, chart: str) -> Dict[str, str]:
+        """Resolves a chart by 1-based number or by (case-insensitive) name."""
+        if chart.isdigit():
+            i = int(chart) - 1
+            if 0 <= i < len(self.chart_infos):
+                return self.chart_infos[i]
+        for chart_info in self.chart_infos:
+            if chart_info["chart_name"].lower() == chart.lower():
+                return chart_info
+        raise ValueError(f"Unknown chart: {chart}")
+
+
+class WarmArchive:
+    """
+    Keeps every discovered chart and the song index resident in memory so
+    queries skip JSON parsing. Charts are compiled in memory from their JSON
+    files at load time, so a reload always reflects the current data. A
+    reload builds the new stores and index aside and swaps them in at once,
+    so requests served meanwhile keep using the previous load.
+    """
+
+    def __init__(self, data_dir: str):
+        self.data_dir = data_dir
+        self.state = ArchiveState([], {})
+        self.lock = threading.Lock()
+
+    def load(self) -> Dict[str, Any]:
+        """(Re)loads the archive and returns load statistics."""
+        with self.lock:
+            started = time.perf_counter()
+            chart_infos = []
+            for chart_info in chart_discovery.discover_chart_folders(self.data_dir):
+                if not Path(chart_info["data_dir"]).exists():
+                    logger.warning(
+                        f"Chart folder not found: {chart_info['source']} / {chart_info['chart_name']}"
+                    )
+                    continue
+                chart_infos.append(chart_info)
+            # Build from JSON so the warm copy always reflects current files;
+            # the async loader keeps many reads in flight across charts
+            stores = async_loader.map_charts(
+                [Path(c["data_dir"]) for c in chart_infos],
+                lambda _, weeks: store_format.ChartStore(store_format.encode_weeks(weeks)),
+            )
+            # Indexed from the new stores, not the ones still pinned
+            index = song_index.build_index(
+                self.data_dir,
+                {c["data_dir"]: store for c, store in zip(chart_infos, stores)},
+            )
+            index.trusted = True
+
+            files: Dict[Path, Any] = {
+                chart_store.store_path(Path(c["data_dir"])): store
+                for c, store in zip(chart_infos, stores)
+            }
+            files[song_index.index_path(self.data_dir)] = index
+            stats = {
+                "charts": len(chart_infos),
+                "weeks": sum(store.num_weeks for store in stores),
+                "songs": len(index.songs),
+                "load_seconds": round(time.perf_counter() - started, 3),
+            }
+            chart_store.pin_files(files)
+            self.state = ArchiveState(chart_infos, stats)
+            logger.info(f"Archive loaded: {stats}")
+            return stats
+
+
+def _param(params: Dict[str, List[str]], name: str, default: Any = None) -> Any:
+    values = params.get(name)
+    if not values:
+        if default is None:
+            raise ValueError(f"Missing parameter: {name}")
+        return default
+    return values[0]
+
+
+def _int_param(params: Dict[str, List[str]], name: str, default: int) -> int:
+    try:
+        return int(_param(params, name, str(default)))
+    except ValueError:
+        raise ValueError(f"Parameter {name} must be an integer")
+
+
+def handle_query(
+    archive: WarmArchive, path: str, params: Dict[str, List[str]]
+) -> Tuple[int, Any]:
+    """
+    Dispatches a GET request to a query. Returns (status, body): a JSON
+    value, or text for /metrics.
+    """
+    data_dir = archive.data_dir
+    # Read once, so a reload during the request does not mix two loads
+    state = archive.state
+    if path == "/health":
+        return 200, {"status": "ok", **state.stats}
+    if path == "/metrics":
+        return 200, instrumentation.metrics.to_prometheus()
+    if path == "/charts":
+        return 200, [
+            {
+                "number": i,
+                "source": c["source"],
+                "chart": c["chart_name"],
+                "start_date": c.get("start_date"),
+                "end_date": c.get("end_date"),
+            }
+            for i, c in enumerate(state.chart_infos, 1)
+        ]
+    if path == "/anniversary":
+        return 200, anniversary_search.run_anniversary_search(
+            data_dir, _param(params, "date"), _int_param(params, "rank", 1)
+        )
+    if path == "/anniversary-batch":
+        if params.get("month"):
+            dates = anniversary_search.month_dates(_param(params, "month"))
+        else:
+            dates = [d for d in _param(params, "dates").split(",") if d]
+        min_rank = _int_param(params, "min_rank", 1)
+        return 200, anniversary_search.run_anniversary_batch(
+            data_dir, dates, min_rank, _int_param(params, "max_rank", min_rank)
+        )
+    if path == "/song-history":
+        return 200, song_chart_history_search.get_song_chart_history(
+            data_dir, _param(params, "artist"), _param(params, "song")
+        )
+    if path == "/search":
+        search = (
+            song_search.search_artists
+            if _param(params, "type", "songs") == "artists"
+            else song_search.search_songs
+        )
+        return 200, search(data_dir, _param(params, "q"), _int_param(params, "limit", 10))
+    if path == "/artist-career":
+        return 200, artist_career_search.get_artist_career(
+            data_dir,
+            _param(params, "artist"),
+            _param(params, "include_collaborations", "0").lower()
+            in ("1", "true", "yes"),
+        )
+    if path == "/position-range":
+        return 200, songs_in_position_range_search.get_songs_in_position_range(
+            data_dir,
+            state.find_chart(_param(params, "chart")),
+            _param(params, "start_date"),
+            _param(params, "end_date"),
+            _int_param(params, "min_pos", 1),
+            _int_param(params, "max_pos", 10),
+            _param(params, "include_peak_date", "0").lower() in ("1", "true", "yes"),
+        )
+    if path == "/longest-runs":
+        return 200, streak_search.get_longest_runs(
+            data_dir,
+            state.find_chart(_param(params, "chart")),
+            _int_param(params, "threshold", 1),
+            params.get("start_date", [None])[0],
+            params.get("end_date", [None])[0],
+            _int_param(params, "limit", 10),
+        )
+    if path == "/movers":
+        return 200, mover_search.get_biggest_moves(
+            data_dir,
+            state.find_chart(_param(params, "chart")),
+            _param(params, "direction", "up"),
+            params.get("start_date", [None])[0],
+            params.get("end_date", [None])[0],
+            _int_param(params, "limit", 10),
+        )
+    if path == "/week-changes":
+        max_pos = params.get("max_pos", [None])[0]
+        return 200, mover_search.get_week_changes(
+            data_dir,
+            state.find_chart(_param(params, "chart")),
+            _param(params, "kind", "debuts"),
+            params.get("start_date", [None])[0],
+            params.get("end_date", [None])[0],
+            _int_param(params, "max_pos", 0) if max_pos is not None else None,
+        )
+    if path == "/crossover":
+        max_pos = params.get("max_pos", [None])[0]
+        return 200, crossover_search.get_crossovers(
+            data_dir,
+            [state.find_chart(c) for c in _param(params, "charts").split(",") if c],
+            params.get("start_date", [None])[0],
+            params.get("end_date", [None])[0],
+            _int_param(params, "min_pos", 1),
+            _int_param(params, "max_pos", 0) if max_pos is not None else None,
+            _int_param(params, "limit", 0) or None,
+        )
+    return 404, {"error": f"Unknown endpoint: {path}"}
+
+
+def make_handler(archive: WarmArchive):
+    class QueryHandler(BaseHTTPRequestHandler):
+        def _send(self, status: int, body: Any) -> None:
+            if isinstance(body, str):
+                payload = body.encode("utf-8")
+                content_type = "text/plain; version=0.0.4; charset=utf-8"
+            else:
+                payload = json.dumps(body, ensure_ascii=False).encode("utf-8")
+                content_type = "application/json; charset=utf-8"
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_GET(self) -> None:
+            url = urlparse(self.path)
+            try:
+                with instrumentation.metrics.span("query_server.request"):
+                    status, body = handle_query(archive, url.path, parse_qs(url.query))
+            except ValueError as e:
+                status, body = 400, {"error": str(e)}
+            except Exception:
+                logger.exception(f"Error serving {self.path}")
+                status, body = 500, {"error": "Internal server error"}
+            self._send(status, body)
+
+        def do_POST(self) -> None:
+            if urlparse(self.path).path != "/reload":
+                self._send(404, {"error": f"Unknown endpoint: {self.path}"})
+                return
+            try:
+                status, body = 200, archive.load()
+            except Exception:
+                logger.exception("Error reloading the archive")
+                status, body = 500, {"error": "Internal server error"}
+            self._send(status, body)
+
+        def log_message(self, format: str, *args: Any) -> None:
+            logger.debug(format % args)
+
+    return QueryHandler
+
+
+def serve(data_dir: str, host: str = "127.0.0.1", port: int = 8765) -> None:
+    archive = WarmArchive(data_dir)
+    archive.load()
+    server = ThreadingHTTPServer((host, port), make_handler(archive))
+    logger.info(f"Serving chart queries on http://{host}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    logging.basicConfig(level=logging.INFO)
+
+    parser = argparse.ArgumentParser(description="Resident chart query server")
+    parser.add_argument(
+        "--data_dir", default=str(Path(__file__).parent.parent / "data")
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    instrumentation.add_profile_argument(parser)
+    args = parser.parse_args()
+    instrumentation.profile_from_args(args)
+
+    serve(args.data_dir, args.host, args.port)
@@ -0,0 +1,80 @@
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import chart_utils
+import data_handler
+import instrumentation
+
+
+def _time_over_files(files: List[Path], lookup: Callable[[str], object]) -> float:
+    started = time.perf_counter()
+    for json_file in files:
+        lookup(str(json_file))
+    return time.perf_counter() - started
+
+
+def benchmark_readers(
+    chart_dir: Path, repeat: int = 3
+) -> Dict[str, Dict[str, float]]:
+    """
+    Times extract_hit and search_song_in_file with every reader over all week
+    files of a chart folder, with the week cache off. Returns {lookup:
+    {reader: best seconds}}.
+    """
+    files = chart_utils.get_all_files(chart_dir)
+    lookups: Dict[str, Callable[[str, str], object]] = {
+        f"extract_hit #{rank}": (
+            lambda path, r, rank=rank: data_handler.extract_hit(path, rank, reader=r)
+        )
+        for rank in (1, 10, 100)
+    }
+    lookups["search_song (absent)"] = lambda path, r: data_handler.search_song_in_file(
+        path, "No Such Artist", "No Such Song", reader=r
+    )
+
+    results: Dict[str, Dict[str, float]] = {}
+    # The week cache would turn every timed read into a cache hit, hiding the
+    # readers being compared, so it is off (and emptied) while they run
+    cache_bytes = data_handler.week_cache.max_bytes
+    data_handler.week_cache.resize(0)
+    try:
+        for name, lookup in lookups.items():
+            results[name] = {}
+            for reader in data_handler.READERS:
+                results[name][reader] = min(
+                    _time_over_files(files, lambda path: lookup(path, reader))
+                    for _ in range(repeat)
+                )
+    finally:
+        data_handler.week_cache.resize(cache_bytes)
+    return results
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Compare data_handler readers")
+    parser.add_argument(
+        "--chart_dir",
+        default=str(
+            Path(__file__).parent.parent / "data" / "billboard" / "billboard-hot100"
+        ),
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    instrumentation.add_profile_argument(parser)
+    args = parser.parse_args()
+    instrumentation.profile_from_args(args)
+
+    chart_p = Path(args.chart_dir)
+    timings = benchmark_readers(chart_p, args.repeat)
+
+    print(f"Files: {len(chart_utils.get_all_files(chart_p))} in {chart_p}\n")
+    print("| Lookup | " + " | ".join(data_handler.READERS) + " | Speed-up |")
+    print("|--------|" + "------|" * len(data_handler.READERS) + "----------|")
+    for name, by_reader in timings.items():
+        cells = " | ".join(
+            f"{by_reader[r] * 1000:.0f} ms" for r in data_handler.READERS
+        )
+        speedup = by_reader["json"] / by_reader["streaming"]
+        print(f"| {name} | {cells} | {speedup:.2f}x |")
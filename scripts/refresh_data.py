@@ -0,0 +1,159 @@
+import logging
+import time
+from pathlib import Path
+from typing import Dict, List, Any
+
+import chart_discovery
+import chart_paths
+import chart_store
+import chart_streaks
+import chart_deltas
+import data_manifest
+import song_credits
+import song_index
+import instrumentation
+
+logger = logging.getLogger(__name__)
+
+
+def refresh_derived_data(data_dir: str) -> Dict[str, Any]:
+    """
+    Compares every discovered chart folder with the saved manifest and
+    re-ingests only the added, changed or deleted weeks into the compiled
+    stores and the song index that already exist. Song keys depend on the
+    alias file, so editing it rebuilds the index and song tables.
+
+    Returns a summary with per-chart changes and the elapsed time in seconds.
+    """
+    started = time.perf_counter()
+    old_manifest = data_manifest.load_manifest(data_dir)
+    old_aliases = data_manifest.load_manifest_aliases(data_dir)
+    old_fingerprints = data_manifest.load_manifest_fingerprints(data_dir)
+    new_manifest: Dict[str, data_manifest.ChartManifest] = {}
+    fingerprints: Dict[str, List[int]] = {}
+    index = song_index.load_index(data_dir)
+    credits = song_credits.load_table(data_dir)
+    aliases = credits.digest
+    rebuild_index = index is not None and index.aliases != aliases
+    index_dirty = False
+    charts: List[Dict[str, Any]] = []
+
+    for chart_info in chart_discovery.discover_chart_folders(data_dir):
+        chart_p = Path(chart_info["data_dir"])
+        if not chart_p.exists():
+            logger.warning(
+                f"Chart folder not found: {chart_info['source']} / {chart_info['chart_name']}"
+            )
+            continue
+
+        key = song_index.chart_key(data_dir, chart_info)
+        has_baseline = key in old_manifest
+        # Taken before scanning, so a change made meanwhile is seen next time
+        fingerprint = fingerprints[key] = chart_paths.chart_fingerprint(chart_p)
+        previous = old_manifest.get(key, {})
+        current = data_manifest.scan_chart(chart_p, previous)
+        new_manifest[key] = current
+        changes = data_manifest.diff_manifests(previous, current)
+        charts.append(
+            {"source": chart_info["source"], "chart": chart_info["chart_name"], **changes}
+        )
+
+        dirty = changes["added"] + changes["changed"]
+        removed = set(changes["changed"] + changes["deleted"])
+        weeks = []
+        for stem in dirty:
+            entries = chart_store.read_week_file(chart_p / f"{stem}.json")
+            if entries is not None:
+                weeks.append((stem, entries))
+
+        store = chart_store.open_store(chart_p, check_fingerprint=False)
+        if store is not None:
+            if not has_baseline:
+                chart_store.compile_chart(chart_p)
+            elif dirty or removed or not chart_store.is_current(store, chart_p):
+                # Also re-stamps a store whose folder changed without content changes
+                chart_store.patch_chart(chart_p, weeks, removed)
+
+        # Streak and delta tables depend on week order and song identity, so they
+        # are recomputed (from the refreshed store when there is one) for a changed
+        # chart or after the aliases changed. A new fingerprint alone also makes
+        # them stale to readers, so they are rebuilt to carry it.
+        stale = (
+            not has_baseline
+            or dirty
+            or removed
+            or old_aliases != aliases
+            or old_fingerprints.get(key) != fingerprint
+        )
+        if chart_streaks.streaks_path(chart_p).exists():
+            if stale:
+                chart_streaks.save_streaks(
+                    chart_p, chart_streaks.build_streaks(chart_p, credits)
+                )
+        if chart_deltas.deltas_path(chart_p).exists():
+            if stale:
+                chart_deltas.save_deltas(
+                    chart_p, chart_deltas.build_deltas(chart_p, credits)
+                )
+
+        if index is not None and not rebuild_index:
+            if not has_baseline or key not in index.charts:
+                index.drop_weeks(key)
+                index.add_weeks(key, weeks)
+                index_dirty = True
+            elif dirty or removed:
+                index.drop_weeks(key, removed)
+                index.add_weeks(key, weeks)
+                index_dirty = True
+            meta = index.charts.get(key)
+            if meta is None or meta["fingerprint"] != fingerprint:
+                index.charts[key] = {
+                    "source": chart_info["source"],
+                    "chart_name": chart_info["chart_name"],
+                    "fingerprint": fingerprint,
+                }
+                index_dirty = True
+
+    if rebuild_index:
+        logger.info("Aliases changed; rebuilding the song index.")
+        song_index.save_index(data_dir, song_index.build_index(data_dir))
+    elif index_dirty:
+        song_index.save_index(data_dir, index)
+    data_manifest.save_manifest(data_dir, new_manifest, aliases, fingerprints)
+
+    return {"charts": charts, "elapsed": time.perf_counter() - started}
+
+
+if __name__ == "__main__":
+    import argparse
+
+    logging.basicConfig(level=logging.INFO)
+
+    parser = argparse.ArgumentParser(
+        description="Refresh compiled stores and indexes after data changes"
+    )
+    parser.add_argument(
+        "--data_dir", default=str(Path(__file__).parent.parent / "data")
+    )
+    parser.add_argument(
+        "--verbose", action="store_true", help="List every changed week"
+    )
+    instrumentation.add_profile_argument(parser)
+    args = parser.parse_args()
+    instrumentation.profile_from_args(args)
+
+    summary = refresh_derived_data(args.data_dir)
+
+    print("| Source / Chart | Added | Changed | Deleted |")
+    print("|----------------|-------|---------|---------|")
+    for c in summary["charts"]:
+        print(
+            f"| {c['source']} / {c['chart']} | {len(c['added'])} | "
+            f"{len(c['changed'])} | {len(c['deleted'])} |"
+        )
+    if args.verbose:
+        for c in summary["charts"]:
+            for label, sign in (("added", "+"), ("changed", "~"), ("deleted", "-")):
+                for stem in c[label]:
+                    print(f"{sign} {c['source']} / {c['chart']} / {stem}")
+    print(f"\nRefresh finished in {summary['elapsed']:.2f}s")
@@ -1,46 +1,195 @@
 import logging
 from pathlib import Path
-from typing import List, Dict
+from typing import List, Dict, Iterator, Tuple, Optional
 
 import chart_discovery
 import data_handler
 import chart_utils
+import chart_store
+import song_credits
+import song_index
+import song_search
+import query_executor
+import export_writers
+import instrumentation
 
 logger = logging.getLogger(__name__)
 
 
-def get_song_chart_history(data_dir: str, artist: str, song: str) -> List[Dict]:
+def _find_song_entries(
+    chart_dir: Path,
+    artist: str,
+    song: str,
+    credits: song_credits.CreditTable,
+    files: Optional[List[Path]] = None,
+) -> List[Tuple[str, Dict]]:
     """
-    Returns chart history for a specific song across all discovered charts.
+    Returns (week stem, entry) pairs for every week the song, as identified
+    by the credit table, appears in.
+    Reads the given files, or the whole chart when files is None: from the
+    compiled store when available and from JSON otherwise.
+    """
+    store = chart_store.open_store(chart_dir) if files is None else None
+    if store is not None:
+        artist_ids = store.string_ids_matching(credits.artist_id(artist), credits.artist_id)
+        song_ids = store.string_ids_matching(credits.title_id(song), credits.title_id)
+        return [
+            (store.stems[week], store.entry(row))
+            for week, row in store.find_song_rows(artist_ids, song_ids)
+        ]
+
+    if files is None:
+        files = chart_utils.get_all_files(chart_dir)
+    found = []
+    for json_file in files:
+        entry = data_handler.search_song_in_file(
+            str(json_file), artist, song, credits=credits
+        )
+        if entry:
+            found.append((json_file.stem, entry))
+    return found
+
+
+def _scan_song_history(
+    chart_infos: List[Dict],
+    artist: str,
+    song: str,
+    credits: song_credits.CreditTable,
+    executor: str = "serial",
+    workers: Optional[int] = None,
+) -> List[List[Tuple[str, Dict]]]:
+    """
+    Scans every chart for the song with the given executor mode.
+    Returns one list of (week stem, entry) pairs per chart, in chart order.
+    """
+    task_charts = []
+    tasks = []
+    for i, chart_info in enumerate(chart_infos):
+        chart_p = Path(chart_info["data_dir"])
+        batches = query_executor.plan_chart_batches(
+            chart_p, lambda: chart_utils.get_all_files(chart_p), executor, workers
+        )
+        for files in batches:
+            task_charts.append(i)
+            tasks.append((chart_p, artist, song, credits, files))
+
+    per_chart: List[List[Tuple[str, Dict]]] = [[] for _ in chart_infos]
+    task_found = query_executor.run_tasks(_find_song_entries, tasks, executor, workers)
+    for i, found in zip(task_charts, task_found):
+        per_chart[i].extend(found)
+    return per_chart
+
+
+def iter_song_chart_history(data_dir: str, artist: str, song: str) -> Iterator[Dict]:
+    """
+    Generator variant of get_song_chart_history: yields one flat record per
+    charted week (source, chart, date, position, weeks_on_chart), chart by
+    chart, reading one week file at a time when there is no current index.
     """
     if not artist.strip() or not song.strip():
         raise ValueError("Both artist and song title are required.")
 
-    results = []
-    chart_infos = chart_discovery.discover_chart_folders(data_dir)
+    chart_infos = []
+    for chart_info in chart_discovery.discover_chart_folders(data_dir):
+        if not Path(chart_info["data_dir"]).exists():
+            logger.warning(
+                f"Chart folder not found: {chart_info['source']} / {chart_info['chart_name']}"
+            )
+            continue
+        chart_infos.append(chart_info)
+
+    index = song_index.load_index(data_dir)
+    if index is not None and not index.is_current(data_dir, chart_infos):
+        logger.warning("Song index is out of date; scanning chart files instead.")
+        index = None
+    postings = index.lookup(artist, song) if index is not None else None
+    credits = song_credits.load_table(data_dir)
 
     for chart_info in chart_infos:
+        chart = {"source": chart_info["source"], "chart": chart_info["chart_name"]}
+        if postings is not None:
+            for date_str, position, weeks in postings.get(
+                song_index.chart_key(data_dir, chart_info), []
+            ):
+                yield {**chart, "date": date_str, "position": position, "weeks_on_chart": weeks}
+            continue
+
         chart_p = Path(chart_info["data_dir"])
-        if not chart_p.exists():
+        if chart_store.has_store(chart_p):
+            units: List[Optional[List[Path]]] = [None]
+        else:
+            units = [[f] for f in chart_utils.get_all_files(chart_p)]
+        for files in units:
+            for date_str, entry in _find_song_entries(
+                chart_p, artist, song, credits, files
+            ):
+                yield {
+                    **chart,
+                    "date": date_str,
+                    "position": entry.get("this_week"),
+                    "weeks_on_chart": entry.get("weeks_on_chart", 0),
+                }
+
+
+@instrumentation.timed("song_chart_history_search.get_song_chart_history")
+def get_song_chart_history(
+    data_dir: str,
+    artist: str,
+    song: str,
+    executor: str = "serial",
+    workers: Optional[int] = None,
+) -> List[Dict]:
+    """
+    Returns chart history for a specific song across all discovered charts.
+    Without a current song index, charts and file batches are scanned with
+    the given executor mode.
+    """
+    if not artist.strip() or not song.strip():
+        raise ValueError("Both artist and song title are required.")
+
+    results = []
+    chart_infos = []
+    for chart_info in chart_discovery.discover_chart_folders(data_dir):
+        if not Path(chart_info["data_dir"]).exists():
             logger.warning(
                 f"Chart folder not found: {chart_info['source']} / {chart_info['chart_name']}"
             )
             continue
+        chart_infos.append(chart_info)
+
+    index = song_index.load_index(data_dir)
+    if index is not None and not index.is_current(data_dir, chart_infos):
+        logger.warning("Song index is out of date; scanning chart files instead.")
+        index = None
 
-        history = []
-        json_files = chart_utils.get_all_files(chart_p)
-
-        for json_file in json_files:
-            entry = data_handler.search_song_in_file(str(json_file), artist, song)
-            if entry:
-                history.append(
-                    {
-                        "date": json_file.stem,
-                        "position": entry.get("this_week"),
-                        "weeks_on_chart": entry.get("weeks_on_chart", 0),
-                    }
+    if index is not None:
+        postings = index.lookup(artist, song)
+        histories = [
+            [
+                {"date": date_str, "position": position, "weeks_on_chart": weeks}
+                for date_str, position, weeks in postings.get(
+                    song_index.chart_key(data_dir, chart_info), []
                 )
+            ]
+            for chart_info in chart_infos
+        ]
+    else:
+        credits = song_credits.load_table(data_dir)
+        histories = [
+            [
+                {
+                    "date": date_str,
+                    "position": entry.get("this_week"),
+                    "weeks_on_chart": entry.get("weeks_on_chart", 0),
+                }
+                for date_str, entry in found
+            ]
+            for found in _scan_song_history(
+                chart_infos, artist, song, credits, executor, workers
+            )
+        ]
 
+    for chart_info, history in zip(chart_infos, histories):
         if history:
             peak = min(h["position"] for h in history)
             total_weeks = max(h["weeks_on_chart"] for h in history)
@@ -60,6 +209,7 @@ def get_song_chart_history(data_dir: str, artist: str, song: str) -> List[Dict]:
 
 if __name__ == "__main__":
     import argparse
+    import sys
 
     logging.basicConfig(level=logging.INFO)
 
@@ -69,12 +219,35 @@ if __name__ == "__main__":
     )
     parser.add_argument("--artist", default="Olivia Newton-John")
     parser.add_argument("--song", default="Physical")
+    query_executor.add_executor_arguments(parser)
+    export_writers.add_export_arguments(parser)
+    instrumentation.add_profile_argument(parser)
     args = parser.parse_args()
+    instrumentation.profile_from_args(args)
 
-    history_results = get_song_chart_history(args.data_dir, args.artist, args.song)
+    if args.output:
+        count = export_writers.export_records(
+            iter_song_chart_history(args.data_dir, args.artist, args.song),
+            args.output,
+            args.export_format,
+            ["source", "chart", "date", "position", "weeks_on_chart"],
+        )
+        export_writers.report_export(count, args.output)
+        sys.exit(0)
+
+    history_results = get_song_chart_history(
+        args.data_dir, args.artist, args.song, args.executor, args.workers
+    )
 
     if not history_results:
         print("The song was not found in any available charts.")
+        suggestions = song_search.search_songs(
+            args.data_dir, f"{args.artist} {args.song}", 5
+        )
+        if suggestions:
+            print("\nDid you mean:")
+            for s in suggestions:
+                print(f"  --artist \"{s['artist']}\" --song \"{s['song']}\"")
     else:
         for res in history_results:
             print(f"## {res['source']} / {res['chart']}\n")
@@ -0,0 +1,186 @@
+import hashlib
+import json
+import logging
+import re
+import threading
+import unicodedata
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+ALIASES_FILENAME = "aliases.json"
+KEY_SEPARATOR = "\x1f"
+
+_AMPERSAND = re.compile(r"\s*&\s*")
+# "Feat.", "Feat", "Ft." and "Featuring" credits all read "featuring"
+_FEATURING = re.compile(r"(?<!\w)(?:featuring|feat\.?|ft\.)(?=\s)")
+_QUOTES = str.maketrans({"‘": "'", "’": "'", "“": '"', "”": '"'})
+
+_tables: Dict[str, Tuple[Tuple[int, int], "CreditTable"]] = {}
+# Tables unpickled in worker processes, one per alias file digest
+_restored: Dict[str, "CreditTable"] = {}
+
+
+def _fold(text: Any) -> str:
+    if not isinstance(text, str):
+        return ""
+    decomposed = unicodedata.normalize("NFKD", text.translate(_QUOTES))
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return _AMPERSAND.sub(" and ", stripped.lower())
+
+
+def canonical_artist(text: Any) -> str:
+    """
+    Rule-based canonical form of an artist credit: lowercased, accents
+    removed ("Rocío" -> "rocio"), "&" read as "and", featured credits
+    spelled "featuring", and whitespace collapsed.
+    """
+    return " ".join(_FEATURING.sub("featuring", _fold(text)).split())
+
+
+def canonical_title(text: Any) -> str:
+    """Like canonical_artist for song titles, without the featured-credit rule."""
+    return " ".join(_fold(text).split())
+
+
+class CreditTable:
+    """
+    Interns canonical artist credits, titles and (artist, title) songs as
+    integer ids. The user's alias file maps further raw credits and titles
+    onto canonical ones. Each distinct raw string is canonicalized once;
+    after that an id costs a dict lookup, so hot loops compare ints.
+
+    Ids are only meaningful within one process. A table sent to a worker
+    process travels as its aliases and is rebuilt there once per digest.
+    """
+
+    def __init__(
+        self,
+        artist_aliases: Optional[Dict[str, str]] = None,
+        title_aliases: Optional[Dict[str, str]] = None,
+        digest: str = "",
+    ):
+        self.artist_aliases = {
+            canonical_artist(raw): canonical_artist(to)
+            for raw, to in (artist_aliases or {}).items()
+        }
+        self.title_aliases = {
+            canonical_title(raw): canonical_title(to)
+            for raw, to in (title_aliases or {}).items()
+        }
+        # Identifies the alias file the ids were built with ("" without one)
+        self.digest = digest
+        self.artists: List[str] = []
+        self.titles: List[str] = []
+        self.songs: List[Tuple[int, int]] = []
+        self._song_keys: List[str] = []
+        self._artist_ids: Dict[str, int] = {}
+        self._title_ids: Dict[str, int] = {}
+        self._song_ids: Dict[Tuple[int, int], int] = {}
+        self._raw_artists: Dict[Any, int] = {}
+        self._raw_titles: Dict[Any, int] = {}
+        self._raw_songs: Dict[Tuple[Any, Any], int] = {}
+        self._lock = threading.Lock()
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        return (_restore, (self.artist_aliases, self.title_aliases, self.digest))
+
+    def _intern(self, ids: Dict[Any, int], values: List[Any], value: Any) -> int:
+        i = ids.get(value)
+        if i is None:
+            i = ids[value] = len(values)
+            values.append(value)
+        return i
+
+    def artist_id(self, raw: Any) -> int:
+        i = self._raw_artists.get(raw)
+        if i is None:
+            key = canonical_artist(raw)
+            key = self.artist_aliases.get(key, key)
+            with self._lock:
+                i = self._raw_artists[raw] = self._intern(self._artist_ids, self.artists, key)
+        return i
+
+    def title_id(self, raw: Any) -> int:
+        i = self._raw_titles.get(raw)
+        if i is None:
+            key = canonical_title(raw)
+            key = self.title_aliases.get(key, key)
+            with self._lock:
+                i = self._raw_titles[raw] = self._intern(self._title_ids, self.titles, key)
+        return i
+
+    def song_id(self, artist: Any, song: Any) -> int:
+        """The id of the song a raw (artist, title) pair is credited as."""
+        i = self._raw_songs.get((artist, song))
+        if i is None:
+            pair = (self.artist_id(artist), self.title_id(song))
+            with self._lock:
+                i = self._song_ids.get(pair)
+                if i is None:
+                    i = self._song_ids[pair] = len(self.songs)
+                    self.songs.append(pair)
+                    self._song_keys.append(
+                        self.artists[pair[0]] + KEY_SEPARATOR + self.titles[pair[1]]
+                    )
+                self._raw_songs[(artist, song)] = i
+        return i
+
+    def artist_key(self, raw: Any) -> str:
+        """The canonical credit of a raw artist string."""
+        return self.artists[self.artist_id(raw)]
+
+    def key_of(self, song_id: int) -> str:
+        """The persistent key of a song id: canonical artist and title."""
+        return self._song_keys[song_id]
+
+    def song_key(self, artist: Any, song: Any) -> str:
+        return self._song_keys[self.song_id(artist, song)]
+
+
+def aliases_path(data_dir: str) -> Path:
+    return Path(data_dir) / ALIASES_FILENAME
+
+
+def load_table(data_dir: str) -> CreditTable:
+    """
+    The credit table of a data directory, with the aliases of its
+    aliases.json when there is one. Cached until the alias file changes.
+    """
+    path = aliases_path(data_dir)
+    try:
+        st = path.stat()
+        stamp = (st.st_mtime_ns, st.st_size)
+    except OSError:
+        stamp = (0, -1)
+
+    key = str(path)
+    cached = _tables.get(key)
+    if cached and cached[0] == stamp:
+        return cached[1]
+
+    table = CreditTable()
+    if stamp[1] >= 0:
+        try:
+            raw = path.read_bytes()
+            content = json.loads(raw)
+            table = CreditTable(
+                content.get("artists", {}),
+                content.get("songs", {}),
+                hashlib.sha256(raw).hexdigest(),
+            )
+        except (json.JSONDecodeError, IOError, OSError, AttributeError) as e:
+            logger.error(f"Error loading alias file {path}: {e}")
+    _tables[key] = (stamp, table)
+    return table
+
+
+def _restore(
+    artist_aliases: Dict[str, str], title_aliases: Dict[str, str], digest: str
+) -> CreditTable:
+    table = _restored.get(digest)
+    if table is None:
+        # Canonical alias maps are stable under canonicalization
+        table = _restored[digest] = CreditTable(artist_aliases, title_aliases, digest)
+    return table
@@ -0,0 +1,478 @@
+import json
+import logging
+import mmap
+import os
+import struct
+import sys
+from array import array
+from pathlib import Path
+from typing import Dict, List, Optional, Any, Tuple, Iterable, Iterator, Mapping, Set
+
+import chart_discovery
+import chart_paths
+import chart_store
+import song_credits
+import store_format
+import instrumentation
+
+logger = logging.getLogger(__name__)
+
+INDEX_FILENAME = "song-index.bin"
+INDEX_VERSION = 4
+MAGIC = b"MCINDEX1"
+# magic, song count, header JSON length
+HEADER = struct.Struct("<8sII")
+KEY_SEPARATOR = song_credits.KEY_SEPARATOR
+
+# A posting is [date, position, weeks_on_chart], one per chart week.
+Posting = List[Any]
+# A chart run summarizes a song's postings on one chart:
+# [debut date, last date, peak, weeks on chart, weeks at #1].
+Run = List[Any]
+
+_index_cache: Dict[str, Tuple[Tuple[int, int], "SongIndex"]] = {}
+
+
+def index_path(data_dir: str) -> Path:
+    return Path(data_dir) / INDEX_FILENAME
+
+
+def chart_key(data_dir: str, chart_info: Dict[str, str]) -> str:
+    """
+    Identifies a chart by its folder relative to the data directory (also
+    when it is stored as a pack).
+    """
+    chart_dir = chart_paths.chart_base(chart_info["data_dir"])
+    return Path(os.path.relpath(chart_dir, data_dir)).as_posix()
+
+
+class SongIndex:
+    """
+    Inverted index from canonical (artist, song) keys to per-chart postings.
+    Postings of each chart are kept in week order. A loaded index reads
+    songs, names and runs from its file one song at a time; changing it
+    reads them all into dicts first.
+    """
+
+    def __init__(
+        self,
+        charts: Dict[str, Dict[str, Any]],
+        songs: Mapping[str, Dict[str, List[Posting]]],
+        names: Optional[Mapping[str, List[str]]] = None,
+        runs: Optional[Mapping[str, Dict[str, Run]]] = None,
+        aliases: str = "",
+        credits: Optional[song_credits.CreditTable] = None,
+    ):
+        self.charts = charts
+        self.songs = songs
+        # Display [artist, song] of each key, as first seen at ingestion
+        self.names = names if names is not None else {}
+        # Per-song chart runs, kept in step with the postings
+        self.runs = runs if runs is not None else {}
+        # Digest of the alias file the keys were built with
+        self.aliases = aliases
+        # Credit table of the data directory, which keys lookups and new weeks
+        self.credits = credits if credits is not None else song_credits.CreditTable()
+        # A resident index pinned with the stores it was built from (see
+        # chart_store.pin_files) is trusted to match the data
+        self.trusted = False
+        self._artists: Optional[Dict[str, List[str]]] = None
+
+    def lookup(self, artist: str, song: str) -> Dict[str, List[Posting]]:
+        """Returns {chart key: postings} for a song, empty if it never charted."""
+        return self.songs.get(self.credits.song_key(artist, song), {})
+
+    def artist_keys(self) -> Dict[str, List[str]]:
+        """Maps each normalized artist credit to the keys of its songs."""
+        if self._artists is None:
+            artists: Dict[str, List[str]] = {}
+            for skey in self.songs:
+                artists.setdefault(skey.split(KEY_SEPARATOR, 1)[0], []).append(skey)
+            self._artists = artists
+        return self._artists
+
+    def add_weeks(
+        self, key: str, weeks: Iterable[Tuple[str, List[Dict[str, Any]]]]
+    ) -> None:
+        """Ingests (stem, entries) weeks of one chart, updating affected runs."""
+        self._load_all()
+        touched = index_weeks(self.songs, key, weeks, self.credits, self.names)
+        self.update_runs(touched)
+
+    def drop_weeks(self, key: str, stems: Optional[Set[str]] = None) -> None:
+        """Removes weeks of one chart (all when stems is None), updating runs."""
+        self._load_all()
+        touched = remove_weeks(self.songs, key, stems)
+        self.update_runs(touched)
+
+    def update_runs(self, keys: Optional[Iterable[str]] = None) -> None:
+        """Recomputes the chart runs of the given song keys, or of every song."""
+        self._load_all()
+        for skey in self.songs if keys is None else keys:
+            charts = self.songs.get(skey)
+            if not charts:
+                self.runs.pop(skey, None)
+                self.names.pop(skey, None)
+                continue
+            self.runs[skey] = {
+                key: chart_run(postings) for key, postings in charts.items()
+            }
+        self._artists = None
+
+    def is_current(self, data_dir: str, chart_infos: List[Dict[str, str]]) -> bool:
+        """
+        True when every discovered chart matches the fingerprint it was built
+        from and the keys follow the data directory's current aliases. Costs
+        one stat per chart, however many weeks the charts hold.
+        """
+        if self.trusted:
+            return True
+        if self.aliases != song_credits.load_table(data_dir).digest:
+            return False
+        for chart_info in chart_infos:
+            chart_p = Path(chart_info["data_dir"])
+            try:
+                fingerprint = chart_paths.chart_fingerprint(chart_p)
+            except OSError:
+                continue
+            meta = self.charts.get(chart_key(data_dir, chart_info))
+            if meta is None or meta["fingerprint"] != fingerprint:
+                return False
+        return True
+
+    def _load_all(self) -> None:
+        """Reads a file-backed index into plain dicts before it is changed."""
+        if isinstance(self.songs, _RecordView):
+            self.songs, self.names, self.runs = self.songs.index_file.read_all()
+
+
+def chart_run(postings: List[Posting]) -> Run:
+    """Summarizes one chart's postings (in week order) as a run."""
+    positions = [p[1] for p in postings if p[1]]
+    return [
+        postings[0][0],
+        postings[-1][0],
+        min(positions) if positions else None,
+        # weeks_on_chart also counts weeks before the archive starts; the
+        # number of postings covers entries that lack it
+        max(max(p[2] or 0 for p in postings), len(postings)),
+        sum(1 for p in positions if p == 1),
+    ]
+
+
+def index_weeks(
+    songs: Dict[str, Dict[str, List[Posting]]],
+    key: str,
+    weeks: Iterable[Tuple[str, List[Dict[str, Any]]]],
+    credits: song_credits.CreditTable,
+    names: Optional[Dict[str, List[str]]] = None,
+) -> Set[str]:
+    """
+    Adds the postings of (stem, entries) weeks of one chart to songs, keyed
+    by the given credit table, and the display names of new keys to names.
+    Returns the keys that changed.
+    """
+    keys: Set[str] = set()
+    touched = []
+    for stem, entries in weeks:
+        seen = set()
+        for entry in entries:
+            sid = credits.song_id(entry.get("artist"), entry.get("song"))
+            # Mirrors search_song_in_file: only the first match of a week counts
+            if sid in seen:
+                continue
+            seen.add(sid)
+            skey = credits.key_of(sid)
+            if names is not None and skey not in names:
+                names[skey] = [
+                    str(entry.get("artist") or "").strip(),
+                    str(entry.get("song") or "").strip(),
+                ]
+            postings = songs.setdefault(skey, {}).setdefault(key, [])
+            if postings and postings[-1][0] > stem:
+                touched.append(postings)
+            postings.append(
+                [stem, entry.get("this_week"), entry.get("weeks_on_chart", 0)]
+            )
+            keys.add(skey)
+    for postings in touched:
+        postings.sort(key=lambda p: p[0])
+    return keys
+
+
+def remove_weeks(
+    songs: Dict[str, Dict[str, List[Posting]]],
+    key: str,
+    stems: Optional[Set[str]] = None,
+) -> Set[str]:
+    """
+    Drops every posting of one chart whose week stem is in stems, or all of
+    the chart's postings when stems is None. Returns the keys that changed.
+    """
+    keys: Set[str] = set()
+    for skey in list(songs):
+        charts = songs[skey]
+        postings = charts.get(key)
+        if not postings:
+            continue
+        kept = [] if stems is None else [p for p in postings if p[0] not in stems]
+        if len(kept) == len(postings):
+            continue
+        keys.add(skey)
+        if kept:
+            charts[key] = kept
+        else:
+            del charts[key]
+            if not charts:
+                del songs[skey]
+    return keys
+
+
+@instrumentation.timed("song_index.build_index")
+def build_index(
+    data_dir: str, stores: Optional[Dict[str, store_format.ChartStore]] = None
+) -> SongIndex:
+    """
+    Builds the song index over every chart found by chart discovery. Weeks
+    of charts in stores (keyed by the chart's data_dir) are read from those
+    stores instead of the chart's own.
+    """
+    credits = song_credits.load_table(data_dir)
+    charts: Dict[str, Dict[str, Any]] = {}
+    songs: Dict[str, Dict[str, List[Posting]]] = {}
+    names: Dict[str, List[str]] = {}
+
+    for chart_info in chart_discovery.discover_chart_folders(data_dir):
+        chart_p = Path(chart_info["data_dir"])
+        if not chart_p.exists():
+            logger.warning(
+                f"Chart folder not found: {chart_info['source']} / {chart_info['chart_name']}"
+            )
+            continue
+        key = chart_key(data_dir, chart_info)
+        charts[key] = {
+            "source": chart_info["source"],
+            "chart_name": chart_info["chart_name"],
+            "fingerprint": chart_paths.chart_fingerprint(chart_p),
+        }
+        store = stores.get(chart_info["data_dir"]) if stores else None
+        weeks = chart_store.iter_chart_weeks(chart_p, store)
+        index_weeks(songs, key, weeks, credits, names)
+
+    index = SongIndex(charts, songs, names, aliases=credits.digest, credits=credits)
+    index.update_runs()
+    return index
+
+
+def _pad(n: int) -> int:
+    return (8 - n % 8) % 8
+
+
+def encode_index(index: SongIndex) -> bytes:
+    """
+    Encodes a song index as a small JSON header followed by three string
+    tables over the songs in key order: their keys, display names and
+    records ([postings, runs] as JSON). Each table is an offset array and a
+    blob, so one song can be found by binary search and read on its own.
+    """
+    header = json.dumps(
+        {"version": INDEX_VERSION, "aliases": index.aliases, "charts": index.charts},
+        ensure_ascii=False,
+        separators=(",", ":"),
+    ).encode("utf-8")
+    index._load_all()
+    keys = sorted(index.songs)
+    tables = [
+        [skey.encode("utf-8") for skey in keys],
+        [
+            KEY_SEPARATOR.join(
+                index.names.get(skey, skey.split(KEY_SEPARATOR, 1))
+            ).encode("utf-8")
+            for skey in keys
+        ],
+        [
+            json.dumps(
+                [index.songs[skey], index.runs.get(skey, {})],
+                ensure_ascii=False,
+                separators=(",", ":"),
+            ).encode("utf-8")
+            for skey in keys
+        ],
+    ]
+
+    out = bytearray(HEADER.pack(MAGIC, len(keys), len(header)))
+    out += header
+    out += b"\0" * _pad(len(out))
+    for values in tables:
+        offsets = array("q", [0])
+        for value in values:
+            offsets.append(offsets[-1] + len(value))
+        if sys.byteorder != "little":
+            offsets.byteswap()
+        out += offsets.tobytes()
+        out += b"".join(values)
+        out += b"\0" * _pad(len(out))
+    return bytes(out)
+
+
+class _IndexFile:
+    """Read-only view over an encoded song index (see encode_index)."""
+
+    def __init__(self, buffer: Any):
+        self._buffer = buffer
+        view = memoryview(buffer)
+        magic, self.count, header_len = HEADER.unpack_from(view, 0)
+        if magic != MAGIC:
+            raise ValueError("Not a song index")
+        self.header = json.loads(bytes(view[HEADER.size : HEADER.size + header_len]))
+        offset = HEADER.size + header_len
+        offset += _pad(offset)
+        self._tables = []
+        for _ in range(3):
+            size = (self.count + 1) * 8
+            offsets = view[offset : offset + size].cast("q")
+            if sys.byteorder != "little":
+                offsets = array("q", offsets.tobytes())
+                offsets.byteswap()
+            blob_start = offset + size
+            self._tables.append((offsets, view[blob_start : blob_start + offsets[-1]]))
+            offset = blob_start + offsets[-1]
+            offset += _pad(offset)
+        self._keys: Optional[List[str]] = None
+
+    def _value(self, table: int, i: int) -> bytes:
+        offsets, blob = self._tables[table]
+        return bytes(blob[offsets[i] : offsets[i + 1]])
+
+    def key(self, i: int) -> str:
+        return self._value(0, i).decode("utf-8")
+
+    def keys(self) -> List[str]:
+        if self._keys is None:
+            self._keys = [self.key(i) for i in range(self.count)]
+        return self._keys
+
+    def find(self, skey: str) -> Optional[int]:
+        """The position of a song key, by binary search over the sorted keys."""
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.key(mid) < skey:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo if lo < self.count and self.key(lo) == skey else None
+
+    def read_all(self) -> Tuple[Dict[str, Any], Dict[str, Any], Dict[str, Any]]:
+        """Every song's postings, names and runs as dicts, each record read once."""
+        songs, names, runs = {}, {}, {}
+        for i, skey in enumerate(self.keys()):
+            names[skey] = self.field(i, "names")
+            songs[skey], runs[skey] = json.loads(self._value(2, i))
+        return songs, names, runs
+
+    def field(self, i: int, column: str) -> Any:
+        if column == "names":
+            return self._value(1, i).decode("utf-8").split(KEY_SEPARATOR, 1)
+        record = json.loads(self._value(2, i))
+        return record[0] if column == "songs" else record[1]
+
+
+class _RecordView(Mapping):
+    """One column (songs, names or runs) of a file-backed index, read per song."""
+
+    def __init__(self, index_file: _IndexFile, column: str):
+        self.index_file = index_file
+        self._column = column
+
+    def __getitem__(self, skey: str) -> Any:
+        i = self.index_file.find(skey)
+        if i is None:
+            raise KeyError(skey)
+        return self.index_file.field(i, self._column)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.index_file.keys())
+
+    def __len__(self) -> int:
+        return self.index_file.count
+
+    def items(self) -> Iterator[Tuple[str, Any]]:
+        # In key order, without a binary search per song
+        for i, skey in enumerate(self.index_file.keys()):
+            yield skey, self.index_file.field(i, self._column)
+
+
+def save_index(data_dir: str, index: SongIndex) -> Path:
+    path = index_path(data_dir)
+    chart_paths.write_atomic(path, encode_index(index))
+    return path
+
+
+@instrumentation.timed("song_index.load_index")
+def load_index(data_dir: str) -> Optional[SongIndex]:
+    """
+    Loads the persisted song index, or None if it has not been built. Only
+    the header is parsed; songs are read from the memory-mapped file as they
+    are looked up. Loaded indexes are cached until the file changes.
+    """
+    path = index_path(data_dir)
+    pinned = chart_store.pinned_file(path)
+    if pinned is not None:
+        return pinned
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+
+    key = str(path)
+    stamp = (st.st_mtime_ns, st.st_size)
+    cached = _index_cache.get(key)
+    if cached and cached[0] == stamp:
+        return cached[1]
+
+    try:
+        with path.open("rb") as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        index_file = _IndexFile(buffer)
+    except (json.JSONDecodeError, OSError, ValueError, struct.error) as e:
+        logger.error(f"Error loading song index {path}: {e}")
+        return None
+    header = index_file.header
+    if header.get("version") != INDEX_VERSION:
+        logger.warning(f"Ignoring song index {path} with unsupported version")
+        return None
+
+    index = SongIndex(
+        header.get("charts", {}),
+        _RecordView(index_file, "songs"),
+        _RecordView(index_file, "names"),
+        _RecordView(index_file, "runs"),
+        header.get("aliases", ""),
+        song_credits.load_table(data_dir),
+    )
+    _index_cache[key] = (stamp, index)
+    return index
+
+
+if __name__ == "__main__":
+    import argparse
+
+    logging.basicConfig(level=logging.INFO)
+
+    parser = argparse.ArgumentParser(
+        description="Build the inverted song index and chart run table"
+    )
+    parser.add_argument(
+        "--data_dir", default=str(Path(__file__).parent.parent / "data")
+    )
+    instrumentation.add_profile_argument(parser)
+    args = parser.parse_args()
+    instrumentation.profile_from_args(args)
+
+    song_idx = build_index(args.data_dir)
+    out = save_index(args.data_dir, song_idx)
+    print(
+        f"Indexed {len(song_idx.songs)} song(s) across "
+        f"{len(song_idx.charts)} chart(s) into {out}"
+    )
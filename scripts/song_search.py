@@ -0,0 +1,201 @@
+import logging
+import re
+import unicodedata
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import chart_discovery
+import song_index
+import instrumentation
+
+logger = logging.getLogger(__name__)
+
+# Candidates must share at least this fraction of the query's trigrams
+MIN_SCORE = 0.3
+# Bonus for candidates in which every query word starts a word
+PREFIX_BONUS = 0.25
+
+_NON_ALNUM = re.compile(r"[^0-9a-z]+")
+
+# Per data directory: (song index, search index built from it)
+_search_cache: Dict[str, Tuple[song_index.SongIndex, "SongSearchIndex"]] = {}
+
+
+def fold_text(text: str) -> str:
+    """
+    Folds text for fuzzy matching: accents removed ("Rocío" -> "rocio"),
+    lowercased, and punctuation collapsed to single spaces.
+    """
+    decomposed = unicodedata.normalize("NFKD", text or "")
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return _NON_ALNUM.sub(" ", stripped.lower()).strip()
+
+
+def trigrams(folded: str, prefix: bool = False) -> set:
+    """
+    Trigrams of each word padded as "  word ". With prefix set, the last
+    word is left open-ended, so "phys" matches "physical".
+    """
+    grams = set()
+    words = folded.split()
+    for i, word in enumerate(words):
+        padded = "  " + word
+        if not (prefix and i == len(words) - 1):
+            padded += " "
+        grams.update(padded[j : j + 3] for j in range(len(padded) - 2))
+    return grams
+
+
+class TrigramIndex:
+    """Inverted index from trigrams to the ids of the texts containing them."""
+
+    def __init__(self, texts: List[str]):
+        self.texts = [fold_text(text) for text in texts]
+        self.sizes = []
+        postings: Dict[str, List[int]] = defaultdict(list)
+        for doc_id, folded in enumerate(self.texts):
+            grams = trigrams(folded)
+            self.sizes.append(len(grams))
+            for gram in grams:
+                postings[gram].append(doc_id)
+        self.postings = dict(postings)
+
+    def search(self, query: str, limit: int = 10) -> List[Tuple[int, float]]:
+        """
+        Returns up to limit (text id, score) pairs, best first. The score is
+        the fraction of query trigrams a text contains, plus PREFIX_BONUS
+        when every query word starts one of its words; ties go to shorter
+        texts, which match the query more closely.
+        """
+        folded = fold_text(query)
+        grams = trigrams(folded, prefix=True)
+        if not grams:
+            return []
+        shared: Dict[int, int] = defaultdict(int)
+        for gram in grams:
+            for doc_id in self.postings.get(gram, ()):
+                shared[doc_id] += 1
+
+        needed = MIN_SCORE * len(grams)
+        words = folded.split()
+        # A text where every query word starts a word has every query trigram
+        # but, at most, the closing ones of the words before the last
+        prefix_needed = len(grams) - (len(words) - 1)
+        scored = []
+        for doc_id, count in shared.items():
+            if count < needed:
+                continue
+            score = count / len(grams)
+            if count >= prefix_needed:
+                doc_words = self.texts[doc_id].split()
+                if all(any(d.startswith(w) for d in doc_words) for w in words):
+                    score += PREFIX_BONUS
+            scored.append((-score, self.sizes[doc_id], doc_id))
+        scored.sort()
+        return [(doc_id, -neg) for neg, _, doc_id in scored[:limit]]
+
+
+class SongSearchIndex:
+    """
+    Trigram indexes over the distinct songs ("artist title") and the
+    distinct artist credits of every chart in a song index.
+    """
+
+    def __init__(self, index: song_index.SongIndex):
+        self.songs: List[Tuple[str, str]] = []
+        artists: Dict[str, str] = {}
+        for skey, (artist, song) in index.names.items():
+            self.songs.append((artist, song))
+            artists.setdefault(skey.split(song_index.KEY_SEPARATOR, 1)[0], artist)
+        self.artists = list(artists.values())
+        self.song_index = TrigramIndex([f"{a} {s}" for a, s in self.songs])
+        self.artist_index = TrigramIndex(self.artists)
+
+    def search_songs(self, query: str, limit: int = 10) -> List[Dict]:
+        return [
+            {"artist": self.songs[i][0], "song": self.songs[i][1], "score": round(s, 3)}
+            for i, s in self.song_index.search(query, limit)
+        ]
+
+    def search_artists(self, query: str, limit: int = 10) -> List[Dict]:
+        return [
+            {"artist": self.artists[i], "score": round(s, 3)}
+            for i, s in self.artist_index.search(query, limit)
+        ]
+
+
+def get_search_index(data_dir: str) -> SongSearchIndex:
+    """
+    The search index of a data directory, built from its song index (rebuilt
+    in memory when missing or out of date) and cached until that changes.
+    """
+    chart_infos = [
+        c
+        for c in chart_discovery.discover_chart_folders(data_dir)
+        if Path(c["data_dir"]).exists()
+    ]
+    index = song_index.load_index(data_dir)
+    cached = _search_cache.get(data_dir)
+    if index is not None and index.is_current(data_dir, chart_infos):
+        if cached and cached[0] is index:
+            return cached[1]
+    else:
+        if cached and cached[0].is_current(data_dir, chart_infos):
+            return cached[1]
+        logger.warning("Song index is missing or out of date; rebuilding it in memory.")
+        index = song_index.build_index(data_dir)
+
+    search_index = SongSearchIndex(index)
+    _search_cache[data_dir] = (index, search_index)
+    return search_index
+
+
+@instrumentation.timed("song_search.search_songs")
+def search_songs(data_dir: str, query: str, limit: int = 10) -> List[Dict]:
+    """
+    Ranked fuzzy search over every charting song: prefix, typo-tolerant and
+    accent-insensitive ("olivia fisical" finds Olivia Newton-John - Physical).
+    Returned artist and song can be passed to get_song_chart_history.
+    """
+    if not query.strip():
+        raise ValueError("Search query is required.")
+    return get_search_index(data_dir).search_songs(query, limit)
+
+
+@instrumentation.timed("song_search.search_artists")
+def search_artists(data_dir: str, query: str, limit: int = 10) -> List[Dict]:
+    """Ranked fuzzy search over every distinct artist credit."""
+    if not query.strip():
+        raise ValueError("Search query is required.")
+    return get_search_index(data_dir).search_artists(query, limit)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    logging.basicConfig(level=logging.INFO)
+
+    parser = argparse.ArgumentParser(description="Fuzzy song and artist search")
+    parser.add_argument(
+        "--data_dir", default=str(Path(__file__).parent.parent / "data")
+    )
+    parser.add_argument("--query", required=True)
+    parser.add_argument(
+        "--artists", action="store_true", help="Search artist credits instead of songs"
+    )
+    parser.add_argument("--limit", type=int, default=10)
+    instrumentation.add_profile_argument(parser)
+    args = parser.parse_args()
+    instrumentation.profile_from_args(args)
+
+    if args.artists:
+        print("| Score | Artist |")
+        print("|-------|--------|")
+        for r in search_artists(args.data_dir, args.query, args.limit):
+            print(f"| {r['score']:.2f} | {r['artist']} |")
+    else:
+        print("| Score | Artist | Song |")
+        print("|-------|--------|------|")
+        for r in search_songs(args.data_dir, args.query, args.limit):
+            print(f"| {r['score']:.2f} | {r['artist']} | {r['song']} |")
@@ -1,47 +1,72 @@
+import asyncio
 import logging
 from pathlib import Path
-from typing import List, Dict, Tuple
+from typing import AsyncIterator, List, Dict, Tuple, Iterator, Optional, Sequence
 
+import async_loader
 import chart_discovery
 import data_handler
+import song_credits
 import time_engine
 import chart_utils
+import chart_store
+import store_format
+import query_executor
+import position_range_numpy
+import export_writers
+import instrumentation
 
 logger = logging.getLogger(__name__)
 
+# "auto" uses the NumPy engine for charts with a compiled store when NumPy
+# is installed, and the Python engine otherwise.
+ENGINES = ("auto", "python", "numpy")
 
-def get_songs_in_position_range(
-    data_dir: str,
-    chart_info: Dict,
+
+def _iter_weeks_in_range(
+    chart_dir: Path,
     start_date: str,
     end_date: str,
-    min_pos: int = 1,
-    max_pos: int = 10,
-    include_peak_date: bool = False,
-) -> List[Dict]:
+    files: Optional[List[Path]] = None,
+) -> Iterator[Tuple[str, List[Dict]]]:
     """
-    Returns unique songs in position range. Optionally tracks earliest peak date.
+    Yields (date, entries) for the given files, or for every chart week in the
+    date range when files is None: from the compiled store when available and
+    from JSON otherwise.
     """
-    if min_pos > max_pos or min_pos < 1:
-        raise ValueError("Invalid position range.")
-
-    results: Dict[Tuple[str, str], Dict] = {}
-    chart_p = Path(chart_info["data_dir"])
-    if not chart_p.exists():
-        logger.warning(
-            f"Chart folder not found: {chart_info['source']} / {chart_info['chart_name']}"
-        )
-        return []
-
-    date_files = chart_utils.get_files_for_date_range(chart_p, start_date, end_date)
+    store = chart_store.open_store(chart_dir) if files is None else None
+    if store is not None:
+        for week in store.weeks_in_range(start_date, end_date):
+            yield store.week_date(week), store.week_entries(week)
+        return
 
-    for filename in date_files:
-        file_path = str(chart_p / filename)
+    if files is None:
+        files = chart_utils.get_files_for_date_range(chart_dir, start_date, end_date)
+    for filename in files:
         date_str = time_engine.extract_date_from_filename(filename.name)
         if not date_str:
             continue
-        entries = data_handler.load_chart_entries(file_path)
+        yield date_str, data_handler.load_chart_entries(str(filename))
 
+
+def _collect_range(
+    chart_dir: Path,
+    start_date: str,
+    end_date: str,
+    min_pos: int,
+    max_pos: int,
+    include_peak_date: bool,
+    credits: song_credits.CreditTable,
+    files: Optional[List[Path]] = None,
+) -> Dict[str, Dict]:
+    """
+    Aggregates peak and weeks at peak per canonical (artist, song) of the
+    credit table over the weeks read by _iter_weeks_in_range, keyed by
+    canonical song key.
+    """
+    results: Dict[int, Dict] = {}
+    weeks = _iter_weeks_in_range(chart_dir, start_date, end_date, files)
+    for date_str, entries in weeks:
         for entry in entries:
             pos = entry.get("this_week")
             if pos is None or not (min_pos <= pos <= max_pos):
@@ -52,10 +77,7 @@ def get_songs_in_position_range(
             if not artist or not song:
                 continue
 
-            key = (
-                data_handler.normalize_text(artist),
-                data_handler.normalize_text(song),
-            )
+            key = credits.song_id(artist, song)
 
             if key not in results:
                 new_entry = {
@@ -76,12 +98,215 @@ def get_songs_in_position_range(
                         current["peak_date"] = date_str
                 elif pos == current["peak"]:
                     current["weeks_at_peak"] += 1
+    # Ids are per process; keys stay comparable across executor workers
+    return {credits.key_of(key): entry for key, entry in results.items()}
 
-    result_list = list(results.values())
+
+def _merge_range_results(
+    results: Dict[str, Dict], later: Dict[str, Dict]
+) -> None:
+    """
+    Merges the aggregation of a later batch of weeks into results, keeping
+    the earliest peak date and display names.
+    """
+    for key, entry in later.items():
+        current = results.get(key)
+        if current is None:
+            results[key] = entry
+        elif entry["peak"] < current["peak"]:
+            current["peak"] = entry["peak"]
+            current["weeks_at_peak"] = entry["weeks_at_peak"]
+            if "peak_date" in entry:
+                current["peak_date"] = entry["peak_date"]
+        elif entry["peak"] == current["peak"]:
+            current["weeks_at_peak"] += entry["weeks_at_peak"]
+
+
+def _sort_range_results(result_list: List[Dict], include_peak_date: bool) -> None:
     if include_peak_date:
         result_list.sort(key=lambda x: (x["peak_date"], x["peak"], -x["weeks_at_peak"]))
     else:
         result_list.sort(key=lambda x: (x["peak"], -x["weeks_at_peak"], x["artist"]))
+
+
+def _position_records(
+    date_str: str, entries: Sequence[Dict], min_pos: int, max_pos: int
+) -> Iterator[Dict]:
+    for entry in entries:
+        pos = entry.get("this_week")
+        if pos is None or not (min_pos <= pos <= max_pos):
+            continue
+        yield {
+            "date": date_str,
+            "position": pos,
+            "artist": entry.get("artist"),
+            "song": entry.get("song"),
+            "weeks_on_chart": entry.get("weeks_on_chart"),
+        }
+
+
+def iter_position_range_entries(
+    data_dir: str,
+    chart_info: Dict,
+    start_date: str,
+    end_date: str,
+    min_pos: int = 1,
+    max_pos: int = 10,
+) -> Iterator[Dict]:
+    """
+    Yields every chart entry between min_pos and max_pos in the date range,
+    in date order, as flat records (date, position, artist, song,
+    weeks_on_chart). Weeks are read one at a time, so exporting decades of
+    entries runs in constant memory.
+    """
+    if min_pos > max_pos or min_pos < 1:
+        raise ValueError("Invalid position range.")
+
+    if not chart_discovery.overlaps_dates(chart_info, start_date, end_date):
+        return
+    chart_p = Path(chart_info["data_dir"])
+    if not chart_p.exists():
+        logger.warning(
+            f"Chart folder not found: {chart_info['source']} / {chart_info['chart_name']}"
+        )
+        return
+
+    for date_str, entries in _iter_weeks_in_range(chart_p, start_date, end_date):
+        yield from _position_records(date_str, entries, min_pos, max_pos)
+
+
+def _store_week_records(
+    store: store_format.ChartStore, week: int, min_pos: int, max_pos: int
+) -> List[Dict]:
+    """The position range records of one week of a compiled store."""
+    entries = store.week_entries(week)
+    return list(_position_records(store.week_date(week), entries, min_pos, max_pos))
+
+
+async def aiter_position_range_entries(
+    data_dir: str,
+    chart_info: Dict,
+    start_date: str,
+    end_date: str,
+    min_pos: int = 1,
+    max_pos: int = 10,
+    max_in_flight: int = async_loader.MAX_IN_FLIGHT,
+) -> AsyncIterator[Dict]:
+    """
+    Async generator variant of iter_position_range_entries for asyncio
+    applications. Week files are read by the async loader, up to
+    max_in_flight at a time, and a compiled store is opened and read one
+    week at a time on the default executor, so the event loop is never
+    blocked on I/O or on decoding a whole chart.
+    """
+    if min_pos > max_pos or min_pos < 1:
+        raise ValueError("Invalid position range.")
+    if not chart_discovery.overlaps_dates(chart_info, start_date, end_date):
+        return
+    chart_p = Path(chart_info["data_dir"])
+    if not chart_p.exists():
+        logger.warning(
+            f"Chart folder not found: {chart_info['source']} / {chart_info['chart_name']}"
+        )
+        return
+
+    loop = asyncio.get_running_loop()
+    store = await loop.run_in_executor(None, chart_store.open_store, chart_p)
+    if store is not None:
+        weeks = await loop.run_in_executor(
+            None, store.weeks_in_range, start_date, end_date
+        )
+        for week in weeks:
+            records = await loop.run_in_executor(
+                None, _store_week_records, store, week, min_pos, max_pos
+            )
+            for record in records:
+                yield record
+        return
+
+    files = chart_utils.get_files_for_date_range(chart_p, start_date, end_date)
+    async for stem, entries in async_loader.aiter_chart_weeks(chart_p, files, max_in_flight):
+        date_str = time_engine.extract_date_from_filename(stem)
+        if not date_str:
+            continue
+        for record in _position_records(date_str, entries, min_pos, max_pos):
+            yield record
+
+
+@instrumentation.timed("songs_in_position_range_search.get_songs_in_position_range")
+def get_songs_in_position_range(
+    data_dir: str,
+    chart_info: Dict,
+    start_date: str,
+    end_date: str,
+    min_pos: int = 1,
+    max_pos: int = 10,
+    include_peak_date: bool = False,
+    executor: str = "serial",
+    workers: Optional[int] = None,
+    engine: str = "auto",
+) -> List[Dict]:
+    """
+    Returns unique songs in position range. Optionally tracks earliest peak date.
+    Charts with a compiled store are aggregated by the NumPy engine when
+    available (see ENGINES). Otherwise file batches are aggregated with the
+    given executor mode and merged in date order.
+    """
+    if min_pos > max_pos or min_pos < 1:
+        raise ValueError("Invalid position range.")
+    if engine not in ENGINES:
+        raise ValueError(
+            f"Invalid engine '{engine}'. Choose one of: {', '.join(ENGINES)}"
+        )
+    if engine == "numpy" and not position_range_numpy.is_available():
+        raise ValueError("The numpy engine requires NumPy to be installed.")
+
+    # The chart's declared span rules out the range without touching its folder
+    if not chart_discovery.overlaps_dates(chart_info, start_date, end_date):
+        return []
+    chart_p = Path(chart_info["data_dir"])
+    if not chart_p.exists():
+        logger.warning(
+            f"Chart folder not found: {chart_info['source']} / {chart_info['chart_name']}"
+        )
+        return []
+
+    credits = song_credits.load_table(data_dir)
+    store = None
+    if engine != "python" and position_range_numpy.is_available():
+        store = chart_store.open_store(chart_p)
+    if store is not None:
+        result_list = position_range_numpy.songs_in_position_range(
+            store, credits, start_date, end_date, min_pos, max_pos, include_peak_date
+        )
+        _sort_range_results(result_list, include_peak_date)
+        return result_list
+
+    batches = query_executor.plan_chart_batches(
+        chart_p,
+        lambda: chart_utils.get_files_for_date_range(chart_p, start_date, end_date),
+        executor,
+        workers,
+    )
+    tasks = [
+        (
+            chart_p,
+            start_date,
+            end_date,
+            min_pos,
+            max_pos,
+            include_peak_date,
+            credits,
+            files,
+        )
+        for files in batches
+    ]
+    results: Dict[str, Dict] = {}
+    for partial in query_executor.run_tasks(_collect_range, tasks, executor, workers):
+        _merge_range_results(results, partial)
+
+    result_list = list(results.values())
+    _sort_range_results(result_list, include_peak_date)
     return result_list
 
 
@@ -101,22 +326,35 @@ if __name__ == "__main__":
     parser.add_argument("--min_pos", type=int, default=1)
     parser.add_argument("--max_pos", type=int, default=10)
     parser.add_argument("--include_peak_date", action="store_true")
+    query_executor.add_executor_arguments(parser)
+    parser.add_argument("--engine", choices=ENGINES, default="auto")
+    export_writers.add_export_arguments(parser)
+    parser.add_argument(
+        "--rows",
+        action="store_true",
+        help="With --output, export every chart entry in range instead of unique songs",
+    )
+    instrumentation.add_profile_argument(parser)
     args = parser.parse_args()
+    instrumentation.profile_from_args(args)
+    # Messages stay out of records streamed to stdout
+    streaming = args.output and export_writers.is_stream(args.output)
+    console = sys.stderr if streaming else sys.stdout
 
     chart_infos = chart_discovery.discover_chart_folders(args.data_dir)
     if not chart_infos:
-        print("No charts found in data folder.")
+        print("No charts found in data folder.", file=console)
         sys.exit(1)
 
-    print("Available charts:")
+    print("Available charts:", file=console)
     for i, c in enumerate(chart_infos, 1):
-        print(f"{i:2d}. {c['source']} / {c['chart_name']}")
+        print(f"{i:2d}. {c['source']} / {c['chart_name']}", file=console)
 
     if args.chart_num is None:
         try:
             choice = int(input("\nSelect chart number: ")) - 1
         except (ValueError, EOFError):
-            print("Invalid selection.")
+            print("Invalid selection.", file=console)
             sys.exit(1)
     else:
         choice = args.chart_num - 1
@@ -124,14 +362,32 @@ if __name__ == "__main__":
     try:
         selected_chart = chart_infos[choice]
     except IndexError:
-        print("Invalid selection.")
+        print("Invalid selection.", file=console)
         sys.exit(1)
 
     print(
         f"\nSearching {selected_chart['source']} / {selected_chart['chart_name']} "
-        f"({args.min_pos}-{args.max_pos}) from {args.start_date} to {args.end_date}...\n"
+        f"({args.min_pos}-{args.max_pos}) from {args.start_date} to {args.end_date}...\n",
+        file=console,
     )
 
+    if args.output and args.rows:
+        count = export_writers.export_records(
+            iter_position_range_entries(
+                args.data_dir,
+                selected_chart,
+                args.start_date,
+                args.end_date,
+                args.min_pos,
+                args.max_pos,
+            ),
+            args.output,
+            args.export_format,
+            ["date", "position", "artist", "song", "weeks_on_chart"],
+        )
+        export_writers.report_export(count, args.output)
+        sys.exit(0)
+
     songs = get_songs_in_position_range(
         args.data_dir,
         selected_chart,
@@ -140,9 +396,20 @@ if __name__ == "__main__":
         args.min_pos,
         args.max_pos,
         args.include_peak_date,
+        args.executor,
+        args.workers,
+        args.engine,
     )
 
-    if not songs:
+    if args.output:
+        fields = ["artist", "song", "peak", "weeks_at_peak"]
+        if args.include_peak_date:
+            fields.insert(2, "peak_date")
+        count = export_writers.export_records(
+            songs, args.output, args.export_format, fields
+        )
+        export_writers.report_export(count, args.output)
+    elif not songs:
         print("No songs found with the specified criteria.")
     else:
         print(f"Found {len(songs)} unique song(s)\n")
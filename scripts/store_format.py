@@ -0,0 +1,275 @@
+import struct
+import sys
+from array import array
+from typing import Dict, List, Optional, Any, Iterable, Sequence, Tuple
+
+import chart_week
+import time_engine
+
+MAGIC = b"MCSTORE2"
+# magic, week count, row count, string count, blob length, chart fingerprint
+HEADER = struct.Struct("<8sIIIIqq")
+
+ABSENT = chart_week.ABSENT
+NULL = chart_week.NULL
+
+# (name, typecode, count-field) in on-disk order
+_SECTIONS = [
+    ("week_ordinals", "i", "weeks"),
+    ("week_stems", "i", "weeks"),
+    ("week_offsets", "i", "weeks+1"),
+    ("this_week", "i", "rows"),
+    ("last_week", "i", "rows"),
+    ("peak_position", "i", "rows"),
+    ("weeks_on_chart", "i", "rows"),
+    ("song", "i", "rows"),
+    ("artist", "i", "rows"),
+    ("string_offsets", "i", "strings+1"),
+]
+
+# Version 1 stores (still found in binary chart pack payloads): no
+# fingerprint, 16-bit numeric columns
+LEGACY_MAGIC = b"MCSTORE1"
+LEGACY_HEADER = struct.Struct("<8sIIII")
+_LEGACY_SECTIONS = [
+    (name, "h" if name in chart_week.NUMERIC_KEYS else code, count)
+    for name, code, count in _SECTIONS
+]
+
+
+def _pad(n: int) -> int:
+    return (8 - n % 8) % 8
+
+
+def _encode_int(stem: str, key: str, value: Any) -> int:
+    """
+    Encodes a numeric entry value for its int32 column. Non-numbers are
+    stored as null; numbers must be positive, as ABSENT and NULL take -1
+    and 0, and fit in 32 bits.
+    """
+    if value is None:
+        return NULL
+    try:
+        number = int(value)
+    except (TypeError, ValueError):
+        return NULL
+    if number <= NULL or number > chart_week.INT_MAX:
+        raise ValueError(
+            f"Week {stem}: {key} value {value!r} cannot be stored in a chart "
+            f"store (expected 1 to {chart_week.INT_MAX})"
+        )
+    return number
+
+
+def _date_ordinal(stem: str) -> int:
+    return time_engine.filename_ordinal(stem) or 0
+
+
+def encode_weeks(
+    weeks: Iterable[Tuple[str, List[Dict[str, Any]]]],
+    fingerprint: Sequence[int] = (0, 0),
+) -> bytes:
+    """
+    Encodes (stem, entries) pairs into the binary columnar store format.
+    Weeks are written in stem order; entries keep their original order.
+    The fingerprint of the chart the weeks were read from goes in the
+    header, so readers can tell when the store no longer matches it.
+    """
+    strings: List[str] = []
+    string_ids: Dict[str, int] = {}
+
+    def intern(text: Any) -> int:
+        text = text if isinstance(text, str) else ""
+        sid = string_ids.get(text)
+        if sid is None:
+            sid = string_ids[text] = len(strings)
+            strings.append(text)
+        return sid
+
+    cols = {name: array(code) for name, code, _ in _SECTIONS}
+    cols["week_offsets"].append(0)
+
+    for stem, entries in sorted(weeks, key=lambda w: w[0]):
+        cols["week_ordinals"].append(_date_ordinal(stem))
+        cols["week_stems"].append(intern(stem))
+        for entry in entries:
+            for key in chart_week.NUMERIC_KEYS:
+                cols[key].append(
+                    _encode_int(stem, key, entry[key]) if key in entry else ABSENT
+                )
+            cols["song"].append(intern(entry.get("song")))
+            cols["artist"].append(intern(entry.get("artist")))
+        cols["week_offsets"].append(len(cols["this_week"]))
+
+    blob = bytearray()
+    cols["string_offsets"].append(0)
+    for text in strings:
+        blob += text.encode("utf-8")
+        cols["string_offsets"].append(len(blob))
+
+    out = bytearray(
+        HEADER.pack(
+            MAGIC,
+            len(cols["week_ordinals"]),
+            len(cols["this_week"]),
+            len(strings),
+            len(blob),
+            *fingerprint,
+        )
+    )
+    out += b"\0" * _pad(len(out))
+    for name, _, _ in _SECTIONS:
+        col = cols[name]
+        if sys.byteorder != "little":
+            col.byteswap()
+        out += col.tobytes()
+        out += b"\0" * _pad(len(out))
+    out += blob
+    return bytes(out)
+
+
+class ChartStore:
+    """
+    Read-only view over a compiled chart store. Columns are exposed as
+    memoryviews over the (usually memory-mapped) buffer, so opening a store
+    does not parse any week data.
+    """
+
+    def __init__(self, buffer: Any):
+        self._buffer = buffer
+        view = memoryview(buffer)
+        magic = bytes(view[:8])
+        if magic == MAGIC:
+            header, sections = HEADER, _SECTIONS
+        elif magic == LEGACY_MAGIC:
+            header, sections = LEGACY_HEADER, _LEGACY_SECTIONS
+        else:
+            raise ValueError("Not a compiled chart store")
+        _, n_weeks, n_rows, n_strings, blob_len, *fingerprint = header.unpack_from(view, 0)
+        # chart_paths.chart_fingerprint of the source chart ([0, 0] if unknown)
+        self.fingerprint: List[int] = fingerprint or [0, 0]
+
+        counts = {"weeks": n_weeks, "weeks+1": n_weeks + 1, "rows": n_rows}
+        counts["strings+1"] = n_strings + 1
+        offset = header.size + _pad(header.size)
+        for name, code, count_key in sections:
+            size = counts[count_key] * array(code).itemsize
+            col = view[offset : offset + size].cast(code)
+            if sys.byteorder != "little":
+                col = array(code, col.tobytes())
+                col.byteswap()
+            setattr(self, name, col)
+            offset += size + _pad(size)
+
+        blob = bytes(view[offset : offset + blob_len])
+        offs = self.string_offsets
+        self.strings: List[str] = [
+            blob[offs[i] : offs[i + 1]].decode("utf-8") for i in range(n_strings)
+        ]
+        self.stems: List[str] = [self.strings[s] for s in self.week_stems]
+        self._stem_index = {stem: i for i, stem in enumerate(self.stems)}
+
+    @property
+    def num_weeks(self) -> int:
+        return len(self.stems)
+
+    @property
+    def num_rows(self) -> int:
+        return len(self.this_week)
+
+    def week_index(self, stem: str) -> Optional[int]:
+        return self._stem_index.get(stem)
+
+    def week_date(self, week: int) -> Optional[str]:
+        """Returns the YYYY-MM-DD date of a week, or None if the stem had none."""
+        ordinal = self.week_ordinals[week]
+        return time_engine.ordinal_to_date_str(ordinal) if ordinal else None
+
+    def week_rows(self, week: int) -> range:
+        return range(self.week_offsets[week], self.week_offsets[week + 1])
+
+    def entry(self, row: int) -> Dict[str, Any]:
+        """Rebuilds the JSON entry dict stored at a row."""
+        entry: Dict[str, Any] = {
+            "song": self.strings[self.song[row]],
+            "artist": self.strings[self.artist[row]],
+        }
+        for key in chart_week.NUMERIC_KEYS:
+            value = getattr(self, key)[row]
+            if value != ABSENT:
+                entry[key] = value if value != NULL else None
+        return entry
+
+    def week_entries(self, week: int) -> chart_week.ChartWeek:
+        """Returns a week as a compact ChartWeek copied out of the columns."""
+        start, end = self.week_offsets[week], self.week_offsets[week + 1]
+        strings = self.strings
+        return chart_week.ChartWeek(
+            tuple(strings[i] for i in self.song[start:end]),
+            tuple(strings[i] for i in self.artist[start:end]),
+            *(
+                array("i", getattr(self, key)[start:end])
+                for key in chart_week.NUMERIC_KEYS
+            ),
+        )
+
+    def find_rank(self, week: int, rank: int) -> Optional[int]:
+        """Returns the first row of a week whose this_week equals rank."""
+        this_week = self.this_week
+        for row in self.week_rows(week):
+            if this_week[row] == rank:
+                return row
+        return None
+
+    def find_ranks(self, week: int, ranks: Iterable[int]) -> Dict[int, int]:
+        """Returns {rank: first row of the week at that rank} for the given ranks."""
+        wanted = set(ranks)
+        this_week = self.this_week
+        rows: Dict[int, int] = {}
+        for row in self.week_rows(week):
+            rank = this_week[row]
+            if rank in wanted and rank not in rows:
+                rows[rank] = row
+                if len(rows) == len(wanted):
+                    break
+        return rows
+
+    def weeks_for_patterns(self, patterns: List[str]) -> List[int]:
+        """Week indices whose stem ends with any -MM-DD pattern, in stem order."""
+        suffixes = tuple(patterns)
+        return [i for i, stem in enumerate(self.stems) if stem.endswith(suffixes)]
+
+    def weeks_in_range(self, start_date: str, end_date: str) -> List[int]:
+        """Week indices with a date inside [start_date, end_date], in date order."""
+        try:
+            start, end = time_engine.parse_date_range(start_date, end_date)
+        except ValueError as e:
+            raise ValueError(f"Invalid date range: {e}")
+        return self.weeks_between_ordinals(start, end)
+
+    def weeks_between_ordinals(self, start: int, end: int) -> List[int]:
+        """Week indices dated within [start, end] (day ordinals), in date order."""
+        ordinals = self.week_ordinals
+        weeks = [i for i in range(self.num_weeks) if start <= ordinals[i] <= end]
+        weeks.sort(key=lambda i: ordinals[i])
+        return weeks
+
+    def string_ids_matching(self, normalized: Any, normalize) -> set:
+        """Ids of all interned strings whose normalized form (or id) equals normalized."""
+        return {i for i, text in enumerate(self.strings) if normalize(text) == normalized}
+
+    def find_song_rows(self, artist_ids: set, song_ids: set) -> List[Tuple[int, int]]:
+        """
+        Returns (week, row) pairs of the first row per week whose artist and
+        song ids are in the given sets.
+        """
+        found = []
+        if not artist_ids or not song_ids:
+            return found
+        artist_col, song_col = self.artist, self.song
+        for week in range(self.num_weeks):
+            for row in self.week_rows(week):
+                if song_col[row] in song_ids and artist_col[row] in artist_ids:
+                    found.append((week, row))
+                    break
+        return found
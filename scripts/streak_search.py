@@ -0,0 +1,211 @@
+import logging
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, List, Dict, Optional, Tuple
+
+import chart_discovery
+import chart_paths
+import chart_store
+import chart_streaks
+import song_credits
+import time_engine
+import instrumentation
+
+logger = logging.getLogger(__name__)
+
+EVENT_KINDS = ("debuts", "reentries")
+# Streak tables computed in memory, kept for the most recently queried charts
+COMPUTED_CACHE_SIZE = 16
+
+_computed: "OrderedDict[Any, Tuple[Any, chart_streaks.ChartStreaks]]" = OrderedDict()
+_computed_lock = threading.Lock()
+
+
+def _chart_streaks(
+    chart_p: Path,
+    credits: song_credits.CreditTable,
+    thresholds: Optional[List[int]] = None,
+) -> chart_streaks.ChartStreaks:
+    """
+    The saved streak table of a chart, or one computed in memory when it is
+    missing, out of date, or lacks a requested threshold. Computed tables
+    are cached until the chart's fingerprint or the aliases change.
+    """
+    streaks = chart_streaks.load_streaks(chart_p, credits)
+    if streaks is not None and all(t in streaks.runs for t in thresholds or []):
+        return streaks
+
+    wanted = tuple(sorted(set(thresholds or chart_streaks.THRESHOLDS)))
+    key = (str(chart_p), wanted)
+    stamp = (chart_paths.chart_fingerprint(chart_p), credits.digest)
+    with _computed_lock:
+        cached = _computed.get(key)
+        if cached and cached[0] == stamp:
+            _computed.move_to_end(key)
+            return cached[1]
+
+    if streaks is None:
+        logger.warning(
+            f"Streak table missing or out of date for {chart_p.name}; computing it in memory."
+        )
+    runs, debuts, reentries = chart_streaks.compute_streaks(
+        chart_store.iter_chart_weeks(chart_p), credits, wanted
+    )
+    streaks = chart_streaks.ChartStreaks(stamp[0], runs, debuts, reentries, stamp[1])
+    with _computed_lock:
+        _computed[key] = (stamp, streaks)
+        _computed.move_to_end(key)
+        while len(_computed) > COMPUTED_CACHE_SIZE:
+            _computed.popitem(last=False)
+    return streaks
+
+
+@instrumentation.timed("streak_search.get_longest_runs")
+def get_longest_runs(
+    data_dir: str,
+    chart_info: Dict,
+    threshold: int = 1,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    limit: Optional[int] = 10,
+) -> List[Dict]:
+    """
+    Returns the longest runs of consecutive weeks at or above `threshold`
+    (e.g. 1 for #1 runs) that overlap the optional date window, longest first.
+    Each run reports its full length, including weeks outside the window.
+    """
+    if threshold < 1:
+        raise ValueError("Threshold must be a positive chart position.")
+    time_engine.validate_window(start_date, end_date)
+    if not chart_discovery.overlaps_dates(chart_info, start_date, end_date):
+        return []
+
+    chart_p = Path(chart_info["data_dir"])
+    if not chart_p.exists():
+        logger.warning(
+            f"Chart folder not found: {chart_info['source']} / {chart_info['chart_name']}"
+        )
+        return []
+
+    credits = song_credits.load_table(data_dir)
+    runs = _chart_streaks(chart_p, credits, [threshold]).runs[threshold]
+    results = [
+        {
+            "artist": artist,
+            "song": song,
+            "start": first,
+            "end": last,
+            "weeks": weeks,
+            "best": best,
+        }
+        for artist, song, first, last, weeks, best in runs
+        if (start_date is None or last >= start_date)
+        and (end_date is None or first <= end_date)
+    ]
+    # Runs are stored by start date, so equal lengths keep chronological order
+    results.sort(key=lambda r: -r["weeks"])
+    return results[:limit] if limit else results
+
+
+@instrumentation.timed("streak_search.get_chart_events")
+def get_chart_events(
+    data_dir: str,
+    chart_info: Dict,
+    kind: str = "debuts",
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    max_pos: Optional[int] = None,
+) -> List[Dict]:
+    """
+    Returns the debuts or re-entries (see EVENT_KINDS) of a chart within the
+    optional date window and at or above max_pos, in date order.
+    """
+    if kind not in EVENT_KINDS:
+        raise ValueError(f"Invalid kind '{kind}'. Choose one of: {', '.join(EVENT_KINDS)}")
+    time_engine.validate_window(start_date, end_date)
+    if not chart_discovery.overlaps_dates(chart_info, start_date, end_date):
+        return []
+
+    chart_p = Path(chart_info["data_dir"])
+    if not chart_p.exists():
+        logger.warning(
+            f"Chart folder not found: {chart_info['source']} / {chart_info['chart_name']}"
+        )
+        return []
+
+    events = getattr(_chart_streaks(chart_p, song_credits.load_table(data_dir)), kind)
+    return [
+        {"date": week, "artist": artist, "song": song, "position": position}
+        for week, artist, song, position in events
+        if (start_date is None or week >= start_date)
+        and (end_date is None or week <= end_date)
+        and (max_pos is None or (position and position <= max_pos))
+    ]
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    logging.basicConfig(level=logging.INFO)
+
+    parser = argparse.ArgumentParser(description="Chart runs, debuts and re-entries")
+    parser.add_argument(
+        "--data_dir", default=str(Path(__file__).parent.parent / "data")
+    )
+    parser.add_argument("--chart_num", type=int, default=1, help="Chart number from list")
+    parser.add_argument(
+        "--query", choices=("runs",) + EVENT_KINDS, default="runs"
+    )
+    parser.add_argument(
+        "--threshold", type=int, default=1, help="Top position for runs (1 = #1 runs)"
+    )
+    parser.add_argument("--start_date")
+    parser.add_argument("--end_date")
+    parser.add_argument("--max_pos", type=int, help="Top position for debuts/re-entries")
+    parser.add_argument("--limit", type=int, default=10)
+    instrumentation.add_profile_argument(parser)
+    args = parser.parse_args()
+    instrumentation.profile_from_args(args)
+
+    chart_infos = chart_discovery.discover_chart_folders(args.data_dir)
+    try:
+        selected_chart = chart_infos[args.chart_num - 1]
+    except IndexError:
+        print("Invalid chart number.")
+        sys.exit(1)
+
+    print(f"## {selected_chart['source']} / {selected_chart['chart_name']}\n")
+    if args.query == "runs":
+        runs = get_longest_runs(
+            args.data_dir,
+            selected_chart,
+            args.threshold,
+            args.start_date,
+            args.end_date,
+            args.limit,
+        )
+        label = "#1" if args.threshold == 1 else f"top {args.threshold}"
+        print(f"### Longest {label} runs\n")
+        print("| Weeks | Artist | Song | From | To | Best |")
+        print("|-------|--------|------|------|----|------|")
+        for r in runs:
+            print(
+                f"| {r['weeks']} | {r['artist']} | {r['song']} | "
+                f"{r['start']} | {r['end']} | #{r['best']} |"
+            )
+    else:
+        events = get_chart_events(
+            args.data_dir,
+            selected_chart,
+            args.query,
+            args.start_date,
+            args.end_date,
+            args.max_pos,
+        )
+        print("| Date | Artist | Song | Position |")
+        print("|------|--------|------|----------|")
+        for e in events[: args.limit] if args.limit else events:
+            print(f"| {e['date']} | {e['artist']} | {e['song']} | #{e['position']} |")
+        print(f"\n{len(events)} {args.query} found.")
@@ -1,7 +1,60 @@
 import re
 from datetime import datetime, timedelta, date
+from functools import lru_cache
 from typing import Tuple, List, Optional
 
+_DATE_IN_NAME = re.compile(r"(\d{4}-\d{2}-\d{2})")
+
+# Memoized parses are bounded; week file names of several archives fit easily
+FILENAME_CACHE_SIZE = 1 << 16
+
+
+@lru_cache(maxsize=FILENAME_CACHE_SIZE)
+def parse_date_ordinal(date_str: str) -> int:
+    """
+    Parses a YYYY-MM-DD string into its proleptic Gregorian day ordinal
+    (date.toordinal()), so dates compare and subtract as plain integers.
+    """
+    try:
+        return datetime.strptime(date_str, "%Y-%m-%d").date().toordinal()
+    except (TypeError, ValueError):
+        raise ValueError("Date format must be YYYY-MM-DD")
+
+
+def parse_date_range(start_date_str: str, end_date_str: str) -> Tuple[int, int]:
+    """Parses inclusive range bounds once into (start, end) day ordinals."""
+    return parse_date_ordinal(start_date_str), parse_date_ordinal(end_date_str)
+
+
+def validate_window(start_date_str: Optional[str], end_date_str: Optional[str]) -> None:
+    """Checks the optional bounds of a date window, raising 'Invalid date range'."""
+    for value in (start_date_str, end_date_str):
+        if value is None:
+            continue
+        try:
+            parse_date_ordinal(value)
+        except ValueError as e:
+            raise ValueError(f"Invalid date range: {e}")
+
+
+def ordinal_to_date_str(ordinal: int) -> str:
+    return date.fromordinal(ordinal).isoformat()
+
+
+@lru_cache(maxsize=4096)
+def _week_of(reference_date_str: str) -> Tuple[Tuple[str, ...], int]:
+    ordinal = parse_date_ordinal(reference_date_str)
+    # Week starts on Sunday; ordinal 1 (0001-01-01) is a Monday
+    sunday = ordinal - ordinal % 7
+    patterns = tuple(date.fromordinal(sunday + i).strftime("-%m-%d") for i in range(7))
+    return patterns, sunday
+
+
+def get_week_ordinals(reference_date_str: str) -> Tuple[int, int]:
+    """Day ordinals of the Sunday and Saturday of the week containing the date."""
+    _, sunday = _week_of(reference_date_str)
+    return sunday, sunday + 6
+
 
 def get_week_patterns(reference_date_str: str) -> Tuple[List[str], date, date]:
     """
@@ -13,41 +66,41 @@ def get_week_patterns(reference_date_str: str) -> Tuple[List[str], date, date]:
         sunday_start: date object of the Sunday that starts the week
         saturday_end: date object of the Saturday that ends the week
     """
-    try:
-        date_obj = datetime.strptime(reference_date_str, "%Y-%m-%d").date()
-    except ValueError:
-        raise ValueError("Date format must be YYYY-MM-DD")
-
-    # Week starts on Sunday
-    offset = (date_obj.weekday() + 1) % 7
-    sunday_start = date_obj - timedelta(days=offset)
-    saturday_end = sunday_start + timedelta(days=6)
-
-    patterns = [(sunday_start + timedelta(days=i)).strftime("-%m-%d") for i in range(7)]
-    return patterns, sunday_start, saturday_end
+    patterns, sunday = _week_of(reference_date_str)
+    return list(patterns), date.fromordinal(sunday), date.fromordinal(sunday + 6)
 
 
+@lru_cache(maxsize=FILENAME_CACHE_SIZE)
 def extract_date_from_filename(filename: str) -> Optional[str]:
     """
     Extracts the first YYYY-MM-DD date found in the filename string.
     Works with or without prefixes (e.g. 'billboard-hot-100-2025-01-04.json').
     """
-    match = re.search(r"(\d{4}-\d{2}-\d{2})", filename)
+    match = _DATE_IN_NAME.search(filename)
     return match.group(1) if match else None
 
 
+@lru_cache(maxsize=FILENAME_CACHE_SIZE)
+def filename_ordinal(filename: str) -> Optional[int]:
+    """Day ordinal of the date in a filename, or None if it has no valid date."""
+    date_str = extract_date_from_filename(filename)
+    if not date_str:
+        return None
+    try:
+        return parse_date_ordinal(date_str)
+    except ValueError:
+        return None
+
+
 def is_date_in_range(filename: str, start_date_str: str, end_date_str: str) -> bool:
     """
     Checks if the date extracted from the filename falls within the given range (inclusive).
     """
-    date_str = extract_date_from_filename(filename)
-    if not date_str:
+    file_ordinal = filename_ordinal(filename)
+    if file_ordinal is None:
         return False
-
     try:
-        file_date = datetime.strptime(date_str, "%Y-%m-%d").date()
-        start = datetime.strptime(start_date_str, "%Y-%m-%d").date()
-        end = datetime.strptime(end_date_str, "%Y-%m-%d").date()
-        return start <= file_date <= end
+        start, end = parse_date_range(start_date_str, end_date_str)
     except ValueError:
         return False
+    return start <= file_ordinal <= end
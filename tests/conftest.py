@@ -0,0 +1,21 @@
+import json
+import sys
+from pathlib import Path
+from typing import Any, Dict, List
+
+import pytest
+
+# The scripts import each other by module name, as when run from scripts/
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+
+
+def write_week(chart_dir: Path, date: str, entries: List[Dict[str, Any]]) -> Path:
+    """Writes a week JSON file the way the chart archives lay them out."""
+    path = chart_dir / f"{date}.json"
+    path.write_text(json.dumps({"date": date, "data": entries}), encoding="utf-8")
+    return path
+
+
+@pytest.fixture
+def write_week_file():
+    return write_week
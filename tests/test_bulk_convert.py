@@ -0,0 +1,102 @@
+import os
+import time
+
+import pytest
+
+import bulk_convert
+import chart_store
+
+WEEKS = ["2021-01-02", "2021-01-09", "2021-01-16", "2021-01-23"]
+
+
+def _entries(week: str):
+    return [
+        {"song": f"Song {week}", "artist": "Artist", "this_week": 1, "weeks_on_chart": 1},
+        {"song": "Other Song", "artist": "Other Artist", "this_week": 2, "weeks_on_chart": 3},
+    ]
+
+
+@pytest.fixture
+def folders(tmp_path, write_week_file):
+    """An input folder of week files plus one invalid file, and an output path."""
+    input_dir = tmp_path / "input"
+    input_dir.mkdir()
+    for week in WEEKS:
+        write_week_file(input_dir, week, _entries(week))
+    (input_dir / "broken.json").write_text("{not json", encoding="utf-8")
+    return input_dir, tmp_path / "output"
+
+
+def _convert(folders, **kwargs):
+    input_dir, output_dir = folders
+    return bulk_convert.convert_folder(
+        str(input_dir), str(output_dir), executor="serial", verbose=False, **kwargs
+    )
+
+
+def _counts(summary):
+    return summary["converted"], summary["skipped"], summary["failed"]
+
+
+def _touch_later(path):
+    # Newer than any output written so far, whatever the clock resolution
+    later = time.time() + 10
+    os.utime(path, (later, later))
+
+
+@pytest.mark.parametrize("output_format", ["pretty", "minified"])
+def test_skip_and_force_counts(folders, output_format):
+    input_dir, output_dir = folders
+
+    summary = _convert(folders, output_format=output_format)
+    assert _counts(summary) == (len(WEEKS), 0, 1)
+    assert [name for name, _ in summary["failures"]] == ["broken.json"]
+    assert summary["bytes_written"] == sum(
+        (output_dir / f"{week}.json").stat().st_size for week in WEEKS
+    )
+
+    # Up-to-date outputs are skipped; the broken file has none, so it is retried
+    assert _counts(_convert(folders, output_format=output_format)) == (0, len(WEEKS), 1)
+
+    _touch_later(input_dir / f"{WEEKS[1]}.json")
+    assert _counts(_convert(folders, output_format=output_format)) == (
+        1,
+        len(WEEKS) - 1,
+        1,
+    )
+
+    summary = _convert(folders, output_format=output_format, force=True)
+    assert _counts(summary) == (len(WEEKS), 0, 1)
+
+
+def test_chartstore_counts_and_store(folders, write_week_file):
+    input_dir, output_dir = folders
+
+    summary = _convert(folders, output_format="chartstore")
+    assert _counts(summary) == (len(WEEKS), 0, 1)
+    store = chart_store.open_store(output_dir)
+    assert store is not None
+    assert store.stems == WEEKS
+    assert store.week_entries(0).to_dicts() == _entries(WEEKS[0])
+
+    # Nothing to convert: the store is current and left as it is
+    store_file = chart_store.store_path(output_dir)
+    written = store_file.stat().st_mtime_ns
+    assert _counts(_convert(folders, output_format="chartstore")) == (0, len(WEEKS), 1)
+    assert store_file.stat().st_mtime_ns == written
+    assert chart_store.has_store(output_dir)
+
+    # A changed week is converted again and patched into the store
+    changed = _entries(WEEKS[2])
+    changed[0]["this_week"] = 5
+    _touch_later(write_week_file(input_dir, WEEKS[2], changed))
+    summary = _convert(folders, output_format="chartstore")
+    assert _counts(summary) == (1, len(WEEKS) - 1, 1)
+    store = chart_store.open_store(output_dir)
+    assert store is not None
+    assert store.stems == WEEKS
+    assert store.week_entries(2).to_dicts() == changed
+
+    summary = _convert(folders, output_format="chartstore", force=True)
+    assert _counts(summary) == (len(WEEKS), 0, 1)
+    assert chart_store.open_store(output_dir).week_entries(2).to_dicts() == changed
@@ -0,0 +1,78 @@
+import pytest
+
+import chart_week
+import store_format
+
+ENTRIES = [
+    {
+        "song": "Blinding Lights",
+        "artist": "The Weeknd",
+        "this_week": 1,
+        "last_week": 2,
+        "peak_position": 1,
+        "weeks_on_chart": 20,
+    },
+    # A debut: last_week is null
+    {
+        "song": "Levitating",
+        "artist": "Dua Lipa",
+        "this_week": 2,
+        "last_week": None,
+        "peak_position": 2,
+        "weeks_on_chart": 1,
+    },
+    # Only some numeric keys present
+    {"song": "Circles", "artist": "Post Malone", "this_week": 3},
+]
+
+
+def test_views_match_the_dict_entries():
+    week = chart_week.ChartWeek.from_entries(ENTRIES)
+    assert week is not None
+    assert len(week) == len(ENTRIES)
+    assert week.to_dicts() == ENTRIES
+    for view, entry in zip(week, ENTRIES):
+        assert view == entry
+        assert view.to_dict() == entry
+        assert view.keys() == list(entry)
+        assert view.items() == list(entry.items())
+        for key in chart_week.ENTRY_KEYS:
+            assert (key in view) == (key in entry)
+            assert view.get(key) == entry.get(key)
+            assert view.get(key, "default") == entry.get(key, "default")
+
+
+def test_store_weeks_match_the_dict_entries():
+    store = store_format.ChartStore(store_format.encode_weeks([("2020-04-04", ENTRIES)]))
+    week = store.week_entries(0)
+    assert isinstance(week, chart_week.ChartWeek)
+    assert week.to_dicts() == ENTRIES
+    assert [store.entry(row) for row in store.week_rows(0)] == ENTRIES
+
+
+def test_absent_and_null_values():
+    week = chart_week.ChartWeek.from_entries(ENTRIES)
+    debut, partial = week[1], week[2]
+    assert "last_week" in debut and debut["last_week"] is None
+    assert "last_week" not in partial
+    with pytest.raises(KeyError):
+        partial["last_week"]
+    assert partial.get("unknown") is None
+
+
+def test_indexing_and_slicing():
+    week = chart_week.ChartWeek.from_entries(ENTRIES)
+    assert week[-1] == ENTRIES[-1]
+    assert week[1:] == ENTRIES[1:]
+    with pytest.raises(IndexError):
+        week[len(ENTRIES)]
+
+
+def test_entries_outside_the_layout_are_kept_as_dicts():
+    extra_key = [dict(ENTRIES[0], image="cover.jpg")]
+    float_rank = [dict(ENTRIES[0], this_week=1.5)]
+    zero_rank = [dict(ENTRIES[0], this_week=0)]
+    too_large = [dict(ENTRIES[0], weeks_on_chart=chart_week.INT_MAX + 1)]
+    no_artist = [{"song": "Untitled", "this_week": 1}]
+    for entries in (extra_key, float_rank, zero_rank, too_large, no_artist):
+        assert chart_week.ChartWeek.from_entries(entries) is None
@@ -0,0 +1,95 @@
+import datetime
+import json
+import random
+
+import pytest
+
+import chart_store
+import position_range_numpy
+import songs_in_position_range_search as range_search
+
+pytestmark = pytest.mark.skipif(
+    not position_range_numpy.is_available(), reason="NumPy is not installed"
+)
+
+# Credit variants of the same songs, so both engines have to group them
+SONGS = [
+    ("Simon & Garfunkel", "The Boxer"),
+    ("Simon and Garfunkel", "the boxer"),
+    ("Drake Feat. Rihanna", "Take Care"),
+    ("Drake featuring Rihanna", "Take Care "),
+    ("Rocío Dúrcal", "Amor Eterno"),
+    ("Rocio Durcal", "Amor eterno"),
+    ("Prince & The Revolution", "Purple Rain"),
+    ("Prince", "Purple Rain"),
+    ("  ", "No Artist"),
+    ("No Title", ""),
+] + [(f"Artist {i % 15}", f"Song {i}") for i in range(40)]
+
+
+@pytest.fixture
+def chart(tmp_path, write_week_file):
+    """A synthetic chart of 30 weekly top 20s, with an alias file."""
+    data_dir = tmp_path / "data"
+    chart_dir = data_dir / "test" / "test-chart"
+    chart_dir.mkdir(parents=True)
+    aliases = {"artists": {"Prince & The Revolution": "Prince"}, "songs": {}}
+    (data_dir / "aliases.json").write_text(json.dumps(aliases), encoding="utf-8")
+
+    rng = random.Random(7)
+    day = datetime.date(2020, 1, 4)
+    for _ in range(30):
+        entries = []
+        for pos, (artist, song) in enumerate(rng.sample(SONGS, 20), start=1):
+            entries.append(
+                {
+                    "song": song,
+                    "artist": artist,
+                    "this_week": None if rng.random() < 0.05 else pos,
+                    "last_week": None,
+                    "peak_position": pos,
+                    "weeks_on_chart": 1,
+                }
+            )
+        write_week_file(chart_dir, day.isoformat(), entries)
+        day += datetime.timedelta(days=7)
+
+    chart_info = {"source": "test", "chart_name": "Test", "data_dir": str(chart_dir)}
+    return str(data_dir), chart_info
+
+
+@pytest.mark.parametrize("include_peak_date", [False, True])
+@pytest.mark.parametrize(
+    "start_date, end_date, min_pos, max_pos",
+    [
+        ("2020-01-01", "2020-12-31", 1, 10),
+        ("2020-02-01", "2020-05-01", 3, 7),
+        ("2020-01-04", "2020-01-04", 1, 20),
+        ("2021-01-01", "2021-12-31", 1, 10),
+    ],
+)
+def test_numpy_engine_matches_python_engine(
+    chart, start_date, end_date, min_pos, max_pos, include_peak_date
+):
+    data_dir, chart_info = chart
+    args = (data_dir, chart_info, start_date, end_date, min_pos, max_pos, include_peak_date)
+
+    # From the JSON weeks, before the chart has a store
+    expected = range_search.get_songs_in_position_range(*args, engine="python")
+    chart_store.compile_chart(chart_info["data_dir"])
+    assert range_search.get_songs_in_position_range(*args, engine="numpy") == expected
+    # The Python engine over the store agrees as well
+    assert range_search.get_songs_in_position_range(*args, engine="python") == expected
+
+
+def test_aliases_and_credit_variants_are_grouped(chart):
+    data_dir, chart_info = chart
+    chart_store.compile_chart(chart_info["data_dir"])
+    results = range_search.get_songs_in_position_range(
+        data_dir, chart_info, "2020-01-01", "2020-12-31", 1, 20, engine="numpy"
+    )
+    titles = [r["song"].lower().strip() for r in results]
+    for title in ("the boxer", "take care", "amor eterno", "purple rain"):
+        assert titles.count(title) == 1
+    assert "no artist" not in titles
+    assert all(r["artist"] != "No Title" for r in results)
@@ -0,0 +1,67 @@
+import json
+import pickle
+
+import song_credits
+
+
+def test_canonical_artist_rules():
+    assert song_credits.canonical_artist("  Rocío  Dúrcal ") == "rocio durcal"
+    assert song_credits.canonical_artist("Simon & Garfunkel") == "simon and garfunkel"
+    assert song_credits.canonical_artist("Simon&Garfunkel") == "simon and garfunkel"
+    for credit in ("Drake Feat. Rihanna", "Drake feat Rihanna", "Drake Ft. Rihanna"):
+        assert song_credits.canonical_artist(credit) == "drake featuring rihanna"
+    assert song_credits.canonical_artist(None) == ""
+
+
+def test_canonical_title_keeps_featuring_words():
+    assert song_credits.canonical_title("Don’t  Stop") == "don't stop"
+    assert song_credits.canonical_title("Feat. Of Clay") == "feat. of clay"
+
+
+def test_song_ids_follow_canonical_credits():
+    credits = song_credits.CreditTable()
+    song = credits.song_id("Simon & Garfunkel", "The Boxer")
+    assert credits.song_id(" simon and garfunkel", "the  boxer") == song
+    assert credits.song_id("Simon & Garfunkel", "Mrs. Robinson") != song
+    assert credits.song_key("Simon & Garfunkel", "The Boxer") == (
+        "simon and garfunkel" + song_credits.KEY_SEPARATOR + "the boxer"
+    )
+    assert credits.key_of(song) == credits.song_key("SIMON & GARFUNKEL", "THE BOXER")
+
+
+def test_aliases_map_credits_onto_canonical_ones():
+    credits = song_credits.CreditTable(
+        {"Prince & The Revolution": "Prince"}, {"Purple Rain (Live)": "Purple Rain"}
+    )
+    song = credits.song_id("Prince", "Purple Rain")
+    assert credits.song_id("PRINCE and the revolution", "purple rain (live)") == song
+    assert credits.artist_key("Prince & The Revolution") == "prince"
+    assert credits.song_id("Prince & The Revolution", "When Doves Cry") == (
+        credits.song_id("Prince", "When Doves Cry")
+    )
+    plain = song_credits.CreditTable()
+    assert plain.song_id("Prince & The Revolution", "Purple Rain") != plain.song_id(
+        "Prince", "Purple Rain"
+    )
+
+
+def test_load_table_reads_the_alias_file(tmp_path):
+    assert song_credits.load_table(str(tmp_path)).digest == ""
+
+    aliases = {"artists": {"The Weeknd & Daft Punk": "The Weeknd"}, "songs": {}}
+    song_credits.aliases_path(str(tmp_path)).write_text(json.dumps(aliases))
+    credits = song_credits.load_table(str(tmp_path))
+    assert credits.digest
+    assert credits.artist_key("the weeknd and daft punk") == "the weeknd"
+    assert song_credits.load_table(str(tmp_path)) is credits
+
+
+def test_tables_pickle_as_their_aliases():
+    credits = song_credits.CreditTable({"B.B. King": "BB King"}, {}, "digest-1")
+    credits.song_id("Someone", "Something")
+    restored = pickle.loads(pickle.dumps(credits))
+    assert restored.digest == "digest-1"
+    assert restored.artist_aliases == credits.artist_aliases
+    assert restored.artist_key("b.b. king") == "bb king"
+    # Rebuilt once per digest in the receiving process
+    assert pickle.loads(pickle.dumps(credits)) is restored